@@ -0,0 +1,149 @@
+"""Микро-бенчмарки для горячих участков приложения.
+
+Запуск:
+    python -m core.benchmarks inserts [число строк, по умолчанию 100000]
+    python -m core.benchmarks pdf [путь/к/книге.pdf]
+    python -m core.benchmarks html [папка с сохраненными страницами | cache]
+
+Без папки бенчмарк HTML разбирает синтетические страницы каталога из
+test_materials/html (список из 40 книг и большая страница книги);
+cache — страницы из кэша загрузчика каталога.
+"""
+import os
+import sys
+import tempfile
+import time
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HTML_FIXTURES = os.path.join(BASE_DIR, "test_materials", "html")
+PDF_FIXTURE = os.path.join(BASE_DIR, "test_materials", "105693559.a4.pdf")
+
+
+def _measure(func, items, repeat):
+    """Лучшее среднее время одного вызова func (в миллисекундах)"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        elapsed = (time.perf_counter() - start) / len(items) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_inserts(rows=100000):
+    """Скорость добавления книг (строк в секунду) в разных профилях хранения.
+
+    compat с commit на каждую строку — поведение до профилей хранения;
+    дальше WAL-профиль с commit на строку, одной транзакцией и add_books.
+    Каждый вариант пишет в новую базу во временной папке.
+    """
+    from core.database import DatabaseManager, close_all_pools
+
+    def one_by_one(db):
+        for i in range(rows):
+            db.add_book(f"Книга {i}", f"Автор {i % 1000}", 2000, f"/books/{i}.pdf", None, None, 1)
+
+    def in_transaction(db):
+        with db.transaction():
+            one_by_one(db)
+
+    def batched(db):
+        db.add_books([
+            {'title': f"Книга {i}", 'author': f"Автор {i % 1000}", 'publication_year': 2000,
+             'file_path': f"/books/{i}.pdf"}
+            for i in range(rows)
+        ], 1)
+
+    variants = [
+        ("compat, commit на строку", "compat", one_by_one),
+        ("WAL, commit на строку", "performance", one_by_one),
+        ("WAL, одна транзакция", "performance", in_transaction),
+        ("WAL, add_books", "performance", batched),
+    ]
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        for number, (name, profile, insert) in enumerate(variants):
+            db = DatabaseManager(os.path.join(folder, f"bench_{number}.db"), storage_profile=profile)
+            db.register_user("bench", "bench@example.com", "bench", "bench")
+            start = time.perf_counter()
+            insert(db)
+            results[name] = rows / (time.perf_counter() - start)
+            db.close()
+            close_all_pools()
+    return results
+
+
+def bench_qimage_conversion(filepath=PDF_FIXTURE, pages=10, dpi=96, repeat=3):
+    """Сравнивает перевод fitz.Pixmap в QImage через PNG и напрямую из samples"""
+    import fitz  # PyMuPDF
+    from PyQt5.QtGui import QImage
+    from core.pdf_handler import pixmap_to_qimage
+
+    with fitz.open(filepath) as doc:
+        pixmaps = [doc.load_page(i).get_pixmap(dpi=dpi) for i in range(min(pages, len(doc)))]
+
+    def via_png(pix):
+        image = QImage()
+        image.loadFromData(pix.tobytes("png"))
+        return image
+
+    def via_samples(pix):
+        return pixmap_to_qimage(pix, detach=True)
+
+    return {
+        "png": _measure(via_png, pixmaps, repeat),
+        "samples": _measure(via_samples, pixmaps, repeat),
+    }
+
+
+def load_html_fixtures(folder=HTML_FIXTURES):
+    """Сохраненные страницы каталога: файлы *.html из папки или ответы из HttpCache ("cache")"""
+    if folder != "cache":
+        pages = []
+        for name in sorted(os.listdir(folder)):
+            if name.endswith(".html"):
+                with open(os.path.join(folder, name), encoding="utf-8") as f:
+                    pages.append(f.read())
+        return pages
+    from core.http_cache import HttpCache
+    cache = HttpCache()
+    try:
+        return [row[0] for row in cache.conn.execute("SELECT body FROM responses")]
+    finally:
+        cache.close()
+
+
+def bench_html_parsers(pages, base_url="https://flibusta.su", repeat=3):
+    """Скорость разбора страниц каталога каждым доступным способом (страниц в секунду)"""
+    from core.html_parser import available_backends, parse_listing, parse_details
+
+    def parse(backend):
+        def run(html):
+            # Страница списка содержит div.desc, остальные — страницы книг
+            if 'class="desc"' in html:
+                parse_listing(html, base_url, backend)
+            else:
+                parse_details(html, base_url, backend)
+        return run
+
+    return {backend: 1000 / _measure(parse(backend), pages, repeat) for backend in available_backends()}
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "inserts":
+        for name, speed in bench_inserts(*map(int, sys.argv[2:3])).items():
+            print(f"{name}: {speed:.0f} строк/с")
+    elif command == "pdf":
+        results = bench_qimage_conversion(*sys.argv[2:3])
+        print(f"PNG: {results['png']:.2f} мс/стр., samples: {results['samples']:.2f} мс/стр.")
+    elif command == "html":
+        pages = load_html_fixtures(*sys.argv[2:3])
+        if not pages:
+            sys.exit("Нет сохраненных страниц для бенчмарка")
+        for backend, speed in bench_html_parsers(pages).items():
+            print(f"{backend}: {speed:.0f} стр./с")
+    else:
+        sys.exit(__doc__)
@@ -4,6 +4,7 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtGui import QPixmap
 from PyQt5.QtCore import Qt
+from core.cover_cache import get_cover_cache
 import shutil
 import os
 
@@ -33,8 +34,7 @@ class BookMetadataDialog(QDialog):
         # Обложка книги
         self.cover_label = QLabel()
         if initial_cover_path and os.path.exists(initial_cover_path):
-            pixmap = QPixmap(initial_cover_path)
-            self.cover_label.setPixmap(pixmap.scaled(280, 400, Qt.KeepAspectRatio))
+            get_cover_cache().fetch(initial_cover_path, "details", self.show_initial_cover)
         self.cover_label.setAlignment(Qt.AlignCenter)
         layout.addWidget(self.cover_label)
         
@@ -219,6 +219,11 @@ class BookMetadataDialog(QDialog):
         self.should_open_book = True
         self.accept()
 
+    def show_initial_cover(self, pixmap):
+        """Показываем сохраненную обложку, если пользователь еще не выбрал другую"""
+        if pixmap is not None and self.custom_cover_path is None:
+            self.cover_label.setPixmap(pixmap)
+
     def change_cover(self):
         """Обработчик изменения обложки"""
         file_path, _ = QFileDialog.getOpenFileName(
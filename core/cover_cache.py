@@ -0,0 +1,239 @@
+import os
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, Qt, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap
+from core.image_fetcher import get_image_fetcher
+
+
+# Размеры миниатюр обложек, которые используются в интерфейсе
+THUMBNAIL_SIZES = {
+    "grid": (180, 270),  # Сетки каталога и вишлиста
+    "card": (200, 300),  # Карточки книг на главной странице
+    "details": (280, 400),  # Страница книги и окно информации о книге
+}
+
+
+class _PrepareTask(QRunnable):
+    """Нарезает миниатюры обложки в потоке из QThreadPool"""
+
+    def __init__(self, cover_cache, source, image, dispatcher):
+        super().__init__()
+        self.cover_cache = cover_cache
+        self.source = source
+        self.image = image
+        self.dispatcher = dispatcher
+
+    def run(self):
+        self.cover_cache.prepare(self.source, self.image)
+        self.dispatcher.prepared.emit(self.source)
+
+
+class _PrepareDispatcher(QObject):
+    """Передает в поток интерфейса сообщения о готовых миниатюрах"""
+
+    prepared = pyqtSignal(str)  # Источник, для которого нарезаны миниатюры
+
+    def __init__(self, on_prepared):
+        super().__init__()
+        self.prepared.connect(on_prepared, Qt.QueuedConnection)
+
+
+class CoverCache:
+    """Общий кэш обложек из двух уровней.
+
+    На диске для каждой обложки заранее сохраняются миниатюры всех
+    размеров из THUMBNAIL_SIZES; файлы называются по хэшу содержимого
+    картинки, поэтому одна обложка, пришедшая из разных мест, хранится
+    один раз. Какой картинке соответствует файл или адрес, записано в
+    index.db. В памяти хранятся уже декодированные QPixmap (LRU,
+    не больше memory_bytes), так что сетки не декодируют и не
+    масштабируют полноразмерные картинки.
+
+    Миниатюры нарезаются при создании обложки (prepare() из заданий
+    импорта) или в фоне из fetch(); get() только читает готовые файлы.
+    prepare() и put_image() можно вызывать из любого потока, остальное
+    работает в потоке интерфейса (QPixmap нельзя создавать в других).
+    """
+
+    def __init__(self, cache_dir="data/cover_cache", memory_bytes=64 * 1024 * 1024):
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.cache_dir = os.path.join(base_dir, cache_dir)
+        self.memory_bytes = memory_bytes
+        self._pixmaps = OrderedDict()  # (хэш, размер) -> QPixmap, от старых к новым
+        self._memory_used = 0
+        self._preparing = {}  # Источник -> функции, ожидающие его миниатюры
+        self._dispatcher = None  # Создается при первой фоновой нарезке, в потоке интерфейса
+        self.lock = threading.Lock()  # Индекс общий для потока интерфейса и заданий импорта
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.index = sqlite3.connect(os.path.join(self.cache_dir, "index.db"), check_same_thread=False)
+        self.index.execute(
+            "CREATE TABLE IF NOT EXISTS sources (source TEXT PRIMARY KEY, content_key TEXT NOT NULL)"
+        )
+        self.index.commit()
+
+    @staticmethod
+    def source_key(source):
+        """Ключ источника: адрес как есть, для файла — путь, размер и время изменения"""
+        if source.startswith(("http://", "https://")):
+            return source
+        stat = os.stat(source)
+        return f"{os.path.abspath(source)}:{stat.st_size}:{stat.st_mtime}"
+
+    def thumbnail_path(self, content_key, size):
+        width, height = THUMBNAIL_SIZES[size]
+        return os.path.join(self.cache_dir, content_key[:2], f"{content_key}_{width}x{height}.png")
+
+    def _lookup(self, source):
+        with self.lock:
+            row = self.index.execute(
+                "SELECT content_key FROM sources WHERE source = ?", (self.source_key(source),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put_image(self, source, image):
+        """Сохраняет миниатюры картинки всех размеров, возвращает хэш содержимого"""
+        image = image.convertToFormat(QImage.Format_ARGB32)
+        bits = image.constBits()
+        bits.setsize(image.byteCount())
+        content_key = hashlib.sha1(
+            f"{image.width()}x{image.height()}:".encode() + bytes(bits)
+        ).hexdigest()
+
+        for size, (width, height) in THUMBNAIL_SIZES.items():
+            path = self.thumbnail_path(content_key, size)
+            if os.path.exists(path):
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            thumbnail = image
+            if image.width() > width or image.height() > height:
+                thumbnail = image.scaled(width, height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            # Пишем во временный файл, чтобы не оставить недописанную миниатюру;
+            # имя с номером потока — одну картинку могут нарезать одновременно
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            thumbnail.save(tmp_path, "PNG")
+            os.replace(tmp_path, path)
+
+        with self.lock:
+            self.index.execute(
+                "INSERT OR REPLACE INTO sources (source, content_key) VALUES (?, ?)",
+                (self.source_key(source), content_key)
+            )
+            self.index.commit()
+        return content_key
+
+    def prepare(self, source, image=None):
+        """Нарезает миниатюры локальной обложки заранее, возвращает хэш или None.
+
+        Вызывается из заданий импорта сразу после создания обложки;
+        image можно передать, если картинка уже есть в памяти.
+        """
+        try:
+            if image is None:
+                image = QImage(source)
+            if image.isNull():
+                return None
+            return self.put_image(source, image)
+        except OSError as e:
+            print(f"Ошибка при создании миниатюр обложки: {e}")
+            return None
+
+    def get_path(self, source, size):
+        """Путь к готовой миниатюре нужного размера или None"""
+        try:
+            content_key = self._lookup(source)
+        except OSError:
+            return None
+        if content_key is None or not os.path.exists(self.thumbnail_path(content_key, size)):
+            return None
+        return self.thumbnail_path(content_key, size)
+
+    def get(self, source, size):
+        """Возвращает QPixmap обложки нужного размера или None"""
+        if not source:
+            return None
+        path = self.get_path(source, size)
+        if path is None:
+            return None
+        key = (os.path.basename(path), size)
+        pixmap = self._pixmaps.get(key)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(key)
+            return pixmap
+
+        pixmap = QPixmap(path)
+        if pixmap.isNull():
+            return None
+        self._pixmaps[key] = pixmap
+        self._memory_used += self._pixmap_bytes(pixmap)
+        # Вытесняем давно не использованные картинки
+        while self._memory_used > self.memory_bytes and len(self._pixmaps) > 1:
+            _, old = self._pixmaps.popitem(last=False)
+            self._memory_used -= self._pixmap_bytes(old)
+        return pixmap
+
+    def fetch(self, url, size, callback):
+        """Отдает обложку из кэша сразу или загружает её в фоне.
+
+        url — адрес или путь к локальному файлу; у локального файла без
+        миниатюр они нарезаются в QThreadPool. callback(QPixmap или None)
+        вызывается в потоке интерфейса.
+        """
+        pixmap = self.get(url, size)
+        if pixmap is not None:
+            callback(pixmap)
+            return
+
+        if not url.startswith(("http://", "https://")):
+            if not os.path.exists(url):
+                callback(None)
+                return
+            self._prepare_in_background(url, None, lambda: callback(self.get(url, size)))
+            return
+
+        def on_loaded(image):
+            if image.isNull():
+                callback(None)
+                return
+            self._prepare_in_background(url, image, lambda: callback(self.get(url, size)))
+
+        get_image_fetcher().fetch(url, on_loaded)
+
+    def _prepare_in_background(self, source, image, on_ready):
+        """Ставит нарезку миниатюр в QThreadPool; on_ready() вызывается в потоке интерфейса"""
+        in_flight = source in self._preparing
+        self._preparing.setdefault(source, []).append(on_ready)
+        if not in_flight:
+            if self._dispatcher is None:
+                self._dispatcher = _PrepareDispatcher(self._on_prepared)
+            QThreadPool.globalInstance().start(_PrepareTask(self, source, image, self._dispatcher))
+
+    def _on_prepared(self, source):
+        for callback in self._preparing.pop(source, []):
+            try:
+                callback()
+            except RuntimeError:
+                # Виджет, ожидавший обложку, уже удален
+                pass
+
+    @staticmethod
+    def _pixmap_bytes(pixmap):
+        return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+    def close(self):
+        self.index.close()
+
+
+_cover_cache = None
+_cover_cache_lock = threading.Lock()
+
+
+def get_cover_cache():
+    """Возвращает общий для приложения кэш обложек"""
+    global _cover_cache
+    with _cover_cache_lock:
+        if _cover_cache is None:
+            _cover_cache = CoverCache()
+    return _cover_cache
@@ -1,22 +1,499 @@
 import sqlite3
+import json
 import os
+import queue
+import re
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from pathlib import Path
+
+
+# Профили хранения: набор PRAGMA, применяемых к каждому соединению
+STORAGE_PROFILES = {
+    # Стандартное поведение SQLite: журнал отката и fsync на каждую транзакцию
+    "compat": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+    },
+    # WAL-журнал: читатели не блокируют писателя, fsync только при checkpoint
+    "performance": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64 * 1024,  # Отрицательное значение задается в КиБ
+        "temp_store": "MEMORY",
+    },
+}
+DEFAULT_STORAGE_PROFILE = "performance"
+
+
+def sort_key(text):
+    """Ключ сортировки строки без учета регистра для любого алфавита.
+
+    Встроенная в SQLite NOCASE приводит к одному регистру только латиницу,
+    поэтому кириллические названия сортировались бы с учетом регистра.
+    Буква «ё» сравнивается как «е», как в словарях. Ключи хранятся в
+    столбцах *_key и сравниваются обычным BINARY, поэтому база остается
+    доступной для записи из sqlite3 и других программ.
+    """
+    return text.casefold().replace("ё", "е") if text is not None else None
+
+
+# Столбцы с ключами сортировки: таблица -> [(исходный столбец, столбец ключа)]
+SORT_KEY_COLUMNS = {
+    "books": [("title", "title_key"), ("author", "author_key")],
+    "wishlist": [("title", "title_key"), ("author", "author_key")],
+    "categories": [("category_name", "name_key")],
+}
+
+
+# Изменение одной строки: таблица (books, wishlist, categories),
+# действие (insert, update, delete) и id строки
+Change = namedtuple("Change", "table action row_id")
+
+# Части запроса отчета для постраничного чтения (см. DatabaseManager.report_page)
+ReportPage = namedtuple("ReportPage", "columns where order params nulls_last")
+
+
+class ConnectionPool:
+    """Общий для процесса набор соединений: одно пишущее и несколько читающих"""
+
+    def __init__(self, db_path, read_pool_size=4, storage_profile=DEFAULT_STORAGE_PROFILE):
+        self.db_path = db_path
+        self.read_pool_size = read_pool_size
+        self.pragmas = STORAGE_PROFILES[storage_profile]
+        # Все изменения идут через одно соединение, поэтому защищаем его блокировкой
+        self.write_lock = threading.RLock()
+        self.transaction_depth = 0  # Глубина вложенных транзакций на пишущем соединении
+        self.writer = self._connect()
+        self.schema_ready = False  # Таблицы и миграции применяются один раз на процесс
+        self.listeners = []  # Подписчики на изменения строк
+        self.pending_changes = []  # Изменения текущей транзакции, ждущие commit
+        self._readers = queue.Queue()
+        self._readers_created = 0
+        self._readers_lock = threading.Lock()
+
+    def _connect(self, read_only=False):
+        if read_only:
+            uri = f"{Path(self.db_path).as_uri()}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # Для получения результатов в виде словарей
+        for name, value in self.pragmas.items():
+            # Режим журнала хранится в самом файле базы, его меняет только писатель
+            if read_only and name == "journal_mode":
+                continue
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    @contextmanager
+    def reader(self):
+        """Выдает читающее соединение из пула и возвращает его обратно"""
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            with self._readers_lock:
+                can_create = self._readers_created < self.read_pool_size
+                if can_create:
+                    self._readers_created += 1
+            # Если лимит исчерпан, ждем, пока кто-нибудь вернет соединение
+            conn = self._connect(read_only=True) if can_create else self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    def close(self):
+        """Закрывает все соединения пула"""
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
+        # Ждем, пока пишущий поток завершит свою транзакцию
+        with self.write_lock:
+            # Обновляем статистику планировщика для индексов перед закрытием
+            self.writer.execute("PRAGMA optimize")
+            self.writer.close()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_name="data/database.db", storage_profile=DEFAULT_STORAGE_PROFILE):
+    """Возвращает общий пул соединений для указанной базы данных"""
+    # Получаем абсолютный путь к базе данных
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    db_path = os.path.abspath(os.path.join(base_dir, db_name))
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            # Создание директорию data, если она не существует
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            pool = ConnectionPool(db_path, storage_profile=storage_profile)
+            _pools[db_path] = pool
+        return pool
+
+
+def close_all_pools():
+    """Закрывает все пулы соединений (вызывается при выходе из приложения)"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
 
 
 class DatabaseManager:
-    def __init__(self, db_name="data/database.db"):
-        # Получаем абсолютный путь к базе данных
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        db_path = os.path.join(base_dir, db_name)
-        # Создание директорию data, если она не существует
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        self.conn = sqlite3.connect(db_path)
-        self.conn.row_factory = sqlite3.Row  # Для получения результатов в виде словарей
+    def __init__(self, db_name="data/database.db", storage_profile=DEFAULT_STORAGE_PROFILE):
+        # Берем соединения из общего пула вместо открытия собственного
+        self.pool = get_pool(db_name, storage_profile)
+        self.conn = self.pool.writer
         self.cursor = self.conn.cursor()
+        with self.pool.write_lock:
+            if not self.pool.schema_ready:
+                self.apply_migrations()
+                self.backfill_sort_keys()
+                self.pool.schema_ready = True
+
+    # Нумерованные миграции схемы. Номер последней примененной миграции
+    # хранится в PRAGMA user_version, поэтому каждая выполняется ровно один раз.
+    # Новые миграции добавляются только в конец списка.
+    MIGRATIONS = (
+        (1, "migrate_legacy_schema"),
+        (2, "migrate_add_indexes"),
+        (3, "migrate_add_search_index"),
+        (4, "migrate_add_catalog_books"),
+        (5, "migrate_add_report_sort_indexes"),
+        (6, "migrate_add_publication_year_index"),
+    )
+
+    # Коды типов записей в полнотекстовом индексе: rowid = id * 4 + код
+    SEARCH_KINDS = {"book": 0, "category": 1, "wishlist": 2}
+
+    def apply_migrations(self):
+        """Применяет миграции, которые еще не были выполнены для этой базы"""
+        version = self.cursor.execute("PRAGMA user_version").fetchone()[0]
+        for number, method_name in self.MIGRATIONS:
+            if number <= version:
+                continue
+            # Каждая миграция вместе с новым номером версии применяется атомарно
+            self.cursor.execute("BEGIN")
+            try:
+                getattr(self, method_name)()
+                self.cursor.execute(f"PRAGMA user_version = {number}")
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+
+    def migrate_legacy_schema(self):
+        """Миграция 1: создает таблицы и приводит к текущему виду базы старых версий"""
         self.create_tables()
         self.migrate_users_table()  # Выполнене миграцию, если нужно
         self.migrate_wishlist_table()  # Добавление вызов миграции wishlist
         self.migrate_books_and_categories()  # Добавляем миграцию для books и categories
 
+    def migrate_add_indexes(self):
+        """Миграция 2: составные индексы под основные запросы приложения"""
+        # Проверка дубликатов в add_book и поиск книги по пути
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_books_user_file ON books (user_id, file_path)"
+        )
+        # get_books_by_period и отчеты по дате добавления
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_books_user_created ON books (user_id, created_at)"
+        )
+        # get_books_by_category
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_books_user_category ON books (user_id, category_id)"
+        )
+        # get_wishlist и get_wishlist_by_period
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_wishlist_user_added ON wishlist (user_id, added_date)"
+        )
+        # Проверка дубликатов в add_to_wishlist и удаление из вишлиста
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_wishlist_user_title_author ON wishlist (user_id, title, author)"
+        )
+        # get_user_categories (сортировка по названию)
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_categories_user_name ON categories (user_id, category_name)"
+        )
+        # get_categories_by_period
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_categories_user_created ON categories (user_id, created_at)"
+        )
+
+    def migrate_add_search_index(self):
+        """Миграция 3: полнотекстовый индекс FTS5 по книгам, категориям и вишлисту.
+
+        rowid записи вычисляется из id исходной строки и типа записи, поэтому
+        триггеры и set_book_text обновляют индекс точечно, без сканирования.
+        Текст PDF хранится только в индексе и заполняется при импорте книги.
+        """
+        self.cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+                title,
+                author,
+                body,
+                kind UNINDEXED,
+                user_id UNINDEXED,
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '2 3'
+            )
+        """)
+
+        # Совпадения в названии и авторе важнее совпадений в тексте книги
+        self.cursor.execute(
+            "INSERT INTO search_index (search_index, rank) VALUES ('rank', 'bm25(10.0, 5.0, 1.0)')"
+        )
+
+        # Триггеры поддерживают индекс в актуальном состоянии,
+        # текст PDF у книг добавляется отдельно через set_book_text
+        triggers = (
+            """
+            CREATE TRIGGER IF NOT EXISTS books_search_insert AFTER INSERT ON books BEGIN
+                INSERT INTO search_index (rowid, title, author, body, kind, user_id)
+                VALUES (new.book_id * 4, new.title, COALESCE(new.author, ''), '', 'book', new.user_id);
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS books_search_update AFTER UPDATE OF title, author, user_id ON books BEGIN
+                UPDATE search_index
+                SET title = new.title, author = COALESCE(new.author, ''), user_id = new.user_id
+                WHERE rowid = new.book_id * 4;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS books_search_delete AFTER DELETE ON books BEGIN
+                DELETE FROM search_index WHERE rowid = old.book_id * 4;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS categories_search_insert AFTER INSERT ON categories BEGIN
+                INSERT INTO search_index (rowid, title, author, body, kind, user_id)
+                VALUES (new.category_id * 4 + 1, new.category_name, '',
+                        COALESCE(new.category_description, ''), 'category', new.user_id);
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS categories_search_update AFTER UPDATE ON categories BEGIN
+                UPDATE search_index
+                SET title = new.category_name, body = COALESCE(new.category_description, ''),
+                    user_id = new.user_id
+                WHERE rowid = new.category_id * 4 + 1;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS categories_search_delete AFTER DELETE ON categories BEGIN
+                DELETE FROM search_index WHERE rowid = old.category_id * 4 + 1;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS wishlist_search_insert AFTER INSERT ON wishlist BEGIN
+                INSERT INTO search_index (rowid, title, author, body, kind, user_id)
+                VALUES (new.wishlist_id * 4 + 2, new.title, COALESCE(new.author, ''),
+                        COALESCE(new.isbn, ''), 'wishlist', new.user_id);
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS wishlist_search_update AFTER UPDATE ON wishlist BEGIN
+                UPDATE search_index
+                SET title = new.title, author = COALESCE(new.author, ''),
+                    body = COALESCE(new.isbn, ''), user_id = new.user_id
+                WHERE rowid = new.wishlist_id * 4 + 2;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS wishlist_search_delete AFTER DELETE ON wishlist BEGIN
+                DELETE FROM search_index WHERE rowid = old.wishlist_id * 4 + 2;
+            END
+            """,
+        )
+        for trigger in triggers:
+            self.cursor.execute(trigger)
+
+        # Заполняем индекс уже существующими данными
+        self.cursor.execute("""
+            INSERT INTO search_index (rowid, title, author, body, kind, user_id)
+            SELECT book_id * 4, title, COALESCE(author, ''), '', 'book', user_id FROM books
+        """)
+        self.cursor.execute("""
+            INSERT INTO search_index (rowid, title, author, body, kind, user_id)
+            SELECT category_id * 4 + 1, category_name, '', COALESCE(category_description, ''),
+                   'category', user_id
+            FROM categories
+        """)
+        self.cursor.execute("""
+            INSERT INTO search_index (rowid, title, author, body, kind, user_id)
+            SELECT wishlist_id * 4 + 2, title, COALESCE(author, ''), COALESCE(isbn, ''),
+                   'wishlist', user_id
+            FROM wishlist
+        """)
+
+    def migrate_add_catalog_books(self):
+        """Миграция 4: локальный каталог книг, загруженных с сайта"""
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS catalog_books (
+                catalog_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                page_url TEXT NOT NULL UNIQUE,
+                title TEXT NOT NULL,
+                author TEXT,
+                genre TEXT,
+                rating TEXT,
+                tags TEXT,
+                year TEXT,
+                isbn TEXT,
+                cover_url TEXT,
+                cover_path TEXT,
+                read_url TEXT,
+                fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_catalog_books_title ON catalog_books (title COLLATE NOCASE)"
+        )
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_catalog_books_author ON catalog_books (author COLLATE NOCASE)"
+        )
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_catalog_books_genre ON catalog_books (genre)"
+        )
+
+    def migrate_add_report_sort_indexes(self):
+        """Миграция 5: ключи и индексы для сортировки отчетов по названию и автору.
+
+        Ключ — sort_key() исходного столбца, он вычисляется в приложении,
+        поэтому индексы строятся по обычным столбцам без собственного
+        сравнения, и базу по-прежнему можно изменять из sqlite3.
+        """
+        for table, columns in SORT_KEY_COLUMNS.items():
+            # Индексы первой версии этой миграции, построенные на UNICODE_NOCASE
+            for column, _ in columns:
+                self.cursor.execute(f"DROP INDEX IF EXISTS idx_{table}_user_{column}_nocase")
+        self.add_sort_keys()
+
+    def add_sort_keys(self):
+        """Добавляет недостающие столбцы ключей сортировки, заполняет пустые ключи и строит индексы"""
+        for table, columns in SORT_KEY_COLUMNS.items():
+            self.cursor.execute(f"PRAGMA table_info({table})")
+            existing = {column[1] for column in self.cursor.fetchall()}
+            for column, key_column in columns:
+                if key_column not in existing:
+                    self.cursor.execute(f"ALTER TABLE {table} ADD COLUMN {key_column} TEXT")
+                rows = self.cursor.execute(
+                    f"SELECT rowid, {column} FROM {table} WHERE {key_column} IS NULL AND {column} IS NOT NULL"
+                ).fetchall()
+                self.cursor.executemany(
+                    f"UPDATE {table} SET {key_column} = ? WHERE rowid = ?",
+                    [(sort_key(value), rowid) for rowid, value in rows]
+                )
+                self.cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_{table}_user_{key_column} ON {table} (user_id, {key_column})"
+                )
+
+    def backfill_sort_keys(self):
+        """Заполняет ключи сортировки у строк, записанных в обход приложения.
+
+        sqlite3 и другие программы не знают про столбцы ключей, поэтому
+        при открытии базы ключи пустых строк вычисляются заново.
+        """
+        self.cursor.execute("BEGIN")
+        try:
+            self.add_sort_keys()
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+    def migrate_add_publication_year_index(self):
+        """Миграция 6: индекс для гистограммы годов издания в аналитике"""
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_books_user_year ON books (user_id, publication_year)"
+        )
+
+    @contextmanager
+    def transaction(self):
+        """Объединяет несколько изменений в одну транзакцию с одним commit.
+
+        Вложенные вызовы присоединяются к внешней транзакции, поэтому
+        обычные методы (add_book, add_category и т.д.) внутри блока
+        не фиксируют изменения по отдельности.
+        """
+        changes = []
+        with self.pool.write_lock:
+            self.pool.transaction_depth += 1
+            try:
+                yield self.cursor
+            except BaseException:
+                if self.pool.transaction_depth == 1:
+                    self.conn.rollback()
+                    self.pool.pending_changes.clear()
+                raise
+            else:
+                if self.pool.transaction_depth == 1:
+                    self.conn.commit()
+                    changes, self.pool.pending_changes = self.pool.pending_changes, []
+            finally:
+                self.pool.transaction_depth -= 1
+        # Подписчиков оповещаем уже после commit и без блокировки записи
+        self._deliver_changes(changes)
+
+    def subscribe(self, callback):
+        """Подписывает callback(changes) на изменения строк books, wishlist и categories.
+
+        changes — список Change одной зафиксированной транзакции. callback
+        вызывается в потоке, который выполнил commit.
+        """
+        with self.pool.write_lock:
+            self.pool.listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        with self.pool.write_lock:
+            if callback in self.pool.listeners:
+                self.pool.listeners.remove(callback)
+
+    def notify_change(self, table, action, row_id):
+        """Запоминает изменение строки; подписчики узнают о нем после commit"""
+        with self.transaction():
+            self.pool.pending_changes.append(Change(table, action, row_id))
+
+    def _deliver_changes(self, changes):
+        if not changes:
+            return
+        with self.pool.write_lock:
+            listeners = list(self.pool.listeners)
+        for callback in listeners:
+            try:
+                callback(changes)
+            except Exception as e:
+                print(f"Ошибка в обработчике изменений базы данных: {e}")
+
+    def _read(self, query, params=()):
+        """Выполняет запрос на чтение через соединение из пула"""
+        with self.pool.reader() as conn:
+            return conn.execute(query, params).fetchall()
+
+    def _iter_read(self, query, params=(), chunk_size=1000):
+        """Читает результат запроса порциями по chunk_size строк, не загружая его целиком.
+
+        Читающее соединение занято, пока итератор не исчерпан или не закрыт.
+        """
+        with self.pool.reader() as conn:
+            cursor = conn.execute(query, params)
+            try:
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield from rows
+            finally:
+                cursor.close()
+
+    def _read_report(self, query, params, stream):
+        """Строки отчета списком или, если stream=True, итератором по курсору"""
+        return self._iter_read(query, params) if stream else self._read(query, params)
+
     def create_tables(self):
         # Создание таблицы пользователей
         self.cursor.execute('''
@@ -72,8 +549,6 @@ class DatabaseManager:
             )
         ''')
 
-        self.conn.commit()
-
     def migrate_users_table(self):
         # Проверка, существует ли столбец user_name в таблице users
         self.cursor.execute("PRAGMA table_info(users)")
@@ -102,8 +577,6 @@ class DatabaseManager:
 
             # Переименовываем новую таблицу в users
             self.cursor.execute("ALTER TABLE new_users RENAME TO users")
-
-            self.conn.commit()
             print("Миграция завершена.")
 
     def migrate_wishlist_table(self):
@@ -137,8 +610,6 @@ class DatabaseManager:
 
             # Переименовываем новую таблицу в wishlist
             self.cursor.execute("ALTER TABLE new_wishlist RENAME TO wishlist")
-
-            self.conn.commit()
             print("Миграция таблицы wishlist завершена.")
 
     def migrate_books_and_categories(self):
@@ -218,35 +689,94 @@ class DatabaseManager:
             # Переименовываем новую таблицу
             self.cursor.execute("ALTER TABLE new_categories RENAME TO categories")
 
-        self.conn.commit()
-
     def add_book(self, title, author, publication_year, file_path, cover_path, category_id, user_id):
         try:
-            # Проверяем, существует ли книга с таким путем у этого пользователя
-            self.cursor.execute(
-                "SELECT book_id FROM books WHERE file_path = ? AND user_id = ?",
-                (file_path, user_id)
-            )
-            if self.cursor.fetchone():
-                print(f"У вас уже есть книга с путем {file_path}.")
-                return False
+            with self.transaction():
+                # Проверяем, существует ли книга с таким путем у этого пользователя
+                self.cursor.execute(
+                    "SELECT book_id FROM books WHERE file_path = ? AND user_id = ?",
+                    (file_path, user_id)
+                )
+                if self.cursor.fetchone():
+                    print(f"У вас уже есть книга с путем {file_path}.")
+                    return False
 
-            # Если книги нет, добавляем её
-            self.cursor.execute(
-                """INSERT INTO books 
-                   (title, author, publication_year, file_path, cover_path, category_id, user_id) 
-                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                (title, author, publication_year, file_path, cover_path, category_id, user_id)
-            )
-            self.conn.commit()
+                # Если книги нет, добавляем её
+                self.cursor.execute(
+                    """INSERT INTO books 
+                       (title, author, publication_year, file_path, cover_path, category_id, user_id,
+                        title_key, author_key) 
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (title, author, publication_year, file_path, cover_path, category_id, user_id,
+                     sort_key(title), sort_key(author))
+                )
+                self.notify_change("books", "insert", self.cursor.lastrowid)
             return True
         except sqlite3.IntegrityError:
             print(f"Ошибка при добавлении книги.")
             return False
 
+    def add_books(self, books, user_id):
+        """Добавляет много книг одной транзакцией, пропуская уже существующие.
+
+        books — словари с полями title, author, publication_year, file_path,
+        cover_path и category_id. Возвращает список (book_id, file_path)
+        добавленных книг.
+        """
+        added = []
+        with self.transaction() as cursor:
+            cursor.execute("SELECT file_path FROM books WHERE user_id = ?", (user_id,))
+            existing = {row[0] for row in cursor.fetchall()}
+            for book in books:
+                if book['file_path'] in existing:
+                    continue
+                cursor.execute(
+                    """INSERT INTO books 
+                       (title, author, publication_year, file_path, cover_path, category_id, user_id,
+                        title_key, author_key) 
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (book['title'], book.get('author'), book.get('publication_year'), book['file_path'],
+                     book.get('cover_path'), book.get('category_id'), user_id,
+                     sort_key(book['title']), sort_key(book.get('author')))
+                )
+                existing.add(book['file_path'])
+                added.append((cursor.lastrowid, book['file_path']))
+                self.notify_change("books", "insert", cursor.lastrowid)
+        return added
+
+    def get_book_paths(self, user_id):
+        """Пути к файлам всех книг пользователя (для проверки дубликатов)"""
+        return {row[0] for row in self._read("SELECT file_path FROM books WHERE user_id = ?", (user_id,))}
+
+    def update_cover_paths(self, covers):
+        """Сохраняет пути к обложкам одной транзакцией; covers — пары (book_id, cover_path)"""
+        with self.transaction() as cursor:
+            cursor.executemany(
+                "UPDATE books SET cover_path = ? WHERE book_id = ?",
+                [(cover_path, book_id) for book_id, cover_path in covers]
+            )
+            for book_id, _ in covers:
+                self.notify_change("books", "update", book_id)
+
+    def update_book(self, book_id, title, author, publication_year, category_id, cover_path=None):
+        """Сохраняет изменения информации о книге; cover_path=None оставляет обложку прежней"""
+        with self.transaction() as cursor:
+            if cover_path is not None:
+                cursor.execute(
+                    "UPDATE books SET cover_path = ? WHERE book_id = ?",
+                    (cover_path, book_id)
+                )
+            cursor.execute("""
+                UPDATE books 
+                SET title = ?, author = ?, publication_year = ?, category_id = ?,
+                    title_key = ?, author_key = ?
+                WHERE book_id = ?
+            """, (title, author, publication_year, category_id, sort_key(title), sort_key(author), book_id))
+            self.notify_change("books", "update", book_id)
+
     def get_books(self, user_id):
         """Получает все книги пользователя"""
-        self.cursor.execute("""
+        return self._read("""
             SELECT b.book_id, b.title, b.author, b.publication_year, b.file_path, b.cover_path,
                    b.category_id, c.category_name
             FROM books b
@@ -254,43 +784,60 @@ class DatabaseManager:
             WHERE b.user_id = ?
             ORDER BY b.book_id DESC
         """, (user_id,))
-        return self.cursor.fetchall()
 
     def get_book(self, book_id):
         """Получает информацию о конкретной книге"""
-        self.cursor.execute("""
+        rows = self._read("""
             SELECT b.book_id, b.title, b.author, b.publication_year, b.file_path, b.cover_path,
-                   b.category_id, c.category_name
+                   b.category_id, c.category_name, b.user_id
             FROM books b
             LEFT JOIN categories c ON b.category_id = c.category_id
             WHERE b.book_id = ?
         """, (book_id,))
-        return self.cursor.fetchone()
+        return rows[0] if rows else None
+
+    def get_book_by_path(self, user_id, file_path):
+        """Получает книгу пользователя по пути к файлу PDF"""
+        rows = self._read("""
+            SELECT b.book_id, b.title, b.author, b.publication_year, b.file_path, b.cover_path,
+                   b.category_id, c.category_name
+            FROM books b
+            LEFT JOIN categories c ON b.category_id = c.category_id
+            WHERE b.file_path = ? AND b.user_id = ?
+        """, (file_path, user_id))
+        return rows[0] if rows else None
 
     def register_user(self, name, email, login, password):
         try:
-            self.cursor.execute(
-                "INSERT INTO users (user_name, email, login, password) VALUES (?, ?, ?, ?)",
-                (name, email, login, password)
-            )
-            self.conn.commit()
+            with self.transaction():
+                self.cursor.execute(
+                    "INSERT INTO users (user_name, email, login, password) VALUES (?, ?, ?, ?)",
+                    (name, email, login, password)
+                )
             return True  # Успешная регистрация
         except sqlite3.IntegrityError:
             return False  # Пользователь с таким Email или Логином уже существует
 
     def authenticate_user(self, login, password):
-        self.cursor.execute("SELECT * FROM users WHERE login = ? AND password = ?", (login, password))
-        user = self.cursor.fetchone()
+        rows = self._read("SELECT * FROM users WHERE login = ? AND password = ?", (login, password))
+        user = rows[0] if rows else None
         return user  # Возвращаем объект пользователя вместо булевого значения
 
+    def get_user(self, user_id):
+        """Получает имя и email пользователя"""
+        rows = self._read("SELECT user_name, email FROM users WHERE user_id = ?", (user_id,))
+        return rows[0] if rows else None
+
     def add_category(self, category_name, user_id, category_description=None):
         """Добавляет новую категорию"""
         try:
-            self.cursor.execute(
-                "INSERT INTO categories (category_name, user_id, category_description) VALUES (?, ?, ?)",
-                (category_name, user_id, category_description)
-            )
-            self.conn.commit()
+            with self.transaction():
+                self.cursor.execute(
+                    """INSERT INTO categories (category_name, user_id, category_description, name_key)
+                       VALUES (?, ?, ?, ?)""",
+                    (category_name, user_id, category_description, sort_key(category_name))
+                )
+                self.notify_change("categories", "insert", self.cursor.lastrowid)
             return True
         except sqlite3.IntegrityError:
             print("Категория с таким названием уже существует.")
@@ -298,190 +845,476 @@ class DatabaseManager:
 
     def get_all_categories(self, user_id=None):
         if user_id:
-            self.cursor.execute("SELECT * FROM categories WHERE user_id = ?", (user_id,))
-        else:
-            self.cursor.execute("SELECT * FROM categories")
-        return self.cursor.fetchall()
+            return self._read("SELECT * FROM categories WHERE user_id = ?", (user_id,))
+        return self._read("SELECT * FROM categories")
 
     def get_user_categories(self, user_id):
         """Получает список категорий пользователя"""
-        self.cursor.execute("""
+        rows = self._read("""
             SELECT category_id, category_name, category_description
             FROM categories 
             WHERE user_id = ?
             ORDER BY category_name
         """, (user_id,))
         return [dict(zip(['category_id', 'category_name', 'category_description'], row)) 
-                for row in self.cursor.fetchall()]
+                for row in rows]
 
     def add_to_wishlist(self, user_id, title, author, isbn, cover_url=None):
         """Добавляет книгу в вишлист пользователя"""
         try:
-            # Проверяем, нет ли уже такой книги в вишлисте пользователя
-            self.cursor.execute('''
-                SELECT * FROM wishlist 
-                WHERE user_id = ? AND title = ? AND author = ?
-            ''', (user_id, title, author))
-            
-            if self.cursor.fetchone():
-                raise Exception("Эта книга уже есть в вашем вишлисте")
-
-            # Добавляем книгу в вишлист
-            self.cursor.execute('''
-                INSERT INTO wishlist (user_id, title, author, isbn, cover_url)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (user_id, title, author, isbn, cover_url))
-            
-            self.conn.commit()
+            with self.transaction():
+                # Проверяем, нет ли уже такой книги в вишлисте пользователя
+                self.cursor.execute('''
+                    SELECT * FROM wishlist 
+                    WHERE user_id = ? AND title = ? AND author = ?
+                ''', (user_id, title, author))
+                
+                if self.cursor.fetchone():
+                    raise Exception("Эта книга уже есть в вашем вишлисте")
+
+                # Добавляем книгу в вишлист
+                self.cursor.execute('''
+                    INSERT INTO wishlist (user_id, title, author, isbn, cover_url, title_key, author_key)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (user_id, title, author, isbn, cover_url, sort_key(title), sort_key(author)))
+                self.notify_change("wishlist", "insert", self.cursor.lastrowid)
             return True
         except Exception as e:
             raise Exception(f"Ошибка при добавлении в вишлист: {str(e)}")
 
     def get_wishlist(self, user_id):
         """Получает список книг из вишлиста пользователя"""
-        self.cursor.execute('''
+        rows = self._read('''
             SELECT * FROM wishlist 
             WHERE user_id = ?
             ORDER BY added_date DESC
         ''', (user_id,))
-        return [dict(zip([col[0] for col in self.cursor.description], row))
-                for row in self.cursor.fetchall()]
+        return [dict(row) for row in rows]
+
+    def get_wishlist_item(self, wishlist_id):
+        """Получает одну книгу из вишлиста"""
+        rows = self._read("SELECT * FROM wishlist WHERE wishlist_id = ?", (wishlist_id,))
+        return dict(rows[0]) if rows else None
 
     def remove_from_wishlist(self, user_id, title, author):
         """Удаляет книгу из вишлиста пользователя"""
         try:
-            self.cursor.execute('''
-                DELETE FROM wishlist 
-                WHERE user_id = ? AND title = ? AND author = ?
-            ''', (user_id, title, author))
-            self.conn.commit()
+            with self.transaction():
+                self.cursor.execute('''
+                    SELECT wishlist_id FROM wishlist 
+                    WHERE user_id = ? AND title = ? AND author = ?
+                ''', (user_id, title, author))
+                removed = [row[0] for row in self.cursor.fetchall()]
+                self.cursor.execute('''
+                    DELETE FROM wishlist 
+                    WHERE user_id = ? AND title = ? AND author = ?
+                ''', (user_id, title, author))
+                for wishlist_id in removed:
+                    self.notify_change("wishlist", "delete", wishlist_id)
             return True
         except Exception as e:
             raise Exception(f"Ошибка при удалении из вишлиста: {str(e)}")
 
-    def get_books_by_period(self, user_id, start_date, end_date):
+    # Сортировки отчетов: ключ -> (выражение ORDER BY, по убыванию ли по умолчанию).
+    # Названия и авторы сортируются по столбцам ключей (sort_key), на которых
+    # построены индексы, поэтому SQLite читает строки уже упорядоченными;
+    # первичный ключ в конце делает порядок устойчивым для постраничного чтения.
+    REPORT_SORTS = {
+        "books": {
+            "date": ("b.created_at", True),
+            "name": ("b.title_key", False),
+            "author": ("b.author_key", False),
+        },
+        "wishlist": {
+            "date": ("w.added_date", True),
+            "name": ("w.title_key", False),
+            "author": ("w.author_key", False),
+        },
+        "categories": {
+            "date": ("c.created_at", True),
+            "name": ("c.name_key", False),
+        },
+    }
+    REPORT_KEYS = {"books": "b.book_id", "wishlist": "w.wishlist_id", "categories": "c.category_id"}
+
+    def report_page(self, table, sort="date", descending=None, after=None):
+        """Части запроса отчета: столбцы ключа, условие keyset, ORDER BY и параметры условия.
+
+        Неизвестная для таблицы сортировка заменяется сортировкой по дате.
+        after=None — отчет целиком. Иначе к строкам добавляются два столбца
+        ключа (значение сортировки и id), а after — ключ последней прочитанной
+        строки (пустой кортеж — с начала); условие по паре значений позволяет
+        SQLite сразу перейти к нужному месту индекса вместо OFFSET.
+        """
+        sorts = self.REPORT_SORTS[table]
+        expression, default_descending = sorts.get(sort, sorts["date"])
+        if descending is None:
+            descending = default_descending
+        key = self.REPORT_KEYS[table]
+        direction = "DESC" if descending else "ASC"
+        order = f"ORDER BY {expression} {direction}, {key} {direction}"
+        if after is None:
+            return ReportPage("", "", order, (), False)
+
+        columns = f", {expression}, {key}"
+        if not after:
+            return ReportPage(columns, "", order, (), False)
+        value, row_id = after
+        if value is not None:
+            sign = "<" if descending else ">"
+            # При DESC строки с NULL идут после всех остальных, и сравнение пар
+            # их не находит — они дочитываются отдельным запросом (nulls_last)
+            return ReportPage(columns, f" AND ({expression}, {key}) {sign} (?, ?)", order,
+                              (value, row_id), descending)
+        # NULL меньше любого значения: при ASC такие строки идут первыми, при DESC — последними
+        if descending:
+            where = f" AND {expression} IS NULL" + (f" AND {key} < ?" if row_id is not None else "")
+            return ReportPage(columns, where, order, (row_id,) if row_id is not None else (), False)
+        return ReportPage(columns, f" AND ({expression} IS NOT NULL OR {key} > ?)", order, (row_id,), False)
+
+    def _read_report_page(self, table, sort, descending, after, limit, stream, build):
+        """Строки отчета; build(page, limit) возвращает запрос и параметры для частей ReportPage"""
+        page = self.report_page(table, sort, descending, after)
+        rows = self._read_report(*build(page, limit), stream)
+        if page.nulls_last and (limit < 0 or len(rows) < limit):
+            tail = self.report_page(table, sort, descending, (None, None))
+            rows += self._read_report(*build(tail, limit - len(rows) if limit >= 0 else -1), False)
+        return rows
+
+    def get_books_by_period(self, user_id, start_date, end_date, sort="date", descending=None,
+                            limit=-1, after=None, stream=False):
         """Получение книг за определенный период"""
-        self.cursor.execute("""
+        return self._read_report_page("books", sort, descending, after, limit, stream, lambda page, limit: (f"""
             SELECT 
                 u.user_name,
                 b.title,
                 b.author,
                 b.publication_year,
                 c.category_name,
-                c.category_description
+                c.category_description,
+                b.created_at{page.columns}
             FROM books b
             JOIN users u ON b.user_id = u.user_id
             LEFT JOIN categories c ON b.category_id = c.category_id
-            WHERE b.user_id = ? AND b.created_at BETWEEN ? AND ?
-        """, (user_id, start_date, end_date))
-        return self.cursor.fetchall()
+            WHERE b.user_id = ? AND b.created_at BETWEEN ? AND ?{page.where}
+            {page.order}
+            LIMIT ?
+        """, (user_id, start_date, end_date, *page.params, limit)))
 
-    def get_wishlist_by_period(self, user_id, start_date, end_date):
+    def get_wishlist_by_period(self, user_id, start_date, end_date, sort="date", descending=None,
+                               limit=-1, after=None, stream=False):
         """Получение вишлиста за определенный период"""
-        self.cursor.execute("""
+        return self._read_report_page("wishlist", sort, descending, after, limit, stream, lambda page, limit: (f"""
             SELECT 
                 u.user_name,
                 w.title,
                 w.author,
-                w.added_date
+                w.added_date{page.columns}
             FROM wishlist w
             JOIN users u ON w.user_id = u.user_id
-            WHERE w.user_id = ? AND w.added_date BETWEEN ? AND ?
-        """, (user_id, start_date, end_date))
-        return self.cursor.fetchall()
+            WHERE w.user_id = ? AND w.added_date BETWEEN ? AND ?{page.where}
+            {page.order}
+            LIMIT ?
+        """, (user_id, start_date, end_date, *page.params, limit)))
 
-    def get_categories_by_period(self, user_id, start_date, end_date):
+    def get_categories_by_period(self, user_id, start_date, end_date, sort="date", descending=None,
+                                 limit=-1, after=None, stream=False):
         """Получение категорий за определенный период"""
-        self.cursor.execute("""
+        return self._read_report_page("categories", sort, descending, after, limit, stream, lambda page, limit: (f"""
             SELECT 
                 u.user_name,
                 c.category_name,
                 c.category_description,
-                c.created_at
+                c.created_at{page.columns}
             FROM categories c
             JOIN users u ON c.user_id = u.user_id
-            WHERE c.user_id = ? AND c.created_at BETWEEN ? AND ?
-        """, (user_id, start_date, end_date))
-        return self.cursor.fetchall()
+            WHERE c.user_id = ? AND c.created_at BETWEEN ? AND ?{page.where}
+            {page.order}
+            LIMIT ?
+        """, (user_id, start_date, end_date, *page.params, limit)))
 
-    def get_books_by_category(self, user_id, category_id):
+    def get_books_by_category(self, user_id, category_id, sort="date", descending=None,
+                              limit=-1, after=None, stream=False):
         """Получение книг по категории"""
-        self.cursor.execute("""
+        return self._read_report_page("books", sort, descending, after, limit, stream, lambda page, limit: (f"""
             SELECT 
                 u.user_name,
                 b.title,
                 b.author,
                 b.publication_year,
                 c.category_name,
-                c.category_description
+                c.category_description,
+                b.created_at{page.columns}
             FROM books b
             JOIN users u ON b.user_id = u.user_id
             JOIN categories c ON b.category_id = c.category_id
-            WHERE b.user_id = ? AND b.category_id = ?
-        """, (user_id, category_id))
-        return self.cursor.fetchall()
+            WHERE b.user_id = ? AND b.category_id = ?{page.where}
+            {page.order}
+            LIMIT ?
+        """, (user_id, category_id, *page.params, limit)))
 
-    def get_all_user_books(self, user_id):
+    def get_all_user_books(self, user_id, sort="date", descending=None, limit=-1, after=None, stream=False):
         """Получение всех книг пользователя"""
-        self.cursor.execute("""
+        return self._read_report_page("books", sort, descending, after, limit, stream, lambda page, limit: (f"""
             SELECT 
                 u.user_name,
                 b.title,
                 b.author,
                 b.publication_year,
                 c.category_name,
-                c.category_description
+                c.category_description,
+                b.created_at{page.columns}
             FROM books b
             JOIN users u ON b.user_id = u.user_id
             LEFT JOIN categories c ON b.category_id = c.category_id
-            WHERE b.user_id = ?
-        """, (user_id,))
-        return self.cursor.fetchall()
+            WHERE b.user_id = ?{page.where}
+            {page.order}
+            LIMIT ?
+        """, (user_id, *page.params, limit)))
 
-    def get_all_user_wishlist(self, user_id):
+    def get_all_user_wishlist(self, user_id, sort="date", descending=None, limit=-1, after=None, stream=False):
         """Получение всего вишлиста пользователя"""
-        self.cursor.execute("""
+        return self._read_report_page("wishlist", sort, descending, after, limit, stream, lambda page, limit: (f"""
             SELECT 
                 u.user_name,
                 w.title,
                 w.author,
-                w.added_date
+                w.added_date{page.columns}
             FROM wishlist w
             JOIN users u ON w.user_id = u.user_id
-            WHERE w.user_id = ?
-        """, (user_id,))
-        return self.cursor.fetchall()
+            WHERE w.user_id = ?{page.where}
+            {page.order}
+            LIMIT ?
+        """, (user_id, *page.params, limit)))
 
-    def get_all_user_categories(self, user_id):
+    def get_all_user_categories(self, user_id, sort="date", descending=None, limit=-1, after=None, stream=False):
         """Получение всех категорий пользователя"""
-        self.cursor.execute("""
+        return self._read_report_page("categories", sort, descending, after, limit, stream, lambda page, limit: (f"""
             SELECT 
                 u.user_name,
                 c.category_name,
                 c.category_description,
-                c.created_at
+                c.created_at{page.columns}
             FROM categories c
             JOIN users u ON c.user_id = u.user_id
-            WHERE c.user_id = ?
-        """, (user_id,))
-        return self.cursor.fetchall()
+            WHERE c.user_id = ?{page.where}
+            {page.order}
+            LIMIT ?
+        """, (user_id, *page.params, limit)))
+
+    def _read_stats(self, columns, query, keys, params, limit, after, stream):
+        """Итоги аналитики из подзапроса query по возрастанию ключа keys.
+
+        after — как в report_page: None для всего отчета, иначе к строкам
+        добавляются столбцы ключа, и читаются строки после after. Ключ
+        уникален для строки итогов; убывание задается отрицательным числом.
+        """
+        key = ", ".join(keys)
+        key_columns = f", {key}" if after is not None else ""
+        where = f"WHERE ({key}) > ({', '.join('?' * len(keys))})" if after else ""
+        return self._read_report(f"""
+            SELECT {columns}{key_columns}
+            FROM ({query})
+            {where}
+            ORDER BY {key}
+            LIMIT ?
+        """, (*params, *(after or ()), limit), stream)
+
+    # Шаги группировки по дате для аналитики: ключ -> выражение SQLite для столбца даты.
+    # Неделя обозначается датой своего понедельника: номер недели в году
+    # (%W) разрезал бы неделю на стыке лет на две
+    STATS_PERIODS = {
+        "day": "date({column})",
+        "week": "date({column}, 'weekday 0', '-6 days')",
+        "month": "strftime('%Y-%m', {column})",
+    }
+
+    def get_books_added_stats(self, user_id, period="month", limit=-1, after=None, stream=False):
+        """Сколько книг добавлено за каждый день, неделю или месяц"""
+        return self._read_stats("period, books", f"""
+            SELECT {self.STATS_PERIODS[period].format(column="created_at")} AS period, COUNT(*) AS books
+            FROM books
+            WHERE user_id = ?
+            GROUP BY period
+            HAVING period IS NOT NULL
+        """, ["period"], (user_id,), limit, after, stream)
+
+    def get_category_stats(self, user_id, limit=-1, after=None, stream=False):
+        """Число книг в каждой категории (книги без категории — отдельной строкой)"""
+        return self._read_stats("category, books", """
+            SELECT
+                COALESCE(c.category_name, 'Без категории') AS category,
+                s.books,
+                COALESCE(c.name_key, '') AS name_key,
+                COALESCE(s.category_id, 0) AS category_id
+            FROM (
+                SELECT category_id, COUNT(*) AS books
+                FROM books
+                WHERE user_id = ?
+                GROUP BY category_id
+            ) s
+            LEFT JOIN categories c ON s.category_id = c.category_id
+        """, ["-books", "name_key", "category_id"], (user_id,), limit, after, stream)
+
+    def get_author_stats(self, user_id, limit=-1, after=None, stream=False):
+        """Авторы по числу книг, от самых частых"""
+        return self._read_stats("author, books", """
+            SELECT MIN(author) AS author, COUNT(*) AS books, author_key
+            FROM books
+            WHERE user_id = ? AND author_key != ''
+            GROUP BY author_key
+        """, ["-books", "author_key"], (user_id,), limit, after, stream)
+
+    def get_publication_year_stats(self, user_id, bucket=1, limit=-1, after=None, stream=False):
+        """Гистограмма годов издания с шагом bucket лет"""
+        return self._read_stats("year, books", """
+            SELECT publication_year / ? * ? AS year, COUNT(*) AS books
+            FROM books
+            WHERE user_id = ? AND publication_year IS NOT NULL
+            GROUP BY year
+        """, ["year"], (bucket, bucket, user_id), limit, after, stream)
+
+    def get_wishlist_growth(self, user_id, period="month", limit=-1, after=None, stream=False):
+        """Сколько книг добавлено в вишлист за период и сколько их стало всего"""
+        # Нарастающий итог считается по всем периодам до отбора страницы
+        return self._read_stats("period, added, total", f"""
+            SELECT period, added, SUM(added) OVER (ORDER BY period) AS total
+            FROM (
+                SELECT {self.STATS_PERIODS[period].format(column="added_date")} AS period, COUNT(*) AS added
+                FROM wishlist
+                WHERE user_id = ?
+                GROUP BY period
+                HAVING period IS NOT NULL
+            )
+        """, ["period"], (user_id,), limit, after, stream)
 
     def delete_category(self, category_id, user_id):
         """Удаляет категорию по ID"""
         try:
-            # Проверка что категория принадлежит пользователю
-            self.cursor.execute("SELECT * FROM categories WHERE category_id = ? AND user_id = ?", 
-                              (category_id, user_id))
-            if not self.cursor.fetchone():
-                return False
-            
-            # Удаление категории
-            self.cursor.execute("DELETE FROM categories WHERE category_id = ? AND user_id = ?", 
-                              (category_id, user_id))
-            self.conn.commit()
+            with self.transaction():
+                # Проверка что категория принадлежит пользователю
+                self.cursor.execute("SELECT * FROM categories WHERE category_id = ? AND user_id = ?", 
+                                  (category_id, user_id))
+                if not self.cursor.fetchone():
+                    return False
+                
+                # Удаление категории
+                self.cursor.execute("DELETE FROM categories WHERE category_id = ? AND user_id = ?", 
+                                  (category_id, user_id))
+                self.notify_change("categories", "delete", category_id)
             return True
         except sqlite3.Error:
             return False
 
+    # Поля каталога в порядке столбцов catalog_books
+    CATALOG_FIELDS = ("page_url", "title", "author", "genre", "rating", "tags",
+                      "year", "isbn", "cover_url", "cover_path", "read_url")
+
+    def upsert_catalog_books(self, books):
+        """Добавляет или обновляет книги каталога одной транзакцией.
+
+        books — словари с полями из CATALOG_FIELDS (tags передаются списком и хранятся в JSON).
+        Книга определяется по page_url; уже сохраненная обложка не затирается.
+        """
+        rows = []
+        for book in books:
+            tags = book.get("tags")
+            if isinstance(tags, (list, tuple)):
+                # JSON, а не ", ".join: запятая может встретиться внутри тега
+                tags = json.dumps(list(tags), ensure_ascii=False)
+            rows.append(tuple(tags if field == "tags" else book.get(field) for field in self.CATALOG_FIELDS))
+        with self.transaction() as cursor:
+            cursor.executemany(f"""
+                INSERT INTO catalog_books ({", ".join(self.CATALOG_FIELDS)}, fetched_at)
+                VALUES ({", ".join("?" * len(self.CATALOG_FIELDS))}, CURRENT_TIMESTAMP)
+                ON CONFLICT (page_url) DO UPDATE SET
+                    title = excluded.title,
+                    author = excluded.author,
+                    genre = excluded.genre,
+                    rating = excluded.rating,
+                    tags = excluded.tags,
+                    year = excluded.year,
+                    isbn = excluded.isbn,
+                    cover_url = excluded.cover_url,
+                    cover_path = COALESCE(excluded.cover_path, catalog_books.cover_path),
+                    read_url = excluded.read_url,
+                    fetched_at = CURRENT_TIMESTAMP
+            """, rows)
+
+    def set_catalog_cover_path(self, page_url, cover_path):
+        """Запоминает, куда сохранена обложка книги каталога"""
+        with self.transaction() as cursor:
+            cursor.execute(
+                "UPDATE catalog_books SET cover_path = ? WHERE page_url = ?",
+                (cover_path, page_url)
+            )
+
+    def get_catalog_books(self, limit=-1, offset=0):
+        """Книги каталога в порядке их первого появления на сайте (словари с CATALOG_FIELDS)"""
+        rows = self._read(f"""
+            SELECT {", ".join(self.CATALOG_FIELDS)}, fetched_at
+            FROM catalog_books
+            ORDER BY catalog_id
+            LIMIT ? OFFSET ?
+        """, (limit, offset))
+        books = [dict(zip(self.CATALOG_FIELDS + ("fetched_at",), row)) for row in rows]
+        for book in books:
+            book["tags"] = self.decode_tags(book["tags"])
+        return books
+
+    @staticmethod
+    def decode_tags(value):
+        """Список тегов из столбца catalog_books.tags (JSON или старый формат через ", ")"""
+        if not value:
+            return []
+        try:
+            tags = json.loads(value)
+        except ValueError:
+            return value.split(", ")
+        return tags if isinstance(tags, list) else [str(tags)]
+
+    def set_book_text(self, book_id, text):
+        """Сохраняет извлеченный из PDF текст книги в полнотекстовый индекс"""
+        with self.transaction():
+            self.cursor.execute(
+                "UPDATE search_index SET body = ? WHERE rowid = ?",
+                (text, book_id * 4 + self.SEARCH_KINDS["book"])
+            )
+
+    @staticmethod
+    def build_search_query(text):
+        """Превращает пользовательский ввод в запрос FTS5 (все слова, поиск по префиксу)"""
+        words = re.findall(r"\w+", text)
+        return " ".join(f'"{word}"*' for word in words)
+
+    def search(self, user_id, text, limit=20, offset=0):
+        """Ранжированный поиск по книгам, тексту PDF, категориям и вишлисту.
+
+        Возвращает страницу результатов: словари с полями kind, item_id,
+        title, author и snippet, отсортированные по релевантности (bm25).
+        """
+        query = self.build_search_query(text)
+        if not query:
+            return []
+        rows = self._read("""
+            SELECT rowid, kind, title, author,
+                   snippet(search_index, 2, '[', ']', '…', 12) AS snippet
+            FROM search_index
+            WHERE search_index MATCH ? AND user_id = ?
+            ORDER BY rank
+            LIMIT ? OFFSET ?
+        """, (query, user_id, limit, offset))
+        return [
+            {
+                'kind': row['kind'],
+                'item_id': row['rowid'] // 4,
+                'title': row['title'],
+                'author': row['author'],
+                'snippet': row['snippet'],
+            }
+            for row in rows
+        ]
+
     def close(self):
-        self.conn.close()
\ No newline at end of file
+        # Само соединение принадлежит общему пулу и закрывается при выходе из приложения
+        self.cursor.close()
\ No newline at end of file
@@ -0,0 +1,36 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+from core.database import DatabaseManager
+
+
+class DatabaseEvents(QObject):
+    """Передает изменения строк базы данных в поток интерфейса.
+
+    Подписывается на DatabaseManager и пересылает каждый список Change
+    через сигнал changed. Изменения, зафиксированные фоновыми потоками
+    (например, импортом книг), приходят в интерфейс очередью сигналов Qt.
+    """
+
+    changed = pyqtSignal(list)  # Список Change одной транзакции
+
+    def __init__(self, db_name="data/database.db"):
+        super().__init__()
+        self.db = DatabaseManager(db_name)
+        self.db.subscribe(self._on_changes)
+
+    def _on_changes(self, changes):
+        self.changed.emit(changes)
+
+    def close(self):
+        self.db.unsubscribe(self._on_changes)
+        self.db.close()
+
+
+_db_events = None
+
+
+def get_db_events():
+    """Возвращает общий источник событий об изменениях базы (создается в потоке интерфейса)"""
+    global _db_events
+    if _db_events is None:
+        _db_events = DatabaseEvents()
+    return _db_events
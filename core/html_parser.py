@@ -0,0 +1,152 @@
+"""Разбор страниц каталога для загрузчика книг.
+
+Поддерживаются три способа разбора с одинаковыми CSS-селекторами:
+selectolax (самый быстрый), BeautifulSoup с lxml и BeautifulSoup со
+встроенным html.parser. По умолчанию выбирается самый быстрый из
+установленных.
+"""
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    try:
+        # Старые версии selectolax (до 1.0)
+        from selectolax.parser import HTMLParser
+    except ImportError:
+        HTMLParser = None
+
+try:
+    import lxml  # noqa: F401 — нужен только как парсер для BeautifulSoup
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+
+class SoupDocument:
+    """Разобранная страница на BeautifulSoup (парсер lxml или html.parser)"""
+
+    def __init__(self, html, features):
+        from bs4 import BeautifulSoup
+        self.root = BeautifulSoup(html, features)
+
+    @staticmethod
+    def select(node, selector):
+        return node.select(selector)
+
+    @staticmethod
+    def select_one(node, selector):
+        return node.select_one(selector)
+
+    @staticmethod
+    def text(node):
+        return node.get_text(strip=True)
+
+    @staticmethod
+    def attr(node, name):
+        return node.attrs.get(name)
+
+
+class SelectolaxDocument:
+    """Разобранная страница на selectolax"""
+
+    def __init__(self, html):
+        self.root = HTMLParser(html)
+
+    @staticmethod
+    def select(node, selector):
+        return node.css(selector)
+
+    @staticmethod
+    def select_one(node, selector):
+        return node.css_first(selector)
+
+    @staticmethod
+    def text(node):
+        return node.text(strip=True)
+
+    @staticmethod
+    def attr(node, name):
+        return node.attributes.get(name)
+
+
+# Способы разбора от быстрого к медленному
+BACKENDS = {
+    "selectolax": SelectolaxDocument,
+    "lxml": lambda html: SoupDocument(html, "lxml"),
+    "html.parser": lambda html: SoupDocument(html, "html.parser"),
+}
+
+
+def available_backends():
+    """Способы разбора, для которых установлены нужные библиотеки"""
+    backends = []
+    if HTMLParser is not None:
+        backends.append("selectolax")
+    if HAS_LXML:
+        backends.append("lxml")
+    backends.append("html.parser")
+    return backends
+
+
+def default_backend():
+    return available_backends()[0]
+
+
+def parse_document(html, backend=None):
+    backend = backend or default_backend()
+    if backend not in BACKENDS:
+        raise ValueError(f"Неизвестный способ разбора HTML: {backend}")
+    return BACKENDS[backend](html)
+
+
+def parse_listing(html, base_url, backend=None):
+    """Разбирает страницу списка книг: название, обложка и адрес страницы каждой книги"""
+    doc = parse_document(html, backend)
+    books = []
+    for book_container in doc.select(doc.root, "div.desc"):
+        # Ищем название книги
+        title_tag = doc.select_one(book_container, "div.book_name > a")
+        title = doc.text(title_tag) if title_tag else "Название не найдено"
+
+        # Ищем обложку книги
+        img_tag = doc.select_one(book_container, "div.cover > a > img")
+        img_url = (doc.attr(img_tag, "src") if img_tag else None) or "Картинка не найдена"
+        if img_url != "Картинка не найдена":
+            img_url = img_url.replace("/b/img/mini/", "/b/img/big/")
+            img_url = f"{base_url}{img_url}"
+
+        # Ищем страницу с полной информацией о книге
+        full_page_url = (doc.attr(title_tag, "href") if title_tag else None) or "Страница книги не найдена"
+        if full_page_url != "Страница книги не найдена":
+            full_page_url = f"{base_url}{full_page_url}"
+
+        books.append({"title": title, "img_url": img_url, "full_page_url": full_page_url})
+    return books
+
+
+def parse_details(html, base_url, backend=None):
+    """Разбирает страницу книги: автор, жанр, рейтинг, теги, год, ISBN и ссылка для чтения"""
+    doc = parse_document(html, backend)
+
+    def find_text(selector, default):
+        tag = doc.select_one(doc.root, selector)
+        return doc.text(tag) if tag else default
+
+    # Собираем все теги книги
+    tags = [doc.text(tag) for tag in doc.select(doc.root, "div.row.tags > span.row_content > a")]
+
+    # Ищем ссылку для чтения книги
+    read_button_tag = doc.select_one(doc.root, "div.b_buttons_book > div.btn.list > a")
+    read_url = (doc.attr(read_button_tag, "href") if read_button_tag else None) or "Ссылка не найдена"
+    if read_url != "Ссылка не найдена":
+        read_url = f"{base_url}{read_url}"
+
+    return {
+        "read_url": read_url,
+        "author": find_text("div.row.author > span.row_content > a", "Автор не найден"),
+        "genre": find_text("div.row.genre > span.row_content > a", "Жанр не найден"),
+        "rating": find_text("div.row.rating > span.row_content", "Рейтинг не найден"),
+        "tags": tags or ["Теги не найдены"],
+        "year": find_text("div.row.year_public > span.row_content", "Год издания не найден"),
+        "isbn": find_text("div.row.isbn > span.row_content", "ISBN не найден"),
+    }
@@ -0,0 +1,86 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+
+# Сохраненный ответ сервера
+CachedResponse = namedtuple("CachedResponse", "url body etag last_modified fetched_at")
+
+
+class HttpCache:
+    """Дисковый кэш HTTP-ответов для загрузчика каталога.
+
+    Ответы хранятся в отдельной SQLite-базе по URL вместе с ETag и
+    Last-Modified. Запись считается свежей ttl секунд после загрузки или
+    последней успешной проверки; устаревшую запись можно проверить
+    условным запросом (If-None-Match / If-Modified-Since), и при ответе
+    304 Not Modified достаточно обновить время проверки.
+    """
+
+    def __init__(self, db_path="data/http_cache.db", ttl=6 * 60 * 60):
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.db_path = os.path.join(base_dir, db_path)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                body TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL
+            )
+        ''')
+        self.conn.commit()
+
+    def get(self, url):
+        """Возвращает сохраненный ответ (даже устаревший) или None"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT url, body, etag, last_modified, fetched_at FROM responses WHERE url = ?",
+                (url,)
+            ).fetchone()
+        return CachedResponse(*row) if row else None
+
+    def is_fresh(self, entry):
+        return time.time() - entry.fetched_at < self.ttl
+
+    def conditional_headers(self, entry):
+        """Заголовки для проверки, изменился ли ответ на сервере"""
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def put(self, url, body, etag=None, last_modified=None):
+        with self._lock:
+            self.conn.execute(
+                """INSERT OR REPLACE INTO responses (url, body, etag, last_modified, fetched_at)
+                   VALUES (?, ?, ?, ?, ?)""",
+                (url, body, etag, last_modified, time.time())
+            )
+            self.conn.commit()
+
+    def touch(self, url):
+        """Отмечает ответ как только что проверенный (сервер ответил 304)"""
+        with self._lock:
+            self.conn.execute("UPDATE responses SET fetched_at = ? WHERE url = ?", (time.time(), url))
+            self.conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self.conn.execute("DELETE FROM responses")
+            self.conn.commit()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,117 @@
+import asyncio
+import threading
+import aiohttp
+from PyQt5.QtCore import QObject, Qt, pyqtSignal, pyqtSlot
+from PyQt5.QtGui import QImage
+
+
+class ImageFetcher(QObject):
+    """Общий загрузчик картинок (обложек) по сети.
+
+    Загрузка идет в отдельном потоке с собственным циклом asyncio и одной
+    aiohttp-сессией: соединения переиспользуются, а число одновременных
+    запросов ограничено. Картинка декодируется в QImage (и уменьшается до
+    max_size) там же, поэтому поток интерфейса получает готовое
+    изображение через сигнал image_loaded или через callback из fetch().
+    """
+
+    image_loaded = pyqtSignal(str, QImage)  # Адрес и загруженная картинка
+    image_failed = pyqtSignal(str)  # Адрес картинки, которую не удалось загрузить
+    _finished = pyqtSignal(str, QImage)  # Из потока загрузки в поток интерфейса
+
+    def __init__(self, max_concurrency=6, timeout=20, max_size=(280, 400)):
+        super().__init__()
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_size = max_size
+        self.callbacks = {}  # Адрес -> функции, ожидающие эту картинку
+        self.loop = None
+        self.ready = threading.Event()
+        self._finished.connect(self._dispatch, Qt.QueuedConnection)
+        self.thread = threading.Thread(target=self._run, name="ImageFetcher", daemon=True)
+        self.thread.start()
+        self.ready.wait()
+
+    def fetch(self, url, callback=None):
+        """Запрашивает картинку; callback(QImage) вызывается в потоке интерфейса.
+
+        При ошибке callback получает пустой QImage. Повторные запросы
+        того же адреса, пока он загружается, не создают новых соединений.
+        """
+        in_flight = url in self.callbacks
+        callbacks = self.callbacks.setdefault(url, [])
+        if callback is not None:
+            callbacks.append(callback)
+        if not in_flight:
+            asyncio.run_coroutine_threadsafe(self._download(url), self.loop)
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=60),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"},
+        )
+        self.ready.set()
+        self.loop.run_forever()
+        self.loop.run_until_complete(self.session.close())
+        self.loop.close()
+
+    async def _download(self, url):
+        image = QImage()
+        try:
+            async with self.semaphore:
+                async with self.session.get(url) as response:
+                    response.raise_for_status()
+                    data = await response.read()
+            image = await self.loop.run_in_executor(None, self._decode, data)
+        except Exception as e:
+            print(f"Ошибка при загрузке изображения: {e}")
+        self._finished.emit(url, image)
+
+    def _decode(self, data):
+        image = QImage.fromData(data)
+        if not image.isNull() and self.max_size:
+            width, height = self.max_size
+            if image.width() > width or image.height() > height:
+                image = image.scaled(width, height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        return image
+
+    @pyqtSlot(str, QImage)
+    def _dispatch(self, url, image):
+        for callback in self.callbacks.pop(url, []):
+            try:
+                callback(image)
+            except RuntimeError:
+                # Виджет, ожидавший картинку, уже удален
+                pass
+        if image.isNull():
+            self.image_failed.emit(url)
+        else:
+            self.image_loaded.emit(url, image)
+
+    def shutdown(self):
+        if self.loop is not None and self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout=5)
+
+
+_image_fetcher = None
+
+
+def get_image_fetcher():
+    """Возвращает общий для приложения загрузчик картинок (создается в потоке интерфейса)"""
+    global _image_fetcher
+    if _image_fetcher is None:
+        _image_fetcher = ImageFetcher()
+    return _image_fetcher
+
+
+def shutdown_image_fetcher():
+    """Останавливает загрузчик картинок (вызывается при выходе из приложения)"""
+    global _image_fetcher
+    if _image_fetcher is not None:
+        _image_fetcher.shutdown()
+        _image_fetcher = None
@@ -0,0 +1,366 @@
+import itertools
+import os
+import shutil
+import threading
+import uuid
+from concurrent.futures import FIRST_COMPLETED, wait
+import fitz  # PyMuPDF
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from core.cover_cache import get_cover_cache
+from core.database import DatabaseManager
+from core.pdf_handler import create_folder_for_book, render_cover, get_render_engine, pixmap_to_qimage
+
+
+class ImportCancelled(Exception):
+    """Импорт отменен пользователем"""
+
+
+class ImportSignals(QObject):
+    """Сигналы задания импорта (QRunnable сам не может их иметь)"""
+    progress = pyqtSignal(int, str)  # Процент выполнения и название этапа
+    prepared = pyqtSignal(dict)  # Книга разобрана: название, число страниц, обложка
+    finished = pyqtSignal(dict)  # Книга добавлена в базу
+    duplicate = pyqtSignal(str)  # Такая книга уже есть у пользователя
+    failed = pyqtSignal(str)  # Ошибка на одном из этапов
+    cancelled = pyqtSignal()
+
+
+class _StageRunner(QRunnable):
+    """Выполняет этап задания в потоке из QThreadPool"""
+
+    def __init__(self, func, *args):
+        super().__init__()
+        self.func = func
+        self.args = args
+
+    def run(self):
+        self.func(*self.args)
+
+
+class ImportJob:
+    """Фоновый импорт PDF в библиотеку.
+
+    Этапы: разбор файла (probe), обложка (cover), извлечение текста (text)
+    и запись в базу (insert). Первые три этапа запускаются сразу в
+    start(); после этапа cover отправляется сигнал prepared, и пока
+    пользователь заполняет информацию о книге, текст извлекается в фоне.
+    Запись в базу начинается после commit(metadata).
+
+    Файлы книги собираются во временной папке data/books/.import-<uuid>
+    и переносятся в data/books/<book_id> в той же транзакции, в которой
+    добавляется книга. При ошибке или отмене транзакция откатывается,
+    а папка удаляется.
+    """
+
+    def __init__(self, user_id, filepath, base_folder="data/books", thread_pool=None):
+        self.user_id = user_id
+        self.filepath = filepath
+        self.base_folder = base_folder
+        self.thread_pool = thread_pool or QThreadPool.globalInstance()
+        self.signals = ImportSignals()
+        self.staging_folder = os.path.join(base_folder, f".import-{uuid.uuid4().hex}")
+        self.title = None
+        self.page_count = 0
+        self.cover_path = None
+        self.text = None
+        self._text_ready = threading.Event()
+        self._cancel_event = threading.Event()
+        self._failed = False
+        self._committed = False
+        self._cancel_reported = False
+        self._active_stages = 0
+        self._lock = threading.Lock()
+        self._runners = []  # Держим ссылки, пока этапы выполняются
+
+    def start(self):
+        """Запускает разбор файла, отрисовку обложки и извлечение текста"""
+        self._run_stage(self._prepare)
+
+    def commit(self, metadata):
+        """Записывает книгу в базу с данными из BookMetadataDialog"""
+        self._run_stage(self._insert, metadata)
+
+    def cancel(self):
+        """Просит задание остановиться; папка книги будет удалена"""
+        self._cancel_event.set()
+        self._text_ready.set()  # Будим этап insert, если он ждет текст
+        with self._lock:
+            idle = self._active_stages == 0
+        if idle:
+            # Ни один этап не выполняется, убираем файлы сами
+            self._finish_cancel()
+
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    def _run_stage(self, func, *args):
+        with self._lock:
+            self._active_stages += 1
+        runner = _StageRunner(self._guarded, func, *args)
+        self._runners.append(runner)
+        self.thread_pool.start(runner)
+
+    def _guarded(self, func, *args):
+        try:
+            func(*args)
+        except ImportCancelled:
+            pass
+        except Exception as e:
+            print(f"Ошибка при импорте книги {self.filepath}: {e}")
+            self._failed = True
+            self._text_ready.set()
+            self._cleanup()
+            self.signals.failed.emit(str(e))
+        finally:
+            with self._lock:
+                self._active_stages -= 1
+                idle = self._active_stages == 0
+            # Последний завершившийся этап убирает за отмененным заданием
+            if idle and self._cancel_event.is_set():
+                self._finish_cancel()
+
+    def _finish_cancel(self):
+        with self._lock:
+            if self._committed or self._failed or self._cancel_reported:
+                return
+            self._cancel_reported = True
+        self._cleanup()
+        self.signals.cancelled.emit()
+
+    def _check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise ImportCancelled()
+
+    def _cleanup(self):
+        if os.path.exists(self.staging_folder):
+            shutil.rmtree(self.staging_folder, ignore_errors=True)
+
+    def _prepare(self):
+        # Этап probe: метаданные и число страниц
+        self.signals.progress.emit(0, "Чтение файла")
+        with fitz.open(self.filepath) as doc:
+            self.title = doc.metadata.get("title") or os.path.splitext(os.path.basename(self.filepath))[0]
+            self.page_count = len(doc)
+        self._check_cancelled()
+
+        # Этап cover: первая страница как временная обложка
+        self.signals.progress.emit(10, "Создание обложки")
+        os.makedirs(self.staging_folder)
+        self.cover_path = render_cover(self.filepath, self.staging_folder)
+        self._check_cancelled()
+        self.signals.prepared.emit({
+            'title': self.title,
+            'page_count': self.page_count,
+            'cover_path': self.cover_path,
+        })
+
+        # Этап text: текст страниц для полнотекстового поиска
+        pages = []
+        with fitz.open(self.filepath) as doc:
+            for page_num, page in enumerate(doc):
+                self._check_cancelled()
+                pages.append(page.get_text())
+                self.signals.progress.emit(20 + 70 * (page_num + 1) // max(self.page_count, 1),
+                                           "Извлечение текста")
+        self.text = "\n".join(pages)
+        self._text_ready.set()
+
+    def _insert(self, metadata):
+        # Ждем окончания извлечения текста
+        self._text_ready.wait()
+        if self._failed:
+            return
+        self._check_cancelled()
+        self.signals.progress.emit(90, "Сохранение в базу")
+
+        # Своя копия DatabaseManager: у каждого потока свой курсор
+        db = DatabaseManager("data/database.db")
+        try:
+            with db.transaction() as cursor:
+                # Если пользователь выбрал свою обложку, копируем её
+                cover_name = os.path.basename(self.cover_path)
+                if metadata['custom_cover_path']:
+                    cover_name = "cover" + os.path.splitext(metadata['custom_cover_path'])[1]
+                    shutil.copy2(metadata['custom_cover_path'], os.path.join(self.staging_folder, cover_name))
+
+                if not db.add_book(
+                    metadata['title'],
+                    metadata['author'],
+                    metadata['publication_year'],
+                    self.filepath,
+                    None,
+                    metadata['category_id'],
+                    self.user_id
+                ):
+                    self._cleanup()
+                    self.signals.duplicate.emit(self.filepath)
+                    return
+                book_id = cursor.lastrowid
+                self._check_cancelled()
+
+                # Переносим файлы в папку книги; при ошибке транзакция откатится
+                folder_path = os.path.join(self.base_folder, str(book_id))
+                if os.path.exists(folder_path):
+                    shutil.rmtree(folder_path)
+                os.replace(self.staging_folder, folder_path)
+                cover_path = os.path.join(folder_path, cover_name)
+                try:
+                    cursor.execute(
+                        "UPDATE books SET cover_path = ? WHERE book_id = ?",
+                        (cover_path, book_id)
+                    )
+                    db.set_book_text(book_id, self.text)
+                except BaseException:
+                    os.replace(folder_path, self.staging_folder)
+                    raise
+            self._committed = True
+        finally:
+            db.close()
+
+        # Миниатюры обложки нарезаем здесь, а не в потоке интерфейса при показе
+        get_cover_cache().prepare(cover_path)
+        self.signals.progress.emit(100, "Готово")
+        self.signals.finished.emit({
+            'book_id': book_id,
+            'file_path': self.filepath,
+            'cover_path': cover_path,
+        })
+
+
+class FolderImportJob:
+    """Фоновый импорт всех PDF из папки (включая вложенные).
+
+    Файлы, которые уже есть у пользователя, пропускаются. Метаданные
+    читаются параллельно в процессах движка рендеринга, затем все новые
+    книги добавляются одной транзакцией (DatabaseManager.add_books).
+    Обложки рисуются последним этапом, когда книги уже в библиотеке;
+    отмена на этом этапе просто оставляет часть книг без обложек.
+    """
+
+    def __init__(self, user_id, folder, category_id=None, with_covers=True,
+                 base_folder="data/books", thread_pool=None):
+        self.user_id = user_id
+        self.folder = folder
+        self.category_id = category_id
+        self.with_covers = with_covers
+        self.base_folder = base_folder
+        self.thread_pool = thread_pool or QThreadPool.globalInstance()
+        self.signals = ImportSignals()
+        self._cancel_event = threading.Event()
+        self._runner = None
+
+    def start(self):
+        self._runner = _StageRunner(self._guarded)
+        self.thread_pool.start(self._runner)
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    def _guarded(self):
+        try:
+            self._run()
+        except ImportCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            print(f"Ошибка при импорте папки {self.folder}: {e}")
+            self.signals.failed.emit(str(e))
+
+    def _check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise ImportCancelled()
+
+    def find_pdfs(self):
+        """Все PDF-файлы в папке и её подпапках"""
+        pdfs = []
+        for root, _, names in os.walk(self.folder):
+            for name in names:
+                if name.lower().endswith(".pdf"):
+                    pdfs.append(os.path.join(root, name))
+        return sorted(pdfs)
+
+    def _run(self):
+        self.signals.progress.emit(0, "Поиск файлов")
+        db = DatabaseManager("data/database.db")
+        try:
+            existing = db.get_book_paths(self.user_id)
+            pdfs = self.find_pdfs()
+            new_files = [path for path in pdfs if path not in existing]
+            skipped = len(pdfs) - len(new_files)
+            self._check_cancelled()
+
+            # Этап probe: метаданные без отрисовки, параллельно во всех процессах
+            books = []
+            errors = 0
+            engine = get_render_engine()
+            probe = engine.probe(new_files)
+            try:
+                for info in probe:
+                    self._check_cancelled()
+                    if 'error' in info:
+                        print(f"Ошибка при чтении {info['file_path']}: {info['error']}")
+                        errors += 1
+                    else:
+                        info['category_id'] = self.category_id
+                        books.append(info)
+                    done = len(books) + errors
+                    if done % 50 == 0 or done == len(new_files):
+                        self.signals.progress.emit(5 + 55 * done // max(len(new_files), 1),
+                                                   f"Чтение файлов: {done} из {len(new_files)}")
+            finally:
+                probe.close()
+
+            # Этап insert: все новые книги одной транзакцией
+            self._check_cancelled()
+            self.signals.progress.emit(60, "Сохранение в базу")
+            added = db.add_books(books, self.user_id)
+
+            # Этап cover: первая страница каждой новой книги
+            if self.with_covers and added:
+                self._render_covers(db, engine, added)
+        finally:
+            db.close()
+
+        self.signals.progress.emit(100, "Готово")
+        self.signals.finished.emit({
+            'added': len(added),
+            'skipped': skipped,
+            'errors': errors,
+        })
+
+    def _render_covers(self, db, engine, added):
+        # Обложки рисуются скользящим окном: у каждой ждущей страницы свой
+        # блок общей памяти с открытым дескриптором, поэтому задания для
+        # тысяч книг сразу не отправляем
+        window = 2 * engine.workers
+        queue = iter(added)
+        futures = {}  # Future -> id книги
+        covers = []
+        cover_cache = get_cover_cache()
+        try:
+            for book_id, file_path in itertools.islice(queue, window):
+                futures[engine.submit(file_path, [0], dpi=72)] = book_id
+            while futures and not self._cancel_event.is_set():
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    book_id = futures.pop(future)
+                    try:
+                        page = future.result()[0]
+                        cover_path = os.path.join(create_folder_for_book(book_id, self.base_folder), "cover.png")
+                        pix = page.to_pixmap()
+                        pix.save(cover_path)
+                        cover_cache.prepare(cover_path, pixmap_to_qimage(pix))
+                        covers.append((book_id, cover_path))
+                    except Exception as e:
+                        print(f"Ошибка при создании обложки книги {book_id}: {e}")
+                    if len(covers) % 20 == 0:
+                        self.signals.progress.emit(60 + 40 * len(covers) // len(added), "Создание обложек")
+                    if not self._cancel_event.is_set():
+                        for book_id, file_path in itertools.islice(queue, 1):
+                            futures[engine.submit(file_path, [0], dpi=72)] = book_id
+        finally:
+            # При отмене или ошибке освобождаем страницы, которые уже не нужны
+            engine.discard(futures)
+            db.update_cover_paths(covers)
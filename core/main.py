@@ -1,17 +1,32 @@
 import sys
 import os
+import multiprocessing
 from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QThreadPool
 from PyQt5.QtGui import QIcon
 
 # Добавляем корневую директорию проекта в путь Python
 base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(base_dir)
 from core.ui import MainWindow
+from core.database import close_all_pools
+from core.pdf_handler import shutdown_render_engine
+from core.image_fetcher import shutdown_image_fetcher
 
 if __name__ == "__main__":
+    # Нужно для процессов рендеринга в собранном PyInstaller приложении
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     # Set application icon
     icon_path = os.path.join(base_dir, 'data/images/Logo1.png')
     app.setWindowIcon(QIcon(icon_path))
     window = MainWindow()  # Start without user_id to show login first
-    sys.exit(app.exec_())
\ No newline at end of file
+    exit_code = app.exec_()
+    # К этому моменту загрузчик каталога остановлен, а задания импорта и
+    # отчетов отменены (aboutToQuit); ждем, пока они допишут и откатят
+    # свои транзакции, и только потом закрываем общие ресурсы
+    QThreadPool.globalInstance().waitForDone()
+    shutdown_render_engine()
+    shutdown_image_fetcher()
+    close_all_pools()
+    sys.exit(exit_code)
\ No newline at end of file
@@ -0,0 +1,174 @@
+import os
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+import fitz  # PyMuPDF
+
+
+# Поддерживаемые форматы кэша страниц и расширения файлов
+PAGE_FORMATS = {
+    "PNG": ".png",
+    "WEBP": ".webp",
+    "JPEG": ".jpg",
+}
+
+
+class PageCache:
+    """Дисковый кэш отрисованных страниц PDF.
+
+    Страницы рисуются только по запросу. Имя файла в кэше — хэш от
+    отпечатка PDF (размер, время изменения, начало и конец файла), номера
+    страницы, DPI и формата, поэтому после изменения PDF старые страницы
+    не используются.
+    Когда суммарный размер превышает max_bytes, удаляются страницы,
+    к которым дольше всего не обращались (LRU).
+    """
+
+    def __init__(self, cache_dir="data/page_cache", max_bytes=512 * 1024 * 1024,
+                 dpi=96, image_format="PNG", quality=85):
+        if image_format not in PAGE_FORMATS:
+            raise ValueError(f"Неподдерживаемый формат страниц: {image_format}")
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.cache_dir = os.path.join(base_dir, cache_dir)
+        self.max_bytes = max_bytes
+        self.dpi = dpi
+        self.image_format = image_format
+        self.quality = quality  # Качество для JPEG и WebP
+        self._lock = threading.Lock()
+        self._fingerprints = {}
+        self._entries = OrderedDict()  # Путь к файлу -> размер, от старых к новым
+        self._total_bytes = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_entries()
+
+    def _load_entries(self):
+        """Восстанавливает порядок LRU по времени последнего доступа к файлам"""
+        files = []
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                if name.endswith(".tmp"):
+                    # Остаток прерванной записи
+                    os.remove(path)
+                    continue
+                stat = os.stat(path)
+                files.append((stat.st_mtime, path, stat.st_size))
+        for _, path, size in sorted(files):
+            self._entries[path] = size
+            self._total_bytes += size
+
+    # Сколько байт с начала и с конца PDF входит в отпечаток
+    FINGERPRINT_CHUNK = 1024 * 1024
+
+    def document_fingerprint(self, filepath):
+        """Отпечаток PDF: хэш размера, времени изменения, первого и последнего мегабайта.
+
+        Весь файл не читаем, чтобы первая страница большой книги открывалась
+        так же быстро, как маленькой. Изменения PDF дописываются в конец
+        файла (новая таблица xref и trailer), поэтому они меняют отпечаток.
+        """
+        stat = os.stat(filepath)
+        key = (os.path.abspath(filepath), stat.st_size, stat.st_mtime)
+        fingerprint = self._fingerprints.get(key)
+        if fingerprint is None:
+            digest = hashlib.sha1(f"{stat.st_size}:{stat.st_mtime_ns}:".encode())
+            with open(filepath, "rb") as f:
+                digest.update(f.read(self.FINGERPRINT_CHUNK))
+                if stat.st_size > self.FINGERPRINT_CHUNK:
+                    f.seek(max(stat.st_size - self.FINGERPRINT_CHUNK, self.FINGERPRINT_CHUNK))
+                    digest.update(f.read())
+            fingerprint = digest.hexdigest()
+            self._fingerprints[key] = fingerprint
+        return fingerprint
+
+    def page_path(self, filepath, page_num):
+        """Путь к файлу страницы в кэше (файл может еще не существовать)"""
+        key = hashlib.sha1(
+            f"{self.document_fingerprint(filepath)}:{page_num}:{self.dpi}:{self.image_format}".encode()
+        ).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], key + PAGE_FORMATS[self.image_format])
+
+    def lookup(self, filepath, page_num):
+        """Возвращает путь к уже отрисованной странице или None"""
+        path = self.page_path(filepath, page_num)
+        with self._lock:
+            if path not in self._entries:
+                return None
+            # Отмечаем страницу как недавно использованную
+            self._entries.move_to_end(path)
+            os.utime(path)
+            return path
+
+    def store(self, filepath, page_num, width, height, samples):
+        """Сохраняет отрисованную страницу (RGB-пиксели) в кэш в выбранном формате"""
+        path = self.page_path(filepath, page_num)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Пишем во временный файл, чтобы параллельные читатели не увидели недописанный.
+        # Имя у каждой записи свое: одну страницу могут сохранять сразу два потока.
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(path))
+        os.close(fd)
+        try:
+            if self.image_format == "PNG":
+                fitz.Pixmap(fitz.csRGB, width, height, samples, 0).save(tmp_path, output="png")
+            else:
+                from PIL import Image
+                image = Image.frombytes("RGB", (width, height), samples)
+                image.save(tmp_path, format=self.image_format, quality=self.quality)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            size = os.path.getsize(path)
+            self._total_bytes += size - self._entries.pop(path, 0)
+            self._entries[path] = size
+            self._evict()
+        return path
+
+    def _evict(self):
+        """Удаляет самые давние страницы, пока кэш не уложится в лимит"""
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            path, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def clear(self):
+        """Полностью очищает кэш"""
+        with self._lock:
+            while self._entries:
+                path, _ = self._entries.popitem()
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._total_bytes = 0
+
+
+_page_cache = None
+_page_cache_lock = threading.Lock()
+
+
+def configure_page_cache(**options):
+    """Задает параметры общего кэша страниц (cache_dir, max_bytes, dpi, image_format, quality).
+
+    Вызывается при запуске, до открытия первой книги; ранее созданный
+    кэш заменяется новым с этими параметрами.
+    """
+    global _page_cache
+    with _page_cache_lock:
+        _page_cache = PageCache(**options)
+        return _page_cache
+
+
+def get_page_cache():
+    """Возвращает общий для приложения кэш страниц (по умолчанию — параметры PageCache)"""
+    global _page_cache
+    with _page_cache_lock:
+        if _page_cache is None:
+            _page_cache = PageCache()
+        return _page_cache
@@ -1,5 +1,9 @@
 import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
 import fitz  # PyMuPDF
+from PyQt5.QtGui import QImage
 
 
 def create_folder_for_book(book_id, base_folder="data/books"):
@@ -10,19 +14,298 @@ def create_folder_for_book(book_id, base_folder="data/books"):
     return folder_path
 
 
-def save_first_page_as_cover(doc, folder_path):
-    """Сохраняет первую страницу как обложку."""
-    first_page = doc.load_page(0)
-    pix = first_page.get_pixmap()
+def render_cover(filepath, folder_path):
+    """Рисует первую страницу в процессе-обработчике и сохраняет её как обложку."""
+    page = get_render_engine().render_page(filepath, 0, dpi=72)
     cover_path = os.path.join(folder_path, "cover.png")
-    pix.save(cover_path)
+    page.to_pixmap().save(cover_path)
     return cover_path
 
 
-def save_all_pages(doc, folder_path):
-    """Сохраняет все страницы PDF в папку."""
-    for page_num in range(len(doc)):
+def samples_to_qimage(samples, width, height, stride, alpha=False, detach=False):
+    """Оборачивает сырые пиксели страницы в QImage без кодирования в PNG.
+
+    QImage не копирует samples, поэтому буфер должен жить, пока живет
+    изображение. detach=True делает собственную копию пикселей — она нужна,
+    если изображение передается в другой поток или переживает буфер.
+    """
+    image_format = QImage.Format_RGBA8888 if alpha else QImage.Format_RGB888
+    image = QImage(samples, width, height, stride, image_format)
+    return image.copy() if detach else image
+
+
+def pixmap_to_qimage(pix, detach=False):
+    """Оборачивает fitz.Pixmap в QImage с учетом stride и альфа-канала"""
+    return samples_to_qimage(pix.samples_ptr, pix.width, pix.height, pix.stride,
+                             bool(pix.alpha), detach)
+
+
+class RenderedPage:
+    """Страница, отрисованная в процессе-обработчике.
+
+    Пиксели (RGB, 3 байта на точку) лежат в блоке общей памяти shm.
+    Блок создает и держит открытым основной процесс: на Windows блок
+    существует, только пока открыт хотя бы один его дескриптор, поэтому
+    обработчик лишь подключается к нему. Освобождает блок take_samples
+    или release. Если страница не поместилась в блок, пиксели приходят
+    через канал процесса в samples.
+    """
+
+    def __init__(self, page_num, width, height, stride, shm=None, samples=None):
+        self.page_num = page_num
+        self.width = width
+        self.height = height
+        self.stride = stride
+        self.shm = shm
+        self.samples = samples
+
+    def take_samples(self):
+        """Забирает пиксели страницы и освобождает общую память"""
+        if self.shm is None:
+            samples, self.samples = self.samples, None
+            return samples
+        try:
+            return bytes(self.shm.buf[:self.stride * self.height])
+        finally:
+            self.release()
+
+    def release(self):
+        """Освобождает общую память, не забирая пиксели (страница не понадобилась)"""
+        self.samples = None
+        if self.shm is not None:
+            shm, self.shm = self.shm, None
+            shm.close()
+            shm.unlink()
+
+    def to_pixmap(self):
+        """Собирает fitz.Pixmap из пикселей страницы (например, для сохранения в файл)"""
+        return fitz.Pixmap(fitz.csRGB, self.width, self.height, self.take_samples(), 0)
+
+
+# Документы, открытые в процессе-обработчике. Каждый обработчик держит
+# собственные fitz.Document, поэтому повторные задания по той же книге
+# не разбирают PDF заново.
+_worker_docs = {}
+_WORKER_DOCS_LIMIT = 4
+
+
+def _worker_document(filepath):
+    doc = _worker_docs.pop(filepath, None)
+    if doc is None:
+        doc = fitz.open(filepath)
+        if len(_worker_docs) >= _WORKER_DOCS_LIMIT:
+            # Закрываем документ, который дольше всего не использовался
+            oldest = next(iter(_worker_docs))
+            _worker_docs.pop(oldest).close()
+    _worker_docs[filepath] = doc
+    return doc
+
+
+def _render_pages_in_worker(filepath, page_numbers, dpi, clip, shm_names):
+    """Выполняется в процессе-обработчике: рисует страницы в блоки общей памяти основного процесса.
+
+    Возвращает (номер, ширина, высота, stride, пиксели) для каждой страницы;
+    пиксели передаются только если страница не поместилась в свой блок.
+    """
+    doc = _worker_document(filepath)
+    rendered = []
+    for page_num, shm_name in zip(page_numbers, shm_names):
         page = doc.load_page(page_num)
-        pix = page.get_pixmap()
-        page_path = os.path.join(folder_path, f"page_{page_num}.png")
-        pix.save(page_path)
\ No newline at end of file
+        pix = page.get_pixmap(dpi=dpi, clip=fitz.Rect(clip) if clip else None, alpha=False)
+        size = pix.stride * pix.height
+        samples = None
+        shm = shared_memory.SharedMemory(name=shm_name)
+        try:
+            if size <= shm.size:
+                shm.buf[:size] = pix.samples
+            else:
+                samples = pix.samples
+        finally:
+            shm.close()
+        rendered.append((page_num, pix.width, pix.height, pix.stride, samples))
+    return rendered
+
+
+def _probe_in_worker(filepaths):
+    """Выполняется в процессе-обработчике: читает метаданные PDF без отрисовки страниц"""
+    results = []
+    for filepath in filepaths:
+        try:
+            with fitz.open(filepath) as doc:
+                metadata = doc.metadata or {}
+                results.append({
+                    'file_path': filepath,
+                    'title': metadata.get("title") or os.path.splitext(os.path.basename(filepath))[0],
+                    'author': metadata.get("author") or None,
+                    'page_count': len(doc),
+                })
+        except Exception as e:
+            results.append({'file_path': filepath, 'error': str(e)})
+    return results
+
+
+class RenderEngine:
+    """Многопроцессный рендеринг страниц PDF.
+
+    Задания делятся на пачки страниц и распределяются по процессам,
+    так что массовое создание миниатюр и предзагрузка используют все ядра.
+    Страницы возвращаются в виде сырых RGB-буферов без кодирования в PNG.
+    """
+
+    def __init__(self, workers=None, chunk_size=4):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        # (dpi, clip) -> размер блока общей памяти под одну страницу.
+        # Растет до самой большой встреченной страницы.
+        self._block_sizes = {}
+
+    def block_size(self, dpi, clip=None):
+        """Размер блока под страницу: по умолчанию лист A4 или Letter с запасом на округление"""
+        size = self._block_sizes.get((dpi, clip))
+        if size is None:
+            width, height = (clip[2] - clip[0], clip[3] - clip[1]) if clip else (612, 842)
+            zoom = dpi / 72
+            size = (int(width * zoom) + 2) * 3 * (int(height * zoom) + 2)
+        return size
+
+    def submit(self, filepath, page_numbers, dpi=96, clip=None):
+        """Отправляет пачку страниц одному обработчику, возвращает Future со списком RenderedPage.
+
+        clip — необязательный прямоугольник (x0, y0, x1, y1) в координатах страницы.
+        """
+        page_numbers = list(page_numbers)
+        clip = tuple(clip) if clip else None
+        size = self.block_size(dpi, clip)
+        blocks = []
+        try:
+            # Каждый блок держит открытый дескриптор, поэтому при ошибке освобождаем уже созданные
+            for _ in page_numbers:
+                blocks.append(shared_memory.SharedMemory(create=True, size=size))
+            task = self.executor.submit(
+                _render_pages_in_worker, os.path.abspath(filepath), page_numbers, dpi, clip,
+                [block.name for block in blocks]
+            )
+        except BaseException:
+            self._free_blocks(blocks)
+            raise
+
+        result = Future()
+
+        def on_rendered(task):
+            if task.cancelled():
+                self._free_blocks(blocks)
+                result.cancel()
+                return
+            # После этого вызова получатель уже не может отменить результат
+            if not result.set_running_or_notify_cancel():
+                self._free_blocks(blocks)
+                return
+            try:
+                rendered = task.result()
+            except BaseException as e:
+                self._free_blocks(blocks)
+                result.set_exception(e)
+                return
+            pages = []
+            for block, (page_num, width, height, stride, samples) in zip(blocks, rendered):
+                if samples is None:
+                    pages.append(RenderedPage(page_num, width, height, stride, shm=block))
+                    continue
+                # Страница больше блока: следующие блоки делаем под её размер
+                self._block_sizes[(dpi, clip)] = max(self.block_size(dpi, clip), stride * height)
+                self._free_blocks([block])
+                pages.append(RenderedPage(page_num, width, height, stride, samples=samples))
+            result.set_result(pages)
+
+        # Отмена результата отменяет и задание, если обработчик его еще не взял
+        result.add_done_callback(lambda future: future.cancelled() and task.cancel())
+        task.add_done_callback(on_rendered)
+        return result
+
+    @staticmethod
+    def _free_blocks(blocks):
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    def render(self, filepath, page_numbers, dpi=96, clip=None):
+        """Рисует страницы параллельно и выдает RenderedPage по мере готовности"""
+        page_numbers = list(page_numbers)
+        futures = [
+            self.submit(filepath, page_numbers[i:i + self.chunk_size], dpi, clip)
+            for i in range(0, len(page_numbers), self.chunk_size)
+        ]
+        pending = set(futures)
+        pages = []
+        try:
+            for future in as_completed(futures):
+                pending.discard(future)
+                pages = future.result()
+                while pages:
+                    yield pages.pop(0)
+        finally:
+            # Если получатель прервал перебор, не оставляем страницы в общей памяти
+            for page in pages:
+                page.release()
+            self.discard(pending)
+
+    def probe(self, filepaths, chunk_size=32):
+        """Читает метаданные PDF (название, автор, число страниц) параллельно.
+
+        Выдает словари по мере готовности; для нечитаемых файлов в словаре
+        есть поле error.
+        """
+        filepaths = list(filepaths)
+        futures = [
+            self.executor.submit(_probe_in_worker, filepaths[i:i + chunk_size])
+            for i in range(0, len(filepaths), chunk_size)
+        ]
+        try:
+            for future in as_completed(futures):
+                yield from future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    @staticmethod
+    def discard(futures):
+        """Отменяет задания и освобождает общую память уже отрисованных страниц"""
+        for future in futures:
+            if future.cancel():
+                continue
+            try:
+                pages = future.result()
+            except Exception:
+                continue
+            for page in pages:
+                page.release()
+
+    def render_page(self, filepath, page_num, dpi=96, clip=None):
+        """Рисует одну страницу и дожидается результата"""
+        return self.submit(filepath, [page_num], dpi, clip).result()[0]
+
+    def shutdown(self):
+        self.executor.shutdown(cancel_futures=True)
+
+
+_render_engine = None
+_render_engine_lock = threading.Lock()
+
+
+def get_render_engine():
+    """Возвращает общий движок рендеринга (процессы запускаются при первом обращении)"""
+    global _render_engine
+    with _render_engine_lock:
+        if _render_engine is None:
+            _render_engine = RenderEngine()
+        return _render_engine
+
+
+def shutdown_render_engine():
+    """Останавливает процессы рендеринга (вызывается при выходе из приложения)"""
+    global _render_engine
+    with _render_engine_lock:
+        if _render_engine is not None:
+            _render_engine.shutdown()
+            _render_engine = None
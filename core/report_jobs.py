@@ -0,0 +1,85 @@
+import threading
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from core.database import DatabaseManager
+from core.report_writer import write_report
+
+
+class ReportCancelled(Exception):
+    """Создание отчета отменено пользователем"""
+
+
+class ReportSignals(QObject):
+    """Сигналы задания отчета (QRunnable сам не может их иметь)"""
+    progress = pyqtSignal(int, str)  # Процент выполнения и название этапа
+    finished = pyqtSignal(str, dict)  # Путь к файлу отчета и число строк в каждом разделе
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+
+class _ReportRunner(QRunnable):
+    def __init__(self, func):
+        super().__init__()
+        self.func = func
+
+    def run(self):
+        self.func()
+
+
+class ReportJob:
+    """Фоновое создание отчета.
+
+    build_sections(db) вызывается в рабочем потоке со своим DatabaseManager
+    и возвращает список ReportSection, строки которых читаются из базы
+    порциями. Для каждого раздела отправляется прогресс этапов «запрос
+    и сортировка» и «запись листа»; отмена срабатывает между порциями
+    строк, недописанный файл при этом удаляется.
+    """
+
+    def __init__(self, file_path, build_sections, thread_pool=None):
+        self.file_path = file_path
+        self.build_sections = build_sections
+        self.thread_pool = thread_pool or QThreadPool.globalInstance()
+        self.signals = ReportSignals()
+        self.sections = []
+        self._cancel_event = threading.Event()
+        self._runner = None
+
+    def start(self):
+        self._runner = _ReportRunner(self._guarded)
+        self.thread_pool.start(self._runner)
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def _guarded(self):
+        try:
+            self._run()
+        except ReportCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            print(f"Ошибка при создании отчета {self.file_path}: {e}")
+            self.signals.failed.emit(str(e))
+
+    def _run(self):
+        db = DatabaseManager("data/database.db")
+        try:
+            self.sections = self.build_sections(db)
+            counts = write_report(self.file_path, self.sections, progress=self._on_progress)
+        finally:
+            db.close()
+        self.signals.progress.emit(100, "Готово")
+        self.signals.finished.emit(self.file_path, counts)
+
+    def _on_progress(self, stage, index, rows):
+        if self._cancel_event.is_set():
+            raise ReportCancelled()
+        # Каждому разделу отводим равную долю, последние 5% — сохранению файла
+        share = 95 / max(len(self.sections), 1)
+        if stage == "save":
+            self.signals.progress.emit(95, "Сохранение файла")
+            return
+        name = self.sections[index].name
+        if stage == "query":
+            self.signals.progress.emit(int(index * share), f"Запрос и сортировка: {name}")
+        else:
+            self.signals.progress.emit(int(index * share), f"Запись листа «{name}»: {rows} строк")
@@ -0,0 +1,177 @@
+"""Потоковая запись отчетов в Excel, CSV и JSON Lines.
+
+Строки разделов отчета берутся из итераторов, которые читают курсор базы
+порциями, и сразу пишутся в файл, поэтому память не зависит от размера
+отчета.
+"""
+import csv
+import itertools
+import json
+import os
+from collections import namedtuple
+
+
+# Раздел отчета: название (лист Excel), заголовки столбцов и строки
+ReportSection = namedtuple("ReportSection", "name headers rows")
+
+# Форматы отчета: расширение -> фильтр для диалога сохранения
+REPORT_FORMATS = {
+    "xlsx": "Excel files (*.xlsx)",
+    "csv": "CSV files (*.csv)",
+    "jsonl": "JSON Lines (*.jsonl)",
+}
+
+
+class XlsxSink:
+    """Excel через xlsxwriter в режиме constant_memory: строка уходит на диск сразу после записи.
+
+    Раздел, который не помещается на один лист, продолжается на следующих.
+    """
+
+    max_rows = 1048576  # Строк на листе Excel, включая заголовок
+
+    def __init__(self, path):
+        import xlsxwriter
+        self.paths = [path]
+        self.workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+        self.header_format = self.workbook.add_format({
+            'bold': True,
+            'align': 'center',
+            'valign': 'vcenter',
+            'fg_color': '#D7E4BC',
+            'border': 1
+        })
+        self.worksheet = None
+        self.section = None
+        self.sheets = 0  # Сколько листов уже занимает текущий раздел
+        self.row = 0
+
+    def begin_section(self, section):
+        self.section = section
+        self.sheets = 0
+        self.add_sheet()
+
+    def add_sheet(self):
+        """Новый лист раздела: "Книги", продолжение — "Книги (2)", "Книги (3)" и т.д."""
+        self.sheets += 1
+        name = self.section.name
+        if self.sheets > 1:
+            suffix = f" ({self.sheets})"
+            # Имя листа Excel не длиннее 31 символа
+            name = name[:31 - len(suffix)] + suffix
+        self.worksheet = self.workbook.add_worksheet(name)
+        # В режиме constant_memory ширину столбцов задаем до записи строк
+        self.worksheet.set_column(0, len(self.section.headers) - 1, 20)
+        self.worksheet.write_row(0, 0, self.section.headers, self.header_format)
+        self.row = 1
+
+    def write_row(self, row):
+        if self.row >= self.max_rows:
+            # Лист заполнен — раздел продолжается на следующем
+            self.add_sheet()
+        if self.worksheet.write_row(self.row, 0, [value if value is not None else "" for value in row]) == -1:
+            raise ValueError(f"Не удалось записать строку {self.row} на лист раздела {self.section.name}")
+        self.row += 1
+
+    def close(self):
+        self.workbook.close()
+
+
+class CsvSink:
+    """CSV: каждый раздел пишется в свой файл <имя>_<раздел>.csv"""
+
+    def __init__(self, path):
+        self.base, _ = os.path.splitext(path)
+        self.paths = []
+        self.file = None
+        self.writer = None
+
+    def begin_section(self, section):
+        self.close()
+        path = f"{self.base}_{section.name}.csv"
+        self.paths.append(path)
+        # utf-8-sig, чтобы Excel правильно открыл кириллицу
+        self.file = open(path, "w", newline="", encoding="utf-8-sig")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(section.headers)
+
+    def write_row(self, row):
+        self.writer.writerow(row)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class JsonLinesSink:
+    """JSON Lines: одна строка отчета — один объект с названием раздела"""
+
+    def __init__(self, path):
+        self.paths = [path]
+        self.file = open(path, "w", encoding="utf-8")
+        self.section = None
+
+    def begin_section(self, section):
+        self.section = section
+
+    def write_row(self, row):
+        record = {"section": self.section.name}
+        record.update(zip(self.section.headers, row))
+        self.file.write(json.dumps(record, ensure_ascii=False, default=str))
+        self.file.write("\n")
+
+    def close(self):
+        self.file.close()
+
+
+SINKS = {"xlsx": XlsxSink, "csv": CsvSink, "jsonl": JsonLinesSink}
+
+
+def report_format(path):
+    """Формат отчета по расширению файла"""
+    fmt = os.path.splitext(path)[1].lstrip(".").lower()
+    if fmt not in SINKS:
+        raise ValueError(f"Неизвестный формат отчета: {fmt}")
+    return fmt
+
+
+def write_report(path, sections, progress=None, progress_every=1000):
+    """Записывает разделы отчета в файл (формат по расширению) и возвращает число строк разделов.
+
+    progress(stage, section_index, rows) вызывается перед запросом раздела
+    ("query"), каждые progress_every строк ("write") и перед закрытием
+    файла ("save"). Исключение из progress (например, отмена) прерывает
+    запись; недописанные файлы при любой ошибке удаляются.
+    """
+    sink = SINKS[report_format(path)](path)
+    counts = {}
+    try:
+        for index, section in enumerate(sections):
+            if progress:
+                progress("query", index, 0)
+            # Пустые разделы, как и раньше, в отчет не попадают
+            rows = iter(section.rows)
+            first = next(rows, None)
+            if first is None:
+                continue
+            sink.begin_section(section)
+            for count, row in enumerate(itertools.chain((first,), rows), 1):
+                sink.write_row(row)
+                if progress and count % progress_every == 0:
+                    progress("write", index, count)
+            counts[section.name] = count
+        if progress:
+            progress("save", len(sections), 0)
+    except BaseException:
+        # Закрываем начатые итераторы, чтобы они вернули соединения с базой
+        for section in sections:
+            if hasattr(section.rows, "close"):
+                section.rows.close()
+        sink.close()
+        for written in sink.paths:
+            if os.path.exists(written):
+                os.remove(written)
+        raise
+    sink.close()
+    return counts
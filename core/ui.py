@@ -1,5 +1,5 @@
 from PyQt5.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QStackedWidget, QMenu, QMessageBox, QScrollArea
-from PyQt5.QtGui import QIcon, QFont, QPixmap
+from PyQt5.QtGui import QIcon, QFont
 from PyQt5.QtCore import Qt
 from src.pages.home_page import PDFViewer  # Импортируем главную страницу
 from src.pages.all_books_page import AllBooksPage
@@ -7,6 +7,7 @@ from core.category_manager import CategoryManager
 from src.pages.settings_page import SettingsPage
 from src.pages.login import RegistrationApp
 from core.database import DatabaseManager  # Импортируем DatabaseManager
+from core.cover_cache import get_cover_cache
 from src.pages.wishlist_page import WishlistPage  # Импортируем страницу вишлиста
 from src.pages.report_page import ReportPage  # Импортируем страницу отчетов
 import os
@@ -240,11 +241,13 @@ class MainWindow(QMainWindow):
 
         # Устанавливаем новый заголовок
         self.details_title_label.setText(title)
+        self.details_cover_url = cover_url
 
         # Устанавливаем новую обложку
-        if cover_url and os.path.exists(cover_url):
-            pixmap = QPixmap(cover_url)
-            self.details_cover_label.setPixmap(pixmap.scaled(280, 400, Qt.KeepAspectRatio))
+        if cover_url and (os.path.exists(cover_url) or cover_url.startswith(('http://', 'https://'))):
+            # Обложка из интернета или миниатюры локальной загружаются в фоне
+            get_cover_cache().fetch(cover_url, "details",
+                                    lambda pixmap: self.show_details_cover(cover_url, pixmap))
 
         # Добавляем новую информацию
         self.add_info_row("Автор:", author)
@@ -304,21 +307,21 @@ class MainWindow(QMainWindow):
         # Переключаемся на страницу с деталями
         self.stacked_widget.setCurrentWidget(self.book_details_page)
 
+    def show_details_cover(self, cover_url, pixmap):
+        """Показываем обложку, если пользователь еще смотрит ту же книгу"""
+        if pixmap is None or self.details_cover_url != cover_url:
+            return
+        self.details_cover_label.setPixmap(pixmap)
+
     def add_to_wishlist(self, title, author, isbn, cover_url=None):
         """Добавляет книгу в вишлист пользователя"""
         try:
             self.db_manager.add_to_wishlist(self.user_id, title, author, isbn, cover_url)
+            # Страница вишлиста обновится сама по событию базы
             QMessageBox.information(self, "Успех", "Книга добавлена в вишлист!")
-            # Обновляем страницу вишлиста
-            self.refresh_wishlist()
         except Exception as e:
             QMessageBox.warning(self, "Ошибка", f"Не удалось добавить книгу в вишлист: {str(e)}")
 
-    def refresh_wishlist(self):
-        """Обновляет содержимое страницы вишлиста"""
-        if hasattr(self, 'wishlist_page'):
-            self.wishlist_page.load_wishlist()
-
     def add_info_row(self, label_text, value_text):
         """
         Добавляет строку с информацией о книге.
@@ -354,28 +357,6 @@ class MainWindow(QMainWindow):
             if child.widget():
                 child.widget().deleteLater()
 
-    def load_image(self, img_url):
-        try:
-            from PIL import Image
-            from io import BytesIO
-            import requests
-
-            response = requests.get(img_url)
-            response.raise_for_status()
-
-            image_data = BytesIO(response.content)
-            image = Image.open(image_data)
-            image.thumbnail((200, 300))  # Уменьшаем размер изображения
-            image_data = BytesIO()
-            image.save(image_data, format="PNG")
-
-            pixmap = QPixmap()
-            pixmap.loadFromData(image_data.getvalue())
-            return pixmap
-        except Exception as e:
-            print(f"Ошибка при загрузке изображения: {e}")
-            return None
-
     @staticmethod
     def get_font(size, bold=False):
         font = QFont("Arial", size)
@@ -459,6 +440,7 @@ class MainWindow(QMainWindow):
         self.home_page.apply_theme(is_dark)
         self.all_books_page.apply_theme(is_dark)
         self.category_page.apply_theme(is_dark)
+        self.wishlist_page.apply_theme(is_dark)
 
     def apply_font(self, font_name):
         """Применение шрифта ко всему приложению"""
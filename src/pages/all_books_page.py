@@ -1,147 +1,340 @@
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QGridLayout, QLabel, QScrollArea
-from PyQt5.QtGui import QPixmap
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QGridLayout, QLabel, QScrollArea, QApplication
 from PyQt5.QtCore import Qt, QSize, pyqtSignal, QObject, QThread
 import asyncio
 import aiohttp
-from bs4 import BeautifulSoup
+from urllib.parse import urlsplit
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from core.http_cache import HttpCache
+from core.database import DatabaseManager
+from core.html_parser import parse_listing, parse_details, default_backend
+from core.cover_cache import get_cover_cache
+
+
+# Ответы сервера, после которых запрос стоит повторить
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Что показываем вместо подробностей книги, если их не удалось загрузить
+DETAILS_NOT_FOUND = {
+    "read_url": "Ссылка не найдена",
+    "author": "Автор не найден",
+    "genre": "Жанр не найден",
+    "rating": "Рейтинг не найден",
+    "tags": ["Теги не найдены"],
+    "year": "Год издания не найден",
+    "isbn": "ISBN не найден"
+}
+
+
+class HostRateLimiter:
+    """Ограничивает число запросов в секунду к каждому хосту"""
+
+    def __init__(self, requests_per_second=None):
+        self.interval = 1 / requests_per_second if requests_per_second else 0
+        self.next_slot = {}  # Хост -> время, когда можно отправить следующий запрос
+        self.lock = asyncio.Lock()
+
+    async def wait(self, url):
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc
+        async with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
 
 
 class BookLoader(QObject):
     # Сигналы для передачи данных о книгах и уведомления о завершении загрузки
     book_loaded = pyqtSignal(str, str, str, str, str, str, str, list, str, str)  # Передаем название, обложку, страницу, ссылку, автора, жанр, рейтинг, теги, год и ISBN
-    loading_finished = pyqtSignal()  # Сообщаем, что все книги загружены
+    loading_finished = pyqtSignal()  # Сообщаем, что первая страница книг загружена
+    page_loaded = pyqtSignal(int, bool)  # Номер загруженной страницы списка и есть ли следующие
+    refresh_finished = pyqtSignal()  # Загрузчик остановлен, поток можно завершать
 
-    def __init__(self):
+    def __init__(self, max_concurrency=8, per_host_limit=4, max_retries=3, backoff=0.5,
+                 requests_per_second=None, timeout=30, http_cache=None, batch_size=20,
+                 max_pages=50, prefetch_pages=1, parser_backend=None, parser_workers=2):
         super().__init__()
         # Настраиваем адреса для загрузки книг
         self.base_url = "https://flibusta.su"
         self.book_list_url = f"{self.base_url}/book"
 
+        # Настройки параллельной загрузки
+        self.max_concurrency = max_concurrency  # Сколько запросов выполняется одновременно
+        self.per_host_limit = per_host_limit  # Сколько соединений открываем к одному хосту
+        self.max_retries = max_retries  # Сколько раз повторяем неудачный запрос
+        self.backoff = backoff  # Пауза перед первым повтором, дальше удваивается
+        self.requests_per_second = requests_per_second  # Лимит запросов к хосту (None — без лимита)
+        self.timeout = timeout
+
+        # Кэш ответов: при повторном запуске каталог показывается сразу из него
+        self.http_cache = http_cache
+        self.revalidations = []
+
+        # Загруженные книги сохраняются в catalog_books пачками
+        self.batch_size = batch_size
+        self.pending_books = []
+        self.db = None
+
+        # Постраничный обход списка книг
+        self.max_pages = max_pages  # Глубже этой страницы список не загружаем
+        self.prefetch_pages = prefetch_pages  # Сколько страниц загружаем заранее
+        self.next_page = 1
+        self.failed_pages = set()  # Страницы, которые повторим при следующем запросе
+        self.page_tasks = []
+        self.seen_urls = set()  # Книги, уже загруженные с других страниц списка
+        self.loop = None
+        self.stop_requested = False
+        self.loop_lock = threading.Lock()
+
+        # Разбор HTML выполняется вне цикла событий, чтобы не задерживать сетевые запросы
+        self.parser_backend = parser_backend or default_backend()
+        self.parser_workers = parser_workers
+
+    async def fetch(self, session, url):
+        """
+        Отдаем страницу из кэша, если она там есть. Устаревшая копия
+        тоже отдается сразу, а проверяется и обновляется в фоне.
+        """
+        if self.http_cache is None:
+            return await self.download(session, url)
+        entry = self.http_cache.get(url)
+        if entry is None:
+            return await self.download(session, url)
+        if not self.http_cache.is_fresh(entry):
+            self.revalidations.append(asyncio.ensure_future(self.revalidate(session, url, entry)))
+        return entry.body
+
+    async def revalidate(self, session, url, entry):
+        """Проверяем устаревшую копию страницы условным запросом"""
+        try:
+            await self.download(session, url, entry)
+        except Exception as e:
+            print(f"Не удалось обновить {url}: {e}")
+
+    async def download(self, session, url, entry=None):
+        """
+        Загружаем страницу с ограничением параллельности и повторами при ошибках.
+        Если есть сохраненная копия, отправляем условный запрос.
+        """
+        headers = self.http_cache.conditional_headers(entry) if self.http_cache else {}
+        for attempt in range(self.max_retries + 1):
+            delay = self.backoff * 2 ** attempt
+            try:
+                async with self.semaphore:
+                    await self.rate_limiter.wait(url)
+                    async with session.get(url, headers=headers) as response:
+                        if response.status == 304 and entry is not None:
+                            # Страница не изменилась
+                            self.http_cache.touch(url)
+                            return entry.body
+                        if response.status not in RETRY_STATUSES:
+                            response.raise_for_status()
+                            body = await response.text()
+                            if self.http_cache is not None:
+                                self.http_cache.put(url, body, response.headers.get("ETag"),
+                                                    response.headers.get("Last-Modified"))
+                            return body
+                        # Сервер просит подождать — уважаем Retry-After, если он указан
+                        retry_after = response.headers.get("Retry-After", "")
+                        if retry_after.isdigit():
+                            delay = max(delay, int(retry_after))
+                        error = aiohttp.ClientResponseError(
+                            response.request_info, response.history,
+                            status=response.status, message=response.reason
+                        )
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                error = e
+            if attempt < self.max_retries:
+                await asyncio.sleep(delay)
+        raise error
+
+    def listing_url(self, page):
+        """Адрес страницы списка книг (нумерация с 1)"""
+        return self.book_list_url if page == 1 else f"{self.book_list_url}?page={page}"
+
+    def request_pages(self, up_to):
+        """
+        Просим загрузить страницы списка до up_to включительно.
+        Можно вызывать из потока интерфейса.
+        """
+        with self.loop_lock:
+            if self.loop is not None:
+                self.loop.call_soon_threadsafe(self.schedule_pages, up_to)
+
+    def stop(self):
+        """Останавливаем загрузку (можно вызывать из потока интерфейса)"""
+        with self.loop_lock:
+            self.stop_requested = True
+            if self.loop is not None:
+                self.loop.call_soon_threadsafe(self.stop_event.set)
+
+    def schedule_pages(self, up_to):
+        """Запускаем загрузку еще не запрошенных страниц (в цикле событий загрузчика)"""
+        for page in sorted(self.failed_pages):
+            self.failed_pages.discard(page)
+            self.page_tasks.append(asyncio.ensure_future(self.load_page(page)))
+        while self.next_page <= min(up_to, self.max_pages):
+            self.page_tasks.append(asyncio.ensure_future(self.load_page(self.next_page)))
+            self.next_page += 1
+
+    async def load_page(self, page):
+        """Загружаем одну страницу списка и сообщаем, есть ли следующие"""
+        count = await self.fetch_book_list(self.session, self.listing_url(page))
+        if count is None:
+            self.failed_pages.add(page)
+        elif count == 0:
+            # Пустая страница — список закончился
+            self.max_pages = min(self.max_pages, page - 1)
+        self.page_loaded.emit(page, page < self.max_pages)
+        if page == 1:
+            self.loading_finished.emit()
+
     async def fetch_book_list(self, session, url):
         """
-        Загружаем список книг с главной страницы сайта.
+        Загружаем одну страницу списка книг.
+        Подробности о книгах загружаются параллельно, и каждая книга
+        передается в интерфейс сразу, как только её данные готовы.
+        Возвращает число книг на странице или None при ошибке.
         """
         try:
-            async with session.get(url) as response:
-                response.raise_for_status()
-                html = await response.text()
-                soup = BeautifulSoup(html, 'html.parser')
-
-                for book_container in soup.select("div.desc"):
-                    # Ищем название книги
-                    title_tag = book_container.select_one("div.book_name > a")
-                    title = title_tag.get_text(strip=True) if title_tag else "Название не найдено"
-
-                    # Ищем обложку книги
-                    img_tag = book_container.select_one("div.cover > a > img")
-                    img_url = img_tag["src"] if img_tag and "src" in img_tag.attrs else "Картинка не найдена"
-                    if img_url != "Картинка не найдена":
-                        img_url = img_url.replace("/b/img/mini/", "/b/img/big/")
-                        img_url = f"{self.base_url}{img_url}"
-
-                    # Ищем страницу с полной информацией о книге
-                    full_page_tag = book_container.select_one("div.book_name > a")
-                    full_page_url = full_page_tag["href"] if full_page_tag and "href" in full_page_tag.attrs else "Страница книги не найдена"
-                    if full_page_url != "Страница книги не найдена":
-                        full_page_url = f"{self.base_url}{full_page_url}"
-
-                    # Загружаем подробную информацию о книге
-                    details = await self.fetch_book_details(session, full_page_url)
-
-                    # Передаем все данные о книге
-                    self.book_loaded.emit(
-                        title,
-                        img_url,
-                        full_page_url,
-                        details["read_url"],
-                        details["author"],
-                        details["genre"],
-                        details["rating"],
-                        details["tags"],
-                        details["year"],
-                        details["isbn"]
-                    )
+            html = await self.fetch(session, url)
+            books = await self.parse(parse_listing, html)
+
+            tasks = []
+            for book in books:
+                title, img_url, full_page_url = book["title"], book["img_url"], book["full_page_url"]
+
+                # Одна и та же книга может попасть на соседние страницы списка
+                if full_page_url in self.seen_urls:
+                    continue
+                self.seen_urls.add(full_page_url)
+
+                # Загружаем подробную информацию о книге параллельно с остальными
+                tasks.append(self.load_book(session, title, img_url, full_page_url))
+
+            await asyncio.gather(*tasks)
+            self.save_pending_books()
+            return len(books)
 
         except Exception as e:
             print(f"Что-то пошло не так при загрузке списка книг: {e}")
+            return None
+
+    async def load_book(self, session, title, img_url, full_page_url):
+        """
+        Загружаем подробности книги и сразу передаем её в интерфейс.
+        """
+        details = await self.fetch_book_details(session, full_page_url)
+        if details is None:
+            # Заглушки нужны только интерфейсу: сохраненные в каталоге данные не трогаем
+            self.book_loaded.emit(title, img_url, full_page_url, *DETAILS_NOT_FOUND.values())
+            return
+
+        # Передаем все данные о книге
+        self.book_loaded.emit(
+            title,
+            img_url,
+            full_page_url,
+            details["read_url"],
+            details["author"],
+            details["genre"],
+            details["rating"],
+            details["tags"],
+            details["year"],
+            details["isbn"]
+        )
+
+        # Запоминаем книгу в локальном каталоге
+        self.pending_books.append({
+            "page_url": full_page_url,
+            "title": title,
+            "cover_url": img_url,
+            **details
+        })
+        if len(self.pending_books) >= self.batch_size:
+            self.save_pending_books()
+
+    def save_pending_books(self):
+        """Сохраняем накопленные книги в catalog_books одной транзакцией"""
+        if not self.pending_books or self.db is None:
+            return
+        books, self.pending_books = self.pending_books, []
+        try:
+            self.db.upsert_catalog_books(books)
+        except Exception as e:
+            print(f"Ошибка при сохранении каталога: {e}")
+
+    async def parse(self, parser, html):
+        """Разбираем страницу в пуле потоков выбранным способом"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.parse_executor, parser, html, self.base_url, self.parser_backend)
 
     async def fetch_book_details(self, session, full_page_url):
         """
         Загружаем подробную информацию о каждой книге.
+        Возвращает None, если страницу не удалось загрузить или разобрать.
         """
         try:
-            async with session.get(full_page_url) as response:
-                response.raise_for_status()
-                html = await response.text()
-                soup = BeautifulSoup(html, 'html.parser')
-
-                # Ищем автора книги
-                author_tag = soup.select_one("div.row.author > span.row_content > a")
-                author = author_tag.get_text(strip=True) if author_tag else "Автор не найден"
-
-                # Ищем жанр книги
-                genre_tag = soup.select_one("div.row.genre > span.row_content > a")
-                genre = genre_tag.get_text(strip=True) if genre_tag else "Жанр не найден"
-
-                # Ищем рейтинг книги
-                rating_tag = soup.select_one("div.row.rating > span.row_content")
-                rating = rating_tag.get_text(strip=True) if rating_tag else "Рейтинг не найден"
-
-                # Собираем все теги книги
-                tags = [tag.get_text(strip=True) for tag in soup.select("div.row.tags > span.row_content > a")]
-                tags = ", ".join(tags) if tags else "Теги не найдены"
-
-                # Ищем год издания
-                year_tag = soup.select_one("div.row.year_public > span.row_content")
-                year = year_tag.get_text(strip=True) if year_tag else "Год издания не найден"
-
-                # Ищем ISBN книги
-                isbn_tag = soup.select_one("div.row.isbn > span.row_content")
-                isbn = isbn_tag.get_text(strip=True) if isbn_tag else "ISBN не найден"
-
-                # Ищем ссылку для чтения книги
-                read_button_tag = soup.select_one("div.b_buttons_book > div.btn.list > a")
-                read_url = read_button_tag["href"] if read_button_tag and "href" in read_button_tag.attrs else "Ссылка не найдена"
-                if read_url != "Ссылка не найдена":
-                    read_url = f"{self.base_url}{read_url}"
-
-                return {
-                    "read_url": read_url,
-                    "author": author,
-                    "genre": genre,
-                    "rating": rating,
-                    "tags": tags.split(", "),
-                    "year": year,
-                    "isbn": isbn
-                }
+            html = await self.fetch(session, full_page_url)
+            return await self.parse(parse_details, html)
 
         except Exception as e:
             print(f"Что-то пошло не так при загрузке информации о книге: {e}")
-            return {
-                "read_url": "Ссылка не найдена",
-                "author": "Автор не найден",
-                "genre": "Жанр не найден",
-                "rating": "Рейтинг не найден",
-                "tags": ["Теги не найдены"],
-                "year": "Год издания не найден",
-                "isbn": "ISBN не найден"
-            }
+            return None
 
     def load_books(self):
         """
-        Запускаем процесс загрузки книг.
+        Запускаем процесс загрузки книг. Цикл событий работает, пока
+        не будет вызван stop(), и загружает новые страницы списка
+        по запросам request_pages.
         """
         headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"
         }
 
+        # Своя копия DatabaseManager для потока загрузчика
+        self.db = DatabaseManager("data/database.db")
+
         async def main():
-            async with aiohttp.ClientSession(headers=headers) as session:
-                await self.fetch_book_list(session, self.book_list_url)
-            self.loading_finished.emit()  # Сообщаем, что все книги загружены
+            # Примитивы asyncio создаем внутри цикла событий, в котором они работают
+            self.semaphore = asyncio.Semaphore(self.max_concurrency)
+            self.rate_limiter = HostRateLimiter(self.requests_per_second)
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, limit_per_host=self.per_host_limit,
+                                             ttl_dns_cache=300)
+            timeout = aiohttp.ClientTimeout(total=self.timeout)
+            self.stop_event = asyncio.Event()
+            self.parse_executor = ThreadPoolExecutor(max_workers=self.parser_workers)
+            async with aiohttp.ClientSession(headers=headers, connector=connector, timeout=timeout) as session:
+                self.session = session
+                with self.loop_lock:
+                    self.loop = asyncio.get_running_loop()
+                    if self.stop_requested:
+                        self.stop_event.set()
+                # Первая страница и предзагрузка следующих
+                self.schedule_pages(1 + self.prefetch_pages)
+                await self.stop_event.wait()
+
+                with self.loop_lock:
+                    self.loop = None
+                # Прерываем незаконченные загрузки и проверки кэша
+                pending = self.page_tasks + self.revalidations
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+            self.parse_executor.shutdown(wait=False)
+            self.refresh_finished.emit()
 
-        asyncio.run(main())
+        try:
+            asyncio.run(main())
+        finally:
+            self.save_pending_books()
+            self.db.close()
+            self.db = None
 
 
 class AllBooksPage(QWidget):
@@ -149,6 +342,12 @@ class AllBooksPage(QWidget):
         super().__init__()
         self.show_book_details_callback = show_book_details_callback
         self.is_data_loaded = False
+        self.db = DatabaseManager("data/database.db")
+        self.catalog_offset = 0  # Сколько строк локального каталога уже показано
+        self.catalog_page_size = 40
+        self.loaded_pages = 0  # Сколько страниц списка загружено с сайта
+        self.has_more_pages = True
+        self.book_widgets = {}  # Адрес страницы книги -> (виджет, строка, столбец, путь к обложке)
         
         # Следим за тем, куда добавлять следующую книгу в сетке
         self.row = 0
@@ -190,23 +389,75 @@ class AllBooksPage(QWidget):
         # Прячем список книг, пока они не загружены
         self.scroll_area.hide()
 
+        # Подгружаем книги, когда пользователь долистал почти до конца
+        self.scroll_area.verticalScrollBar().valueChanged.connect(self.on_scroll)
+
         # Подключаемся к загрузчику книг
-        self.book_loader = BookLoader()
+        self.book_loader = BookLoader(http_cache=HttpCache())
         self.book_loader.book_loaded.connect(self.add_book_widget)
         self.book_loader.loading_finished.connect(self.on_loading_finished)
+        self.book_loader.page_loaded.connect(self.on_page_loaded)
+        self.book_loader.refresh_finished.connect(self.on_refresh_finished)
+
+    def show_catalog(self):
+        """Показываем следующую порцию книг из локального каталога, возвращаем их число"""
+        books = self.db.get_catalog_books(self.catalog_page_size, self.catalog_offset)
+        self.catalog_offset += len(books)
+        for book in books:
+            if book["page_url"] in self.book_widgets:
+                continue
+            self.add_book_widget(
+                book["title"],
+                book["cover_url"] or "Картинка не найдена",
+                book["page_url"],
+                book["read_url"],
+                book["author"],
+                book["genre"],
+                book["rating"],
+                book["tags"],
+                book["year"],
+                book["isbn"],
+                book["cover_path"]
+            )
+        if books:
+            self.loading_label.hide()
+            self.scroll_area.show()
+        return len(books)
+
+    def load_more(self):
+        """Показываем еще книги: сначала из каталога, потом со следующих страниц сайта"""
+        if self.show_catalog() == 0 and self.has_more_pages:
+            self.book_loader.request_pages(self.loaded_pages + 1 + self.book_loader.prefetch_pages)
+
+    def on_scroll(self, value):
+        scroll_bar = self.scroll_area.verticalScrollBar()
+        if value >= scroll_bar.maximum() - 600:
+            self.load_more()
+
+    def on_page_loaded(self, page, has_more):
+        self.loaded_pages = max(self.loaded_pages, page)
+        self.has_more_pages = has_more
+        # Если книги еще не заполнили окно, прокрутки не будет — грузим дальше сами
+        if self.scroll_area.isVisible() and self.scroll_area.verticalScrollBar().maximum() == 0:
+            self.load_more()
 
     def load_books(self):
         """Начинаем загрузку книг"""
         if not self.is_data_loaded:
+            # Сразу показываем локальный каталог, а с сайта только обновляем его
+            self.show_catalog()
+
             # Запускаем загрузку в отдельном потоке
             self.thread = QThread()
             self.book_loader.moveToThread(self.thread)
             self.thread.started.connect(self.book_loader.load_books)
+            QApplication.instance().aboutToQuit.connect(self.stop_loading)
             self.thread.start()
             self.is_data_loaded = True
 
-    def add_book_widget(self, title, img_url, full_page_url, read_url, author, genre, rating, tags, year, isbn):
-        """Добавляем книгу в список"""
+    def add_book_widget(self, title, img_url, full_page_url, read_url, author, genre, rating, tags, year, isbn,
+                        cover_path=None):
+        """Добавляем книгу в список (или обновляем уже показанную)"""
         # Готовим виджет для книги
         book_widget = QWidget()
         book_widget.setFixedSize(230, 380)  # Задаем размер для книги
@@ -217,25 +468,26 @@ class AllBooksPage(QWidget):
         # Загружаем и сохраняем обложку книги
         cover_label = QLabel()
         cover_label.setAlignment(Qt.AlignCenter)
-        pixmap = self.load_image(img_url)
-        local_cover_path = None
-        
-        if pixmap:
-            # Сохраняем обложку на компьютере
-            covers_dir = "covers"
-            if not os.path.exists(covers_dir):
-                os.makedirs(covers_dir)
-            
-            # Придумываем имя для файла обложки
-            file_name = f"{isbn if isbn and isbn != 'ISBN не найден' else title.replace(' ', '_')}.png"
-            local_cover_path = os.path.join(covers_dir, file_name)
-            
-            # Сохраняем картинку
-            pixmap.save(local_cover_path)
-            
-            # Показываем обложку
-            cover_label.setPixmap(pixmap.scaled(180, 270, Qt.KeepAspectRatio, Qt.SmoothTransformation))
-        
+        if cover_path is None:
+            # Обложка могла быть сохранена при прошлом показе каталога
+            known = self.book_widgets.get(full_page_url)
+            cover_path = known[3] if known else None
+        local_cover_path = cover_path if cover_path and os.path.exists(cover_path) else None
+        if local_cover_path:
+            # Миниатюры сохраненной обложки нарезаются в фоне, если их еще нет
+            get_cover_cache().fetch(
+                local_cover_path, "grid",
+                lambda pixmap: cover_label.setPixmap(pixmap) if pixmap else None
+            )
+        elif img_url != "Картинка не найдена":
+            # Пока обложка загружается в фоне, показываем заглушку
+            cover_label.setMinimumHeight(270)
+            cover_label.setText("Загрузка обложки...")
+            get_cover_cache().fetch(
+                img_url, "grid",
+                lambda pixmap: self.on_cover_loaded(cover_label, full_page_url, img_url, pixmap)
+            )
+
         book_layout.addWidget(cover_label)
 
         # Добавляем название книги
@@ -253,24 +505,59 @@ class AllBooksPage(QWidget):
             author_label.setWordWrap(True)
             book_layout.addWidget(author_label)
 
-        # Размещаем виджет в сетке
-        self.scroll_layout.addWidget(book_widget, self.row, self.column)
-        
-        # Обновляем позицию для следующей книги
-        self.column += 1
-        if self.column >= self.columns_per_row:
-            self.column = 0
-            self.row += 1
+        # Если книга уже показана, заменяем её виджет на том же месте
+        if full_page_url in self.book_widgets:
+            old_widget, row, column, _ = self.book_widgets[full_page_url]
+            self.scroll_layout.removeWidget(old_widget)
+            old_widget.deleteLater()
+            self.scroll_layout.addWidget(book_widget, row, column)
+            self.book_widgets[full_page_url] = (book_widget, row, column, local_cover_path)
+        else:
+            # Размещаем виджет в сетке
+            self.scroll_layout.addWidget(book_widget, self.row, self.column)
+            self.book_widgets[full_page_url] = (book_widget, self.row, self.column, local_cover_path)
+
+            # Обновляем позицию для следующей книги
+            self.column += 1
+            if self.column >= self.columns_per_row:
+                self.column = 0
+                self.row += 1
 
         # Делаем виджет кликабельным
+        # Путь к обложке берем в момент клика: она могла загрузиться позже
         book_widget.mousePressEvent = lambda e: self.show_book_details_callback(
-            title, local_cover_path or "", full_page_url, read_url, author, genre, rating, tags, year, isbn
+            title, self.book_widgets[full_page_url][3] or "", full_page_url, read_url, author, genre, rating, tags, year, isbn
         )
 
+    def on_cover_loaded(self, cover_label, full_page_url, img_url, pixmap):
+        """Запоминаем загруженную обложку и показываем её вместо заглушки"""
+        if pixmap is None:
+            cover_label.setText("")
+            return
+
+        # В каталоге храним путь к самой крупной миниатюре из кэша обложек
+        local_cover_path = get_cover_cache().get_path(img_url, "details")
+        self.db.set_catalog_cover_path(full_page_url, local_cover_path)
+        if full_page_url in self.book_widgets:
+            self.book_widgets[full_page_url] = self.book_widgets[full_page_url][:3] + (local_cover_path,)
+
+        # Показываем обложку
+        cover_label.setPixmap(pixmap)
+
     def on_loading_finished(self):
         """Вызывается когда загрузка книг завершена"""
         self.loading_label.hide()
         self.scroll_area.show()
+
+    def stop_loading(self):
+        """Останавливаем загрузчик каталога при выходе из приложения"""
+        self.book_loader.stop()
+        if self.thread and self.thread.isRunning():
+            self.thread.quit()
+            self.thread.wait()
+
+    def on_refresh_finished(self):
+        """Вызывается когда загрузчик закончил работу, включая обновление кэша"""
         if self.thread and self.thread.isRunning():
             self.thread.quit()
             self.thread.wait()
@@ -324,21 +611,3 @@ class AllBooksPage(QWidget):
         if not self.is_data_loaded:
             self.load_books()
         super().showEvent(event)
-
-    def load_image(self, img_url):
-        """Загружает изображение по URL"""
-        try:
-            import requests
-            from PyQt5.QtCore import QByteArray
-            
-            response = requests.get(img_url)
-            response.raise_for_status()
-            
-            image_data = QByteArray(response.content)
-            pixmap = QPixmap()
-            pixmap.loadFromData(image_data)
-            
-            return pixmap
-        except Exception as e:
-            print(f"Ошибка при загрузке изображения: {e}")
-            return None
\ No newline at end of file
@@ -1,14 +1,214 @@
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
-    QLabel, QScrollArea, QFileDialog, QAction, QMenuBar, QLineEdit, QMessageBox, QDialog
+    QLabel, QScrollArea, QFileDialog, QAction, QMenuBar, QLineEdit, QMessageBox, QDialog,
+    QListWidget, QListWidgetItem, QProgressDialog, QListView, QStyledItemDelegate, QStyle,
+    QAbstractItemView, QApplication
+)
+from PyQt5.QtGui import QIcon, QPixmap, QFont, QImage, QPainter, QColor, QPalette
+from PyQt5.QtCore import (
+    Qt, QTimer, QObject, QThread, QRect, QSize, pyqtSignal, pyqtSlot,
+    QAbstractListModel, QModelIndex
 )
-from PyQt5.QtGui import QIcon, QPixmap, QFont
-from PyQt5.QtCore import Qt
 from core.database import DatabaseManager
-from core.pdf_handler import create_folder_for_book, save_first_page_as_cover, save_all_pages
+from core.db_events import get_db_events
+from core.pdf_handler import create_folder_for_book, get_render_engine, samples_to_qimage
+from core.import_jobs import ImportJob, FolderImportJob
+from core.page_cache import get_page_cache
+from core.cover_cache import get_cover_cache
 from core.book_metadata_dialog import BookMetadataDialog
 import os
 import shutil
+import threading
+from collections import OrderedDict
+
+
+class BookListModel(QAbstractListModel):
+    """Модель библиотеки пользователя для QListView.
+
+    Хранит только данные книг из базы; обложки загружаются в фоне через
+    кэш обложек, когда представление запрашивает их для отрисовки видимых
+    строк, и держатся в памяти не больше max_covers штук.
+    """
+
+    BookRole = Qt.UserRole + 1  # Словарь с данными книги
+
+    def __init__(self, parent=None, max_covers=120):
+        super().__init__(parent)
+        self.books = []
+        self.rows = {}  # id книги -> номер строки
+        self.max_covers = max_covers
+        self.covers = OrderedDict()  # Путь к обложке -> QPixmap (None, если загрузить не удалось)
+        self.pending = OrderedDict()  # Обложки, которые нужно загрузить -> id книги
+        self.loading = set()  # Обложки, которые сейчас загружаются в фоне
+        self.cover_timer = QTimer(self)
+        self.cover_timer.setSingleShot(True)
+        self.cover_timer.timeout.connect(self.load_pending_covers)
+
+    def set_books(self, books):
+        self.beginResetModel()
+        self.books = [dict(book) for book in books]
+        self.rows = {}
+        self.reindex()
+        self.covers.clear()
+        self.pending.clear()
+        self.loading.clear()
+        self.endResetModel()
+
+    def reindex(self, start=0):
+        """Обновляет номера строк книг, начиная со строки start"""
+        for row in range(start, len(self.books)):
+            self.rows[self.books[row]['book_id']] = row
+
+    def row_of(self, book_id):
+        return self.rows.get(book_id)
+
+    def put_book(self, book):
+        """Добавляет книгу или обновляет уже показанную, не трогая остальные строки"""
+        book = dict(book)
+        row = self.row_of(book['book_id'])
+        if row is None:
+            # Книги отсортированы по убыванию book_id, как в get_books
+            row = next(
+                (i for i, other in enumerate(self.books) if other['book_id'] < book['book_id']),
+                len(self.books)
+            )
+            self.beginInsertRows(QModelIndex(), row, row)
+            self.books.insert(row, book)
+            self.reindex(row)
+            self.endInsertRows()
+            return
+        # Обложку могли заменить, поэтому загружаем её заново
+        self.covers.pop(self.books[row]['cover_path'], None)
+        self.books[row] = book
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def remove_book(self, book_id):
+        row = self.row_of(book_id)
+        if row is not None:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self.books[row]
+            del self.rows[book_id]
+            self.reindex(row)
+            self.endRemoveRows()
+
+    def clear_category(self, category_id):
+        """Убирает название удаленной категории у её книг"""
+        for row, book in enumerate(self.books):
+            if book['category_id'] == category_id and book['category_name']:
+                book['category_name'] = None
+                index = self.index(row)
+                self.dataChanged.emit(index, index)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.books)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        book = self.books[index.row()]
+        if role == Qt.DisplayRole:
+            return book['title']
+        if role == Qt.ToolTipRole:
+            return f"{book['title']} — {book['author']}" if book['author'] else book['title']
+        if role == Qt.DecorationRole:
+            return self.cover(index.row())
+        if role == self.BookRole:
+            return book
+        return None
+
+    def cover(self, row):
+        """Обложка строки, если она уже загружена; иначе ставим её в очередь"""
+        cover_path = self.books[row]['cover_path']
+        if not cover_path:
+            return None
+        if cover_path in self.covers:
+            self.covers.move_to_end(cover_path)
+            return self.covers[cover_path]
+        if cover_path not in self.loading:
+            # Загружаем после отрисовки, чтобы не задерживать прокрутку
+            self.pending[cover_path] = self.books[row]['book_id']
+            self.cover_timer.start(0)
+        return None
+
+    def load_pending_covers(self):
+        cover_cache = get_cover_cache()
+        while self.pending:
+            cover_path, book_id = self.pending.popitem(last=False)
+            self.loading.add(cover_path)
+            # Готовая миниатюра придет сразу, остальные нарежутся в фоне
+            cover_cache.fetch(cover_path, "card",
+                              lambda pixmap, path=cover_path, book_id=book_id: self.set_cover(path, book_id, pixmap))
+
+    def set_cover(self, cover_path, book_id, pixmap):
+        self.loading.discard(cover_path)
+        self.covers[cover_path] = pixmap
+        # Вытесняем обложки, которые давно не показывались
+        while len(self.covers) > self.max_covers:
+            self.covers.popitem(last=False)
+        row = self.row_of(book_id)
+        if row is not None and self.books[row]['cover_path'] == cover_path:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+
+class BookCardDelegate(QStyledItemDelegate):
+    """Рисует карточку книги: обложку и подписи под ней"""
+
+    card_size = QSize(240, 420)
+    cover_size = QSize(200, 300)
+    padding = 10
+
+    def sizeHint(self, option, index):
+        return self.card_size
+
+    def paint(self, painter, option, index):
+        widget = option.widget
+        style = widget.style() if widget else QApplication.style()
+        # Фон карточки рисует стиль, чтобы работали правила ::item из темы
+        style.drawPrimitive(QStyle.PE_PanelItemViewItem, option, painter, widget)
+
+        book = index.data(BookListModel.BookRole)
+        rect = option.rect.adjusted(self.padding, self.padding, -self.padding, -self.padding)
+        painter.save()
+
+        # Обложка по центру или заглушка, пока она загружается
+        cover_rect = QRect(0, 0, self.cover_size.width(), self.cover_size.height())
+        cover_rect.moveCenter(rect.center())
+        cover_rect.moveTop(rect.top())
+        pixmap = index.data(Qt.DecorationRole)
+        if pixmap is None:
+            painter.fillRect(cover_rect, QColor("#e0e0e0"))
+        else:
+            target = QRect(0, 0, pixmap.width(), pixmap.height())
+            target.moveCenter(cover_rect.center())
+            painter.drawPixmap(target, pixmap)
+
+        # Название и информация о книге
+        painter.setPen(option.palette.color(QPalette.Text))
+        text_rect = QRect(rect.left(), cover_rect.bottom() + 5, rect.width(), 20)
+        font = QFont(option.font)
+        font.setPixelSize(14)
+        font.setBold(True)
+        painter.setFont(font)
+        title = painter.fontMetrics().elidedText(book['title'], Qt.ElideRight, rect.width())
+        painter.drawText(text_rect, Qt.AlignCenter, title)
+
+        font.setPixelSize(12)
+        font.setBold(False)
+        painter.setFont(font)
+        lines = []
+        if book['author']:
+            lines.append(f"Автор: {book['author']}")
+        if book['publication_year']:
+            lines.append(f"Год: {book['publication_year']}")
+        if book['category_name']:
+            lines.append(f"Категория: {book['category_name']}")
+        for line in lines:
+            text_rect.translate(0, 20)
+            line = painter.fontMetrics().elidedText(line, Qt.ElideRight, rect.width())
+            painter.drawText(text_rect, Qt.AlignLeft | Qt.AlignVCenter, line)
+        painter.restore()
 
 
 class PDFViewer(QMainWindow):
@@ -21,6 +221,9 @@ class PDFViewer(QMainWindow):
         # Подключаемся к базе данных и запоминаем ID пользователя
         self.db = DatabaseManager("data/database.db")
         self.user_id = user_id
+        self.import_jobs = {}  # Импортируемые книги и их окна прогресса
+        # При выходе отменяем импорт, чтобы main дождался отката транзакций
+        QApplication.instance().aboutToQuit.connect(self.cancel_imports)
 
         # Готовим главное окно
         self.central_widget = QWidget()
@@ -56,170 +259,225 @@ class PDFViewer(QMainWindow):
         self.open_pdf_button.clicked.connect(self.open_pdf)
         self.top_layout.addWidget(self.open_pdf_button)
 
+        # Добавляем кнопку для импорта целой папки с книгами
+        self.import_folder_button = QPushButton("Импорт папки")
+        self.import_folder_button.setStyleSheet(self.open_pdf_button.styleSheet())
+        self.import_folder_button.clicked.connect(self.import_folder)
+        self.top_layout.addWidget(self.import_folder_button)
+
+        # Добавляем строку поиска по библиотеке
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Поиск по названию, автору, категориям и тексту книг...")
+        self.search_edit.setStyleSheet("font-size: 14px; padding: 5px;")
+        self.search_edit.textChanged.connect(self.on_search_text_changed)
+        self.top_layout.addWidget(self.search_edit)
+
+        # Запускаем поиск не на каждое нажатие клавиши, а после короткой паузы
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(250)
+        self.search_timer.timeout.connect(self.run_search)
+        self.search_page_size = 20
+
+        # Список результатов поиска (скрыт, пока строка поиска пуста)
+        self.search_results = QListWidget()
+        self.search_results.setStyleSheet("font-size: 14px;")
+        self.search_results.itemActivated.connect(self.open_search_result)
+        self.search_results.hide()
+        self.layout.addWidget(self.search_results)
+
+        self.more_results_button = QPushButton("Показать еще")
+        self.more_results_button.clicked.connect(self.load_more_results)
+        self.more_results_button.hide()
+        self.layout.addWidget(self.more_results_button)
+
         # Добавляем заголовок для списка книг
         self.history_label = QLabel("Ранее открытые книги:")
         self.history_label.setStyleSheet("font-size: 16px; font-weight: bold;")
         self.layout.addWidget(self.history_label)
 
-        # Готовим область для прокрутки списка книг
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_content = QWidget()
-        self.scroll_layout = QHBoxLayout(self.scroll_content)
-        self.scroll_layout.setAlignment(Qt.AlignLeft | Qt.AlignTop)
-        self.scroll_content.setStyleSheet("QLabel { margin-right: 25px; }")
-        self.scroll_area.setWidget(self.scroll_content)
-        self.layout.addWidget(self.scroll_area)
-
-        # Загружаем список ранее открытых книг
+        # Список книг: виджеты не создаются, карточки рисует делегат только для видимых строк
+        self.library_model = BookListModel(self)
+        self.library_view = QListView()
+        self.library_view.setObjectName("library")
+        self.library_view.setViewMode(QListView.IconMode)
+        self.library_view.setResizeMode(QListView.Adjust)
+        self.library_view.setMovement(QListView.Static)
+        self.library_view.setUniformItemSizes(True)
+        self.library_view.setSpacing(10)
+        self.library_view.setMouseTracking(True)
+        self.library_view.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.library_view.setItemDelegate(BookCardDelegate(self.library_view))
+        self.library_view.setModel(self.library_model)
+        self.library_view.clicked.connect(self.open_library_book)
+        self.layout.addWidget(self.library_view)
+
+        # Загружаем список ранее открытых книг и дальше обновляем только измененные
         self.load_history()
+        get_db_events().changed.connect(self.on_db_changed)
 
     def create_menu(self):
         menubar = self.menuBar()
 
     def load_history(self):
-        # Получаем список книг пользователя
-        books = self.db.get_books(self.user_id)
-        for book in books:
-            # Преобразуем данные книги в удобный формат
-            book_dict = {
-                'book_id': book[0],
-                'title': book[1],
-                'author': book[2],
-                'publication_year': book[3],
-                'file_path': book[4],
-                'cover_path': book[5],
-                'category_id': book[6],
-                'category_name': book[7]
-            }
+        # Получаем список книг пользователя; обложки модель загрузит сама
+        self.library_model.set_books(self.db.get_books(self.user_id))
+
+    # Больше изменений за раз (например, импорт папки) проще перечитать целиком
+    max_incremental_changes = 200
+
+    def on_db_changed(self, changes):
+        """Обновляем только те карточки, книги которых изменились"""
+        book_changes = [change for change in changes if change.table == "books"]
+        if len(book_changes) > self.max_incremental_changes:
+            self.load_history()
+            book_changes = []
+        for change in book_changes:
+            book = None if change.action == "delete" else self.db.get_book(change.row_id)
+            if book is None or book['user_id'] != self.user_id:
+                self.library_model.remove_book(change.row_id)
+            else:
+                self.library_model.put_book(book)
+        for change in changes:
+            if change.table == "categories" and change.action == "delete":
+                self.library_model.clear_category(change.row_id)
+
+    def open_library_book(self, index):
+        book = index.data(BookListModel.BookRole)
+        self.show_pdf_window(book['file_path'])
+
+    def on_search_text_changed(self, text):
+        """Перезапускаем таймер поиска при изменении текста"""
+        if not text.strip():
+            self.search_timer.stop()
+            self.search_results.clear()
+            self.search_results.hide()
+            self.more_results_button.hide()
+            return
+        self.search_timer.start()
 
-            # Пробуем загрузить обложку книги
-            cover_path = book_dict['cover_path']
-            if not cover_path or not os.path.exists(cover_path):
-                continue  # Пропускаем книгу, если обложка не найдена
-
-            pixmap = QPixmap(cover_path)
-            if pixmap.isNull():
-                continue  # Пропускаем книгу, если не удалось загрузить картинку
-
-            # Готовим виджет для книги
-            book_widget = QWidget()
-            book_widget.setFixedSize(300, 500)
-            book_widget.setProperty("class", "book-widget")
-            book_layout = QVBoxLayout(book_widget)
-
-            # Показываем обложку книги
-            cover_label = QLabel()
-            cover_label.setPixmap(pixmap.scaled(200, 300, Qt.KeepAspectRatio))
-            cover_label.setAlignment(Qt.AlignCenter)
-            book_layout.addWidget(cover_label)
-
-            # Добавляем информацию о книге
-            title_label = QLabel(f"<b>{book_dict['title']}</b>")
-            title_label.setAlignment(Qt.AlignCenter)
-            title_label.setStyleSheet("font-size: 14px; margin: 5px 0;")
-            book_layout.addWidget(title_label)
-
-            if book_dict['author']:
-                author_label = QLabel(f"Автор: {book_dict['author']}")
-                author_label.setStyleSheet("font-size: 12px;")
-                book_layout.addWidget(author_label)
-
-            if book_dict['publication_year']:
-                year_label = QLabel(f"Год: {book_dict['publication_year']}")
-                year_label.setStyleSheet("font-size: 12px;")
-                book_layout.addWidget(year_label)
-
-            if book_dict['category_name']:
-                category_label = QLabel(f"Категория: {book_dict['category_name']}")
-                category_label.setStyleSheet("font-size: 12px;")
-                book_layout.addWidget(category_label)
-
-            # Делаем книгу кликабельной
-            book_widget.mousePressEvent = lambda e, path=book_dict['file_path']: self.show_pdf_window(path)
-
-            # Добавляем книгу в список
-            self.scroll_layout.addWidget(book_widget)
-
-    def clear_history(self):
-        # Убираем все книги из списка
-        for i in reversed(range(self.scroll_layout.count())):
-            widget = self.scroll_layout.itemAt(i).widget()
-            if widget:
-                widget.setParent(None)
+    def run_search(self):
+        """Выполняем поиск и показываем первую страницу результатов"""
+        self.search_results.clear()
+        self.load_more_results()
+        self.search_results.show()
+
+    def load_more_results(self):
+        """Догружаем следующую страницу результатов поиска"""
+        results = self.db.search(
+            self.user_id,
+            self.search_edit.text(),
+            limit=self.search_page_size,
+            offset=self.search_results.count()
+        )
+        kind_names = {'book': "Книга", 'category': "Категория", 'wishlist': "Вишлист"}
+        for result in results:
+            text = f"{kind_names[result['kind']]}: {result['title']}"
+            if result['author']:
+                text += f" — {result['author']}"
+            if result['snippet']:
+                text += f"\n{result['snippet']}"
+            item = QListWidgetItem(text)
+            item.setData(Qt.UserRole, result)
+            self.search_results.addItem(item)
+        self.more_results_button.setVisible(len(results) == self.search_page_size)
+
+    def open_search_result(self, item):
+        """Открываем найденную книгу"""
+        result = item.data(Qt.UserRole)
+        if result['kind'] != 'book':
+            return
+        book = self.db.get_book(result['item_id'])
+        if book:
+            self.show_pdf_window(book['file_path'])
 
     def open_pdf(self):
         # Показываем диалог выбора файла
         options = QFileDialog.Options()
         filepath, _ = QFileDialog.getOpenFileName(self, "Открыть PDF файл", "", "PDF Files (*.pdf);;All Files (*)", options=options)
         if filepath:
-            # Открываем выбранный PDF-файл
-            import fitz
-            doc = fitz.open(filepath)
-
-            # Получаем название книги из метаданных или используем имя файла
-            title = doc.metadata.get("title", os.path.splitext(os.path.basename(filepath))[0])
-
-            # Создаем папку для новой книги
-            self.db.cursor.execute("SELECT MAX(book_id) FROM books")
-            max_id = self.db.cursor.fetchone()[0]
-            book_id = (max_id or 0) + 1
-            folder_path = create_folder_for_book(book_id)
-
-            # Сохраняем первую страницу как временную обложку
-            temp_cover_path = os.path.join(folder_path, "cover.png")
-            save_first_page_as_cover(doc, folder_path)
-
-            # Показываем окно для ввода информации о книге
-            dialog = BookMetadataDialog(self.db, self.user_id, title, temp_cover_path)
-            if dialog.exec_() == QDialog.Accepted:
-                # Получаем введенные данные
-                metadata = dialog.get_data()
-                
-                # Если пользователь выбрал свою обложку, копируем её
-                cover_path = temp_cover_path
-                if metadata['custom_cover_path']:
-                    cover_path = os.path.join(folder_path, "cover" + os.path.splitext(metadata['custom_cover_path'])[1])
-                    shutil.copy2(metadata['custom_cover_path'], cover_path)
-
-                # Сохраняем все страницы книги
-                save_all_pages(doc, folder_path)
-
-                # Сохраняем информацию о книге в базе данных
-                if self.db.add_book(
-                    metadata['title'],
-                    metadata['author'],
-                    metadata['publication_year'],
-                    filepath,
-                    cover_path,
-                    metadata['category_id'],
-                    self.user_id
-                ):
-                    # Обновляем список книг и открываем новую книгу
-                    self.clear_history()
-                    self.load_history()
-                    self.show_pdf_window(filepath)
-                else:
-                    QMessageBox.warning(self, "Предупреждение", "Эта книга уже есть в вашей библиотеке.")
-            else:
-                # Если пользователь передумал, удаляем временные файлы
-                if os.path.exists(folder_path):
-                    shutil.rmtree(folder_path)
+            # Импортируем книгу в фоне, чтобы окно не зависало на больших PDF
+            job = ImportJob(self.user_id, filepath)
+            job.signals.prepared.connect(lambda info: self.on_import_prepared(job, info))
+            job.signals.finished.connect(lambda book: self.on_import_finished(job, book))
+            job.signals.duplicate.connect(lambda _: self.on_import_duplicate(job))
+            self.start_import(job, os.path.basename(filepath))
+
+    def import_folder(self):
+        # Импортируем все PDF из выбранной папки и её подпапок
+        folder = QFileDialog.getExistingDirectory(self, "Выберите папку с книгами")
+        if folder:
+            job = FolderImportJob(self.user_id, folder)
+            job.signals.finished.connect(lambda result: self.on_folder_import_finished(job, result))
+            self.start_import(job, os.path.basename(folder))
+
+    def start_import(self, job, title):
+        """Показываем прогресс задания импорта и запускаем его"""
+        progress = QProgressDialog("Импорт книг...", "Отмена", 0, 100, self)
+        progress.setWindowTitle(title)
+        progress.setWindowModality(Qt.NonModal)
+        progress.setMinimumDuration(0)
+        progress.setAutoClose(False)
+        progress.canceled.connect(job.cancel)
+        self.import_jobs[job] = progress
+
+        job.signals.progress.connect(lambda value, stage: self.on_import_progress(job, value, stage))
+        job.signals.failed.connect(lambda error: self.on_import_failed(job, error))
+        job.signals.cancelled.connect(lambda: self.close_import(job))
+        job.start()
+
+    def on_import_progress(self, job, value, stage):
+        progress = self.import_jobs.get(job)
+        if progress:
+            progress.setLabelText(stage)
+            progress.setValue(value)
+
+    def on_import_prepared(self, job, info):
+        # Показываем окно для ввода информации о книге, пока текст извлекается в фоне
+        dialog = BookMetadataDialog(self.db, self.user_id, info['title'], info['cover_path'])
+        if dialog.exec_() == QDialog.Accepted:
+            job.commit(dialog.get_data())
+        else:
+            # Если пользователь передумал, временные файлы удалит задание
+            job.cancel()
+
+    def on_import_finished(self, job, book):
+        self.close_import(job)
+        # Карточка новой книги появится сама по событию базы, открываем книгу
+        self.show_pdf_window(book['file_path'])
+
+    def on_folder_import_finished(self, job, result):
+        self.close_import(job)
+        QMessageBox.information(
+            self, "Импорт завершен",
+            f"Добавлено книг: {result['added']}\n"
+            f"Уже были в библиотеке: {result['skipped']}\n"
+            f"Не удалось прочитать: {result['errors']}"
+        )
+
+    def on_import_duplicate(self, job):
+        self.close_import(job)
+        QMessageBox.warning(self, "Предупреждение", "Эта книга уже есть в вашей библиотеке.")
+
+    def on_import_failed(self, job, error):
+        self.close_import(job)
+        QMessageBox.critical(self, "Ошибка", f"Не удалось импортировать книгу: {error}")
+
+    def cancel_imports(self):
+        for job in list(self.import_jobs):
+            job.cancel()
+
+    def close_import(self, job):
+        progress = self.import_jobs.pop(job, None)
+        if progress:
+            progress.canceled.disconnect(job.cancel)
+            progress.close()
 
     def get_book_data(self, file_path):
         """Получаем информацию о книге из базы данных"""
-        self.db.cursor.execute("""
-            SELECT b.book_id, b.title, b.author, b.publication_year, b.file_path, b.cover_path,
-                   b.category_id, c.category_name 
-            FROM books b
-            LEFT JOIN categories c ON b.category_id = c.category_id
-            WHERE b.file_path = ? AND b.user_id = ?
-        """, (file_path, self.user_id))
-        row = self.db.cursor.fetchone()
-        if row:
-            # Преобразуем данные в словарь для удобства
-            return dict(zip([col[0] for col in self.db.cursor.description], row))
-        return None
+        row = self.db.get_book_by_path(self.user_id, file_path)
+        # Преобразуем данные в словарь для удобства
+        return dict(row) if row else None
 
     def show_pdf_window(self, filepath):
         # Получаем информацию о книге
@@ -243,37 +501,29 @@ class PDFViewer(QMainWindow):
             metadata = dialog.get_data()
             
             # Если пользователь выбрал новую обложку
+            new_cover_path = None
             if metadata['custom_cover_path']:
-                # Получаем путь к папке из пути к обложке
-                folder_path = os.path.dirname(book_data['cover_path'])
+                # Получаем путь к папке из пути к обложке; у книг из папки
+                # обложки может не быть (импорт без обложек или ошибка отрисовки)
+                if book_data['cover_path']:
+                    folder_path = os.path.dirname(book_data['cover_path'])
+                else:
+                    folder_path = create_folder_for_book(book_data['book_id'])
                 new_cover_path = os.path.join(
                     folder_path,
                     "cover" + os.path.splitext(metadata['custom_cover_path'])[1]
                 )
                 shutil.copy2(metadata['custom_cover_path'], new_cover_path)
-                # Обновляем путь к обложке в базе данных
-                self.db.cursor.execute(
-                    "UPDATE books SET cover_path = ? WHERE book_id = ?",
-                    (new_cover_path, book_data['book_id'])
-                )
 
-            # Обновляем информацию о книге в базе данных
-            self.db.cursor.execute("""
-                UPDATE books 
-                SET title = ?, author = ?, publication_year = ?, category_id = ?
-                WHERE book_id = ?
-            """, (
+            # Обновляем информацию о книге; карточка обновится по событию базы
+            self.db.update_book(
+                book_data['book_id'],
                 metadata['title'],
                 metadata['author'],
                 metadata['publication_year'],
                 metadata['category_id'],
-                book_data['book_id']
-            ))
-            self.db.conn.commit()
-
-            # Обновляем список книг
-            self.clear_history()
-            self.load_history()
+                new_cover_path
+            )
 
             # Открываем PDF только если была нажата кнопка "Читать"
             if metadata['should_open_book']:
@@ -288,17 +538,14 @@ class PDFViewer(QMainWindow):
                     background-color: #2b2b2b;
                     color: #ffffff;
                 }
-                QWidget[class="book-widget"] {
+                QListView#library::item {
                     background-color: #363636;
                     border: 1px solid #404040;
                     border-radius: 5px;
                 }
-                QWidget[class="book-widget"]:hover {
+                QListView#library::item:hover {
                     background-color: #404040;
                 }
-                QWidget[class="book-widget"] QLabel {
-                    color: #ffffff;
-                }
             """)
         else:
             self.setStyleSheet("""
@@ -306,18 +553,137 @@ class PDFViewer(QMainWindow):
                     background-color: #f0f0f0;
                     color: #000000;
                 }
-                QWidget[class="book-widget"] {
+                QListView#library::item {
                     background-color: #ffffff;
                     border: 1px solid #dddddd;
                     border-radius: 5px;
                 }
-                QWidget[class="book-widget"]:hover {
+                QListView#library::item:hover {
                     background-color: #f8f8f8;
                 }
             """)
 
 
+class PageRenderer(QObject):
+    """Рисует страницы PDF в фоновом потоке"""
+    page_rendered = pyqtSignal(int, QImage)  # Номер страницы и готовое изображение
+    pages_failed = pyqtSignal(list)  # Страницы, которые не удалось нарисовать
+
+    def __init__(self, filepath):
+        super().__init__()
+        self.filepath = filepath
+        self.wanted = set()  # Страницы, которые сейчас нужны окну просмотра
+        self.lock = threading.Lock()
+
+    def set_wanted(self, pages):
+        """Обновляем набор нужных страниц (вызывается из потока интерфейса)"""
+        with self.lock:
+            self.wanted = set(pages)
+
+    def is_wanted(self, page_num):
+        with self.lock:
+            return page_num in self.wanted
+
+    @pyqtSlot(list)
+    def render(self, page_numbers):
+        # Пропускаем страницы, которые пользователь уже пролистал
+        page_numbers = [page_num for page_num in page_numbers if self.is_wanted(page_num)]
+        pending = set(page_numbers)
+        page_cache = get_page_cache()
+        try:
+            # Уже отрисованные страницы берем из кэша
+            missing = []
+            for page_num in page_numbers:
+                path = page_cache.lookup(self.filepath, page_num)
+                if path is None:
+                    missing.append(page_num)
+                else:
+                    pending.discard(page_num)
+                    self.page_rendered.emit(page_num, QImage(path))
+
+            # Остальные рисуем параллельно в процессах движка рендеринга
+            for page in get_render_engine().render(self.filepath, missing, dpi=page_cache.dpi):
+                samples = page.take_samples()
+                pending.discard(page.page_num)
+                # Сначала показываем страницу, а потом уже кодируем её в кэш
+                if self.is_wanted(page.page_num):
+                    image = samples_to_qimage(samples, page.width, page.height, page.stride,
+                                              detach=True)
+                    self.page_rendered.emit(page.page_num, image)
+                try:
+                    page_cache.store(self.filepath, page.page_num, page.width, page.height, samples)
+                except Exception as e:
+                    print(f"Ошибка при сохранении страницы {page.page_num} в кэш: {e}")
+        except Exception as e:
+            print(f"Ошибка при отрисовке страниц: {e}")
+        if pending:
+            # Окно снова запросит эти страницы при следующей прокрутке
+            self.pages_failed.emit(sorted(pending))
+
+
+class PageCanvas(QWidget):
+    """Холст со всеми страницами книги, который рисует только видимые.
+
+    Все страницы занимают слоты одинакового размера (по первой странице),
+    поэтому положение любой страницы вычисляется сразу, без загрузки документа.
+    """
+
+    def __init__(self, page_count, page_size, spacing=10):
+        super().__init__()
+        self.page_count = page_count
+        self.page_size = page_size
+        self.spacing = spacing
+        self.pixmaps = {}  # Номер страницы -> QPixmap, только для страниц рядом с экраном
+        self.setMinimumSize(
+            page_size.width() + 2 * spacing,
+            page_count * (page_size.height() + spacing) + spacing
+        )
+
+    def page_rect(self, page_num):
+        x = (self.width() - self.page_size.width()) // 2
+        y = self.spacing + page_num * (self.page_size.height() + self.spacing)
+        return QRect(x, y, self.page_size.width(), self.page_size.height())
+
+    def pages_in_range(self, top, bottom):
+        """Номера страниц, попадающих в вертикальный диапазон холста"""
+        step = self.page_size.height() + self.spacing
+        first = max(0, top // step)
+        last = min(self.page_count - 1, bottom // step)
+        return range(first, last + 1)
+
+    def set_page(self, page_num, pixmap):
+        self.pixmaps[page_num] = pixmap
+        self.update(self.page_rect(page_num))
+
+    def keep_pages(self, pages):
+        """Освобождаем изображения страниц за пределами окна предзагрузки"""
+        for page_num in list(self.pixmaps):
+            if page_num not in pages:
+                del self.pixmaps[page_num]
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        area = event.rect()
+        for page_num in self.pages_in_range(area.top(), area.bottom()):
+            rect = self.page_rect(page_num)
+            pixmap = self.pixmaps.get(page_num)
+            if pixmap is None:
+                # Заглушка нужного размера, пока страница рисуется
+                painter.fillRect(rect, QColor("#e0e0e0"))
+                painter.drawText(rect, Qt.AlignCenter, f"Страница {page_num + 1}")
+            else:
+                scaled = pixmap.size().scaled(rect.size(), Qt.KeepAspectRatio)
+                target = QRect(0, 0, scaled.width(), scaled.height())
+                target.moveCenter(rect.center())
+                painter.fillRect(rect, QColor("#ffffff"))
+                painter.drawPixmap(target, pixmap)
+        painter.end()
+
+
 class PDFWindow(QDialog):
+    render_requested = pyqtSignal(list)  # Просим фоновый поток нарисовать страницы
+    prefetch_pages = 3  # Сколько страниц держим готовыми выше и ниже экрана
+
     def __init__(self, filepath):
         super().__init__()
         self.setWindowTitle("PDF Viewer")
@@ -330,16 +696,13 @@ class PDFWindow(QDialog):
         self.scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
         self.scroll_area.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
 
-        # Создаем виджет для содержимого
-        self.content_widget = QWidget()
-        self.layout = QVBoxLayout(self.content_widget)
+        self.canvas = None
+        self.thread = None
+        self.requested = set()  # Страницы, отправленные на отрисовку
 
         # Загружаем PDF
         self.load_pdf(filepath)
 
-        # Устанавливаем виджет с контентом в область прокрутки
-        self.scroll_area.setWidget(self.content_widget)
-
         # Создаем главный layout и добавляем в него область прокрутки
         main_layout = QVBoxLayout(self)
         main_layout.setContentsMargins(0, 0, 0, 0)
@@ -348,23 +711,67 @@ class PDFWindow(QDialog):
     def load_pdf(self, filepath):
         try:
             import fitz
-            doc = fitz.open(filepath)
-
-            # Отображение всех страниц
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                pix = page.get_pixmap()
-
-                # Временно сохраняем изображение в памяти
-                img_bytes = pix.tobytes()
-                from PyQt5.QtGui import QPixmap
-                pixmap = QPixmap()
-                pixmap.loadFromData(img_bytes)
-
-                image_label = QLabel()
-                image_label.setPixmap(pixmap)
-                image_label.setAlignment(Qt.AlignCenter)
-                self.layout.addWidget(image_label)
-
+            # Читаем только число страниц и размер первой, сами страницы рисуются позже
+            with fitz.open(filepath) as doc:
+                page_count = len(doc)
+                first_page = doc.load_page(0).rect
         except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось открыть файл: {str(e)}")
\ No newline at end of file
+            QMessageBox.critical(self, "Ошибка", f"Не удалось открыть файл: {str(e)}")
+            return
+
+        # Размер слота страницы в пикселях при DPI кэша страниц
+        scale = get_page_cache().dpi / 72
+        page_size = QSize(int(first_page.width * scale), int(first_page.height * scale))
+        self.canvas = PageCanvas(page_count, page_size)
+        self.scroll_area.setWidget(self.canvas)
+
+        # Запускаем отрисовку страниц в отдельном потоке
+        self.thread = QThread()
+        self.renderer = PageRenderer(filepath)
+        self.renderer.moveToThread(self.thread)
+        self.render_requested.connect(self.renderer.render)
+        self.renderer.page_rendered.connect(self.on_page_rendered)
+        self.renderer.pages_failed.connect(self.on_pages_failed)
+        self.thread.start()
+
+        self.scroll_area.verticalScrollBar().valueChanged.connect(self.update_visible_pages)
+        QTimer.singleShot(0, self.update_visible_pages)
+
+    def update_visible_pages(self):
+        """Запрашиваем видимые страницы и страницы рядом с ними"""
+        top = self.scroll_area.verticalScrollBar().value()
+        bottom = top + self.scroll_area.viewport().height()
+        visible = self.canvas.pages_in_range(top, bottom)
+        first = max(0, visible.start - self.prefetch_pages)
+        last = min(self.canvas.page_count, visible.stop + self.prefetch_pages)
+        # Сначала видимые страницы, затем страницы для предзагрузки
+        wanted = list(visible) + [p for p in range(first, last) if p not in visible]
+
+        self.renderer.set_wanted(wanted)
+        self.canvas.keep_pages(wanted)
+        self.requested &= set(wanted)
+        missing = [
+            page_num for page_num in wanted
+            if page_num not in self.canvas.pixmaps and page_num not in self.requested
+        ]
+        if missing:
+            self.requested.update(missing)
+            self.render_requested.emit(missing)
+
+    def on_page_rendered(self, page_num, image):
+        if page_num not in self.requested:
+            return  # Страница уже ушла за пределы окна предзагрузки
+        self.requested.discard(page_num)
+        self.canvas.set_page(page_num, QPixmap.fromImage(image))
+
+    def on_pages_failed(self, page_numbers):
+        self.requested.difference_update(page_numbers)
+
+    def done(self, result):
+        # Останавливаем фоновый поток при закрытии окна
+        if self.thread is not None:
+            self.renderer.set_wanted([])
+            self.thread.quit()
+            self.thread.wait()
+            self.thread = None
+        super().done(result)
\ No newline at end of file
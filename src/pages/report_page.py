@@ -1,13 +1,140 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, 
     QComboBox, QDateEdit, QFileDialog, QMessageBox, QScrollArea,
-    QTextEdit
+    QProgressBar, QTabWidget, QTableView, QHeaderView, QApplication
 )
-from PyQt5.QtCore import Qt, QDate
-import pandas as pd
+from PyQt5.QtCore import (
+    Qt, QDate, QAbstractTableModel, QModelIndex, QObject, QRunnable, QThreadPool, pyqtSignal
+)
+from core.report_writer import ReportSection, REPORT_FORMATS
+from core.report_jobs import ReportJob
 from datetime import datetime
 import os
-import sqlite3
+
+# Столбцы разделов отчета
+BOOK_HEADERS = [
+    'Имя пользователя',
+    'Название книги',
+    'Автор',
+    'Год публикации',
+    'Категория',
+    'Описание категории',
+    'Дата добавления'
+]
+WISHLIST_HEADERS = [
+    'Имя пользователя',
+    'Название книги',
+    'Автор',
+    'Дата добавления'
+]
+CATEGORY_HEADERS = [
+    'Имя пользователя',
+    'Название категории',
+    'Описание категории',
+    'Дата создания'
+]
+
+# Шаги группировки аналитики: подпись -> ключ периода в базе
+ANALYTICS_PERIODS = [("По дням", "day"), ("По неделям", "week"), ("По месяцам", "month")]
+# Шаги гистограммы годов издания: подпись -> ширина интервала в годах
+YEAR_BUCKETS = [("По годам", 1), ("По десятилетиям", 10)]
+
+
+class _PageSignals(QObject):
+    """Сигналы загрузки страницы (QRunnable сам не может их иметь)"""
+    loaded = pyqtSignal(object)  # Строки страницы или None при ошибке
+
+
+class _PageLoader(QRunnable):
+    """Читает страницу предпросмотра в потоке из QThreadPool"""
+
+    def __init__(self, fetch_page, limit, after, signals):
+        super().__init__()
+        self.fetch_page = fetch_page
+        self.limit = limit
+        self.after = after
+        # Сигналы живут, пока живет задание, даже если модель уже удалена
+        self.signals = signals
+
+    def run(self):
+        try:
+            rows = [tuple(row) for row in self.fetch_page(self.limit, self.after)]
+        except Exception as e:
+            print(f"Ошибка при загрузке предпросмотра отчета: {e}")
+            rows = None
+        self.signals.loaded.emit(rows)
+
+
+class ReportTableModel(QAbstractTableModel):
+    """Строки раздела отчета для предпросмотра в QTableView.
+
+    Строки подгружаются страницами через fetch_page(limit, after), когда
+    представление доходит до конца уже загруженных (fetchMore). Запросы
+    идут в QThreadPool, а after — ключ последней загруженной строки
+    (см. DatabaseManager.report_page), поэтому следующая страница
+    читается с нужного места индекса, а не через OFFSET.
+    """
+
+    page_loaded = pyqtSignal(int)  # Сколько строк загружено всего
+
+    def __init__(self, headers, fetch_page, page_size=200, parent=None):
+        super().__init__(parent)
+        self.headers = headers
+        self.fetch_page = fetch_page
+        self.page_size = page_size
+        self.rows = []
+        self.after = ()
+        self.has_more = True
+        self.loading = False
+        self.signals = _PageSignals()
+        self.signals.loaded.connect(self.on_page_loaded, Qt.QueuedConnection)
+        self.fetchMore()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.ToolTipRole):
+            return None
+        value = self.rows[index.row()][index.column()]
+        return "" if value is None else str(value)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.headers[section]
+        return str(section + 1)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.has_more and not self.loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        self.loading = True
+        QThreadPool.globalInstance().start(_PageLoader(self.fetch_page, self.page_size, self.after, self.signals))
+
+    def on_page_loaded(self, rows):
+        self.loading = False
+        if rows is None:
+            self.has_more = False
+            rows = []
+        else:
+            self.has_more = len(rows) == self.page_size
+        if rows:
+            # Последние столбцы строки — ключ для следующей страницы
+            columns = len(self.headers)
+            self.after = rows[-1][columns:]
+            first = len(self.rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+            self.rows.extend(row[:columns] for row in rows)
+            self.endInsertRows()
+        self.page_loaded.emit(len(self.rows))
+
 
 class ReportPage(QWidget):
     def __init__(self, user_id, db_manager):
@@ -140,6 +267,45 @@ class ReportPage(QWidget):
         
         layout.addWidget(category_group)
 
+        # Секция аналитики: сводные таблицы считаются в базе группировкой
+        analytics_group = QWidget()
+        analytics_group.setObjectName("analyticsGroup")
+        analytics_layout = QVBoxLayout(analytics_group)
+        analytics_layout.setSpacing(15)
+
+        analytics_title = QLabel("Аналитика")
+        analytics_title.setObjectName("sectionTitle")
+        analytics_layout.addWidget(analytics_title)
+
+        analytics_period_label = QLabel("Группировать добавление книг:")
+        analytics_period_label.setObjectName("fieldLabel")
+        analytics_layout.addWidget(analytics_period_label)
+
+        self.analytics_period_combo = QComboBox()
+        self.analytics_period_combo.setMinimumHeight(40)
+        for label, period in ANALYTICS_PERIODS:
+            self.analytics_period_combo.addItem(label, period)
+        self.analytics_period_combo.setCurrentIndex(len(ANALYTICS_PERIODS) - 1)
+        analytics_layout.addWidget(self.analytics_period_combo)
+
+        year_bucket_label = QLabel("Годы издания:")
+        year_bucket_label.setObjectName("fieldLabel")
+        analytics_layout.addWidget(year_bucket_label)
+
+        self.year_bucket_combo = QComboBox()
+        self.year_bucket_combo.setMinimumHeight(40)
+        for label, bucket in YEAR_BUCKETS:
+            self.year_bucket_combo.addItem(label, bucket)
+        analytics_layout.addWidget(self.year_bucket_combo)
+
+        create_analytics_report_btn = QPushButton("Создать аналитический отчет")
+        create_analytics_report_btn.setObjectName("reportButton")
+        create_analytics_report_btn.setMinimumHeight(50)
+        create_analytics_report_btn.clicked.connect(self.create_analytics_report)
+        analytics_layout.addWidget(create_analytics_report_btn)
+
+        layout.addWidget(analytics_group)
+
         # Кнопка создания общего отчета
         create_full_report_btn = QPushButton("Создать полный отчет")
         create_full_report_btn.setObjectName("fullReportButton")
@@ -177,12 +343,45 @@ class ReportPage(QWidget):
         
         layout.addWidget(self.sort_group)
 
-        # Добавляем текстовую область для отображения отчета
-        self.report_text = QTextEdit()
-        self.report_text.setReadOnly(True)
-        self.report_text.setMinimumHeight(300)
-        self.report_text.setObjectName("reportText")
-        layout.addWidget(self.report_text)
+        # Прогресс создания отчета (отчет создается в фоне)
+        self.progress_widget = QWidget()
+        progress_layout = QHBoxLayout(self.progress_widget)
+        progress_layout.setContentsMargins(0, 0, 0, 0)
+        self.progress_label = QLabel()
+        self.progress_label.setObjectName("fieldLabel")
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.cancel_report_btn = QPushButton("Отмена")
+        self.cancel_report_btn.setObjectName("sortButton")
+        self.cancel_report_btn.clicked.connect(self.cancel_report)
+        progress_layout.addWidget(self.progress_label, 1)
+        progress_layout.addWidget(self.progress_bar, 2)
+        progress_layout.addWidget(self.cancel_report_btn)
+        self.progress_widget.hide()
+        layout.addWidget(self.progress_widget)
+
+        # Сообщение о результате последнего отчета
+        self.status_label = QLabel()
+        self.status_label.setObjectName("fieldLabel")
+        self.status_label.setWordWrap(True)
+        self.status_label.hide()
+        layout.addWidget(self.status_label)
+
+        # Пока отчет создается, новые не запускаем
+        self.report_buttons = [
+            create_period_report_btn, create_category_report_btn,
+            create_analytics_report_btn, create_full_report_btn
+        ]
+        self.report_job = None
+        self.preview_models = []  # Модели предпросмотра по порядку разделов
+        # При выходе отменяем отчет, чтобы main дождался удаления недописанного файла
+        QApplication.instance().aboutToQuit.connect(self.cancel_report)
+
+        # Предпросмотр отчета: по вкладке на раздел, строки подгружаются при прокрутке
+        self.preview_tabs = QTabWidget()
+        self.preview_tabs.setMinimumHeight(300)
+        self.preview_tabs.setObjectName("reportPreview")
+        layout.addWidget(self.preview_tabs)
 
         # Устанавливаем виджет с контентом в область прокрутки
         scroll_area.setWidget(content_widget)
@@ -204,201 +403,198 @@ class ReportPage(QWidget):
 
     def create_period_report(self):
         """Создание отчета за выбранный период"""
-        try:
-            start_date = self.start_date.date().toPyDate()
-            end_date = self.end_date.date().toPyDate()
-            
-            # Получаем данные из базы
-            books_data = self.db_manager.get_books_by_period(self.user_id, start_date, end_date)
-            wishlist_data = self.db_manager.get_wishlist_by_period(self.user_id, start_date, end_date)
-            categories_data = self.db_manager.get_categories_by_period(self.user_id, start_date, end_date)
-            
-            # Применяем выбранную сортировку
-            sort_type = self.sort_type_combo.currentData()
-            books_data, wishlist_data, categories_data = self.apply_sort_to_data(
-                books_data, wishlist_data, categories_data, sort_type
-            )
-            
-            # Создаем отчет
-            self.generate_report(books_data, wishlist_data, categories_data, f"report_period_{start_date}_{end_date}")
-        except Exception as e:
-            QMessageBox.warning(self, "Ошибка", f"Не удалось создать отчет: {str(e)}")
+        start_date = self.start_date.date().toPyDate()
+        end_date = self.end_date.date().toPyDate()
+        sort_type = self.sort_type_combo.currentData()
+        user_id = self.user_id
+
+        # Разделы отчета: строки берутся из базы уже отсортированными выбранным способом
+        sections = [
+            ('Книги', BOOK_HEADERS, lambda db, **rows: db.get_books_by_period(
+                user_id, start_date, end_date, sort_type, **rows)),
+            ('Вишлист', WISHLIST_HEADERS, lambda db, **rows: db.get_wishlist_by_period(
+                user_id, start_date, end_date, sort_type, **rows)),
+            ('Категории', CATEGORY_HEADERS, lambda db, **rows: db.get_categories_by_period(
+                user_id, start_date, end_date, sort_type, **rows)),
+        ]
+        self.generate_report(sections, f"report_period_{start_date}_{end_date}")
 
     def create_category_report(self):
         """Создание отчета по выбранной категории"""
-        try:
-            category_id = self.category_combo.currentData()
-            category_name = self.category_combo.currentText()
-            
-            # Получаем данные из базы
-            books_data = self.db_manager.get_books_by_category(self.user_id, category_id)
-            
-            # Применяем выбранную сортировку
-            sort_type = self.sort_type_combo.currentData()
-            books_data, _, _ = self.apply_sort_to_data(books_data, None, None, sort_type)
-            
-            # Создаем отчет
-            self.generate_report(books_data, None, None, f"report_category_{category_name}")
-        except Exception as e:
-            QMessageBox.warning(self, "Ошибка", f"Не удалось создать отчет: {str(e)}")
+        category_id = self.category_combo.currentData()
+        category_name = self.category_combo.currentText()
+        sort_type = self.sort_type_combo.currentData()
+        user_id = self.user_id
+
+        sections = [
+            ('Книги', BOOK_HEADERS, lambda db, **rows: db.get_books_by_category(
+                user_id, category_id, sort_type, **rows)),
+        ]
+        self.generate_report(sections, f"report_category_{category_name}")
 
     def create_full_report(self):
         """Создание полного отчета"""
-        try:
-            # Получаем все данные из базы
-            books_data = self.db_manager.get_all_user_books(self.user_id)
-            wishlist_data = self.db_manager.get_all_user_wishlist(self.user_id)
-            categories_data = self.db_manager.get_all_user_categories(self.user_id)
-            
-            # Применяем выбранную сортировку
-            sort_type = self.sort_type_combo.currentData()
-            books_data, wishlist_data, categories_data = self.apply_sort_to_data(
-                books_data, wishlist_data, categories_data, sort_type
-            )
-            
-            # Создаем отчет с отсортированными данными
-            self.generate_report(books_data, wishlist_data, categories_data, f"full_report_sorted_{sort_type}")
-            
-        except Exception as e:
-            QMessageBox.warning(self, "Ошибка", f"Не удалось создать отчет: {str(e)}")
-
-    def apply_sort_to_data(self, books_data, wishlist_data, categories_data, sort_type):
-        """Применяет сортировку к данным в зависимости от выбранного типа"""
-        if sort_type == "date":
-            # Сортировка по дате добавления
-            if books_data:
-                books_data = sorted(books_data, key=lambda x: x[3] if x[3] else "", reverse=True)
-            if wishlist_data:
-                wishlist_data = sorted(wishlist_data, key=lambda x: x[3] if x[3] else "", reverse=True)
-            if categories_data:
-                categories_data = sorted(categories_data, key=lambda x: x[3] if x[3] else "", reverse=True)
-        elif sort_type == "name":
-            # Сортировка по названию
-            if books_data:
-                books_data = sorted(books_data, key=lambda x: x[1].lower() if x[1] else "")
-            if wishlist_data:
-                wishlist_data = sorted(wishlist_data, key=lambda x: x[1].lower() if x[1] else "")
-            if categories_data:
-                categories_data = sorted(categories_data, key=lambda x: x[1].lower() if x[1] else "")
-        elif sort_type == "author":
-            # Сортировка по автору
-            if books_data:
-                books_data = sorted(books_data, key=lambda x: x[2].lower() if x[2] else "")
-            if wishlist_data:
-                wishlist_data = sorted(wishlist_data, key=lambda x: x[2].lower() if x[2] else "")
-            
-        return books_data, wishlist_data, categories_data
+        sort_type = self.sort_type_combo.currentData()
+        user_id = self.user_id
+
+        sections = [
+            ('Книги', BOOK_HEADERS, lambda db, **rows: db.get_all_user_books(user_id, sort_type, **rows)),
+            ('Вишлист', WISHLIST_HEADERS, lambda db, **rows: db.get_all_user_wishlist(user_id, sort_type, **rows)),
+            ('Категории', CATEGORY_HEADERS, lambda db, **rows: db.get_all_user_categories(user_id, sort_type, **rows)),
+        ]
+        self.generate_report(sections, f"full_report_sorted_{sort_type}")
+
+    def create_analytics_report(self):
+        """Создание аналитического отчета: сводные таблицы по книгам и вишлисту"""
+        period = self.analytics_period_combo.currentData()
+        bucket = self.year_bucket_combo.currentData()
+        user_id = self.user_id
+
+        # Неделя в отчете обозначается датой своего понедельника
+        period_header = 'Неделя с' if period == "week" else 'Период'
+
+        # Группировка и подсчет выполняются в SQLite, в отчет приходят только итоги
+        sections = [
+            ('Добавление книг', [period_header, 'Добавлено книг'], lambda db, **rows: db.get_books_added_stats(
+                user_id, period, **rows)),
+            ('Категории', ['Категория', 'Книг'], lambda db, **rows: db.get_category_stats(user_id, **rows)),
+            ('Авторы', ['Автор', 'Книг'], lambda db, **rows: db.get_author_stats(user_id, **rows)),
+            ('Годы издания', ['Год издания', 'Книг'], lambda db, **rows: db.get_publication_year_stats(
+                user_id, bucket, **rows)),
+            ('Рост вишлиста', [period_header, 'Добавлено', 'Всего в вишлисте'],
+             lambda db, **rows: db.get_wishlist_growth(user_id, period, **rows)),
+        ]
+        self.generate_report(sections, f"analytics_report_{period}")
 
     def apply_sorting(self):
         """Метод оставлен для обратной совместимости, но теперь не используется"""
         QMessageBox.information(self, "Информация", "Выберите тип сортировки и нажмите 'Создать полный отчет'")
 
-    def generate_report(self, books_data, wishlist_data, categories_data, filename):
-        """Генерация отчета в Excel и отображение на странице"""
-        try:
-            # Создаем Excel writer
-            file_path, _ = QFileDialog.getSaveFileName(
-                self, "Сохранить отчет", 
-                f"{filename}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-                "Excel files (*.xlsx)"
+    def generate_report(self, sections, filename):
+        """Спрашивает, куда сохранить отчет, показывает предпросмотр и создает файл в фоне.
+
+        sections — тройки (название, заголовки, query), где query(db, **rows)
+        вызывает метод отчета DatabaseManager с limit/after или stream.
+        """
+        if self.report_job is not None:
+            return
+
+        # Спрашиваем, куда и в каком формате сохранить отчет
+        filters = list(REPORT_FORMATS.values())
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self, "Сохранить отчет", 
+            f"{filename}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
+            ";;".join(filters)
+        )
+        
+        if not file_path:
+            return
+        # Если расширение не указано, берем его из выбранного фильтра
+        extension = os.path.splitext(file_path)[1].lstrip(".").lower()
+        if extension not in REPORT_FORMATS:
+            for fmt, name in REPORT_FORMATS.items():
+                if name == selected_filter:
+                    file_path = f"{file_path}.{fmt}"
+                    break
+
+        # Предпросмотр читает только первые страницы строк и загружается в фоне
+        self.show_preview(sections)
+
+        # Полные запросы и запись файла идут в фоне, окно остается отзывчивым
+        def build_sections(db):
+            return [ReportSection(name, headers, query(db, stream=True)) for name, headers, query in sections]
+
+        job = ReportJob(file_path, build_sections)
+        job.signals.progress.connect(self.on_report_progress)
+        job.signals.finished.connect(self.on_report_finished)
+        job.signals.failed.connect(self.on_report_failed)
+        job.signals.cancelled.connect(self.on_report_cancelled)
+        self.report_job = job
+        self.set_report_running(True)
+        self.on_report_progress(0, "Подготовка отчета")
+        job.start()
+
+    def show_preview(self, sections):
+        """Вкладка с таблицей для каждого непустого раздела отчета.
+
+        Первые страницы разделов загружаются в фоне; вкладка появляется,
+        когда у раздела пришли строки, на месте раздела в отчете.
+        """
+        for index in range(self.preview_tabs.count()):
+            self.preview_tabs.widget(index).deleteLater()
+        self.preview_tabs.clear()
+        for model in self.preview_models:
+            if model.rowCount() == 0:
+                # Модель без вкладки никому не принадлежит — удаляем сами
+                model.deleteLater()
+        self.preview_models = []
+        for name, headers, query in sections:
+            model = ReportTableModel(
+                headers,
+                lambda limit, after, query=query: query(self.db_manager, limit=limit, after=after),
+                parent=self
             )
-            
-            if not file_path:
-                return
-
-            # Подготавливаем текст для отображения
-            report_text = "=== ОТЧЕТ ===\n\n"
-
-            # Добавляем информацию о книгах
-            if books_data:
-                report_text += "=== КНИГИ ===\n"
-                for book in books_data:
-                    report_text += f"Название: {book[1]}\n"
-                    report_text += f"Автор: {book[2]}\n"
-                    report_text += f"Год публикации: {book[3]}\n"
-                    report_text += f"Категория: {book[4]}\n"
-                    report_text += f"Описание категории: {book[5]}\n"
-                    report_text += "-------------------\n"
-
-            # Добавляем информацию о вишлисте
-            if wishlist_data:
-                report_text += "\n=== ВИШЛИСТ ===\n"
-                for item in wishlist_data:
-                    report_text += f"Название: {item[1]}\n"
-                    report_text += f"Автор: {item[2]}\n"
-                    report_text += f"Дата добавления: {item[3]}\n"
-                    report_text += "-------------------\n"
-
-            # Добавляем информацию о категориях
-            if categories_data:
-                report_text += "\n=== КАТЕГОРИИ ===\n"
-                for category in categories_data:
-                    report_text += f"Название: {category[1]}\n"
-                    report_text += f"Описание: {category[2]}\n"
-                    report_text += f"Дата создания: {category[3]}\n"
-                    report_text += "-------------------\n"
-
-            # Отображаем отчет в текстовой области
-            self.report_text.setPlainText(report_text)
-
-            # Сохраняем в Excel
-            with pd.ExcelWriter(file_path, engine='xlsxwriter') as writer:
-                workbook = writer.book
-                header_format = workbook.add_format({
-                    'bold': True,
-                    'align': 'center',
-                    'valign': 'vcenter',
-                    'fg_color': '#D7E4BC',
-                    'border': 1
-                })
-
-                if books_data:
-                    df_books = pd.DataFrame(books_data)
-                    df_books.columns = [
-                        'Имя пользователя',
-                        'Название книги',
-                        'Автор',
-                        'Год публикации',
-                        'Категория',
-                        'Описание категории'
-                    ]
-                    df_books.to_excel(writer, sheet_name='Книги', index=False)
-                    worksheet = writer.sheets['Книги']
-                    for col_num, value in enumerate(df_books.columns.values):
-                        worksheet.write(0, col_num, value, header_format)
-                        worksheet.set_column(col_num, col_num, 20)
-
-                if wishlist_data:
-                    df_wishlist = pd.DataFrame(wishlist_data)
-                    df_wishlist.columns = [
-                        'Имя пользователя',
-                        'Название книги',
-                        'Автор',
-                        'Дата добавления'
-                    ]
-                    df_wishlist.to_excel(writer, sheet_name='Вишлист', index=False)
-                    worksheet = writer.sheets['Вишлист']
-                    for col_num, value in enumerate(df_wishlist.columns.values):
-                        worksheet.write(0, col_num, value, header_format)
-                        worksheet.set_column(col_num, col_num, 20)
-
-                if categories_data:
-                    df_categories = pd.DataFrame(categories_data)
-                    df_categories.columns = [
-                        'Имя пользователя',
-                        'Название категории',
-                        'Описание категории',
-                        'Дата создания'
-                    ]
-                    df_categories.to_excel(writer, sheet_name='Категории', index=False)
-                    worksheet = writer.sheets['Категории']
-                    for col_num, value in enumerate(df_categories.columns.values):
-                        worksheet.write(0, col_num, value, header_format)
-                        worksheet.set_column(col_num, col_num, 20)
-
-            QMessageBox.information(self, "Успех", "Отчет успешно создан!")
-        except Exception as e:
-            QMessageBox.warning(self, "Ошибка", f"Не удалось сгенерировать отчет: {str(e)}")
+            model.page_loaded.connect(
+                lambda rows, model=model, name=name: self.on_preview_loaded(model, name, rows)
+            )
+            self.preview_models.append(model)
+
+    def on_preview_loaded(self, model, name, rows):
+        if rows == 0 or model not in self.preview_models or model.parent() is not self:
+            return
+        view = QTableView()
+        view.setModel(model)
+        model.setParent(view)
+        view.setWordWrap(False)
+        # Строки одной высоты: таблице не нужно измерять каждую
+        view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        view.verticalHeader().setDefaultSectionSize(24)
+        view.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        view.horizontalHeader().setDefaultSectionSize(160)
+        view.horizontalHeader().setStretchLastSection(True)
+        # Вкладки идут в порядке разделов, даже если страницы пришли в другом
+        position = sum(1 for other in self.preview_models[:self.preview_models.index(model)]
+                       if other.parent() is not self)
+        self.preview_tabs.insertTab(position, view, name)
+
+    def set_report_running(self, running):
+        for button in self.report_buttons:
+            button.setEnabled(not running)
+        self.cancel_report_btn.setEnabled(running)
+        self.progress_widget.setVisible(running)
+        if running:
+            self.status_label.hide()
+
+    def cancel_report(self):
+        if self.report_job is not None:
+            self.cancel_report_btn.setEnabled(False)
+            self.progress_label.setText("Отмена...")
+            self.report_job.cancel()
+
+    def on_report_progress(self, value, stage):
+        self.progress_bar.setValue(value)
+        self.progress_label.setText(stage)
+
+    def on_report_finished(self, file_path, counts):
+        self.report_job = None
+        self.set_report_running(False)
+        rows = ", ".join(f"{name}: {count}" for name, count in counts.items())
+        self.show_status(f"Отчет успешно создан: {file_path}" + (f" ({rows})" if rows else ""))
+
+    def on_report_failed(self, error):
+        self.report_job = None
+        self.set_report_running(False)
+        self.show_status(f"Не удалось сгенерировать отчет: {error}")
+
+    def on_report_cancelled(self):
+        self.report_job = None
+        self.set_report_running(False)
+        self.show_status("Создание отчета отменено")
+
+    def show_status(self, text):
+        """Сообщение о результате без модального окна"""
+        self.status_label.setText(text)
+        self.status_label.show()
 
     def apply_theme(self, is_dark):
         """Применение темы к странице отчетов"""
@@ -571,7 +767,7 @@ class ReportPage(QWidget):
                 QCalendarWidget #qt_calendar_yearbutton {
                     color: white;
                 }
-                QWidget#periodGroup, QWidget#categoryGroup {
+                QWidget#periodGroup, QWidget#categoryGroup, QWidget#analyticsGroup {
                     background-color: #353535;
                     border-radius: 20px;
                     padding: 25px;
@@ -581,13 +777,11 @@ class ReportPage(QWidget):
                 QWidget#datesWidget {
                     background: transparent;
                 }
-                QTextEdit#reportText {
+                QTabWidget#reportPreview QTableView {
                     background-color: #2b2b2b;
                     color: #ffffff;
                     border: 1px solid #454545;
                     border-radius: 5px;
-                    padding: 10px;
-                    font-family: monospace;
                 }
             """
         else:
@@ -751,7 +945,7 @@ class ReportPage(QWidget):
                 QCalendarWidget #qt_calendar_yearbutton {
                     color: #2C3E50;
                 }
-                QWidget#periodGroup, QWidget#categoryGroup {
+                QWidget#periodGroup, QWidget#categoryGroup, QWidget#analyticsGroup {
                     background-color: #FFFFFF;
                     border-radius: 20px;
                     padding: 25px;
@@ -761,13 +955,11 @@ class ReportPage(QWidget):
                 QWidget#datesWidget {
                     background: transparent;
                 }
-                QTextEdit#reportText {
+                QTabWidget#reportPreview QTableView {
                     background-color: #ffffff;
                     color: #2C3E50;
                     border: 1px solid #BDBDBD;
                     border-radius: 5px;
-                    padding: 10px;
-                    font-family: monospace;
                 }
             """
         self.setStyleSheet(base_style) 
\ No newline at end of file
@@ -160,8 +160,7 @@ class SettingsPage(QWidget):
 
     def load_user_data(self):
         """Загружаем информацию о пользователе из базы данных"""
-        query = "SELECT user_name, email FROM users WHERE user_id = ?"
-        result = self.db.cursor.execute(query, (self.user_id,)).fetchone()
+        result = self.db.get_user(self.user_id)
         if result:
             self.name_edit.setText(result[0])
             self.email_edit.setText(result[1])
@@ -177,8 +176,8 @@ class SettingsPage(QWidget):
 
         try:
             query = "UPDATE users SET user_name = ?, email = ? WHERE user_id = ?"
-            self.db.cursor.execute(query, (new_name, new_email, self.user_id))
-            self.db.conn.commit()
+            with self.db.transaction() as cursor:
+                cursor.execute(query, (new_name, new_email, self.user_id))
             QMessageBox.information(self, "Успех", "Профиль успешно обновлен")
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Не удалось обновить профиль: {str(e)}")
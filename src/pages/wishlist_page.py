@@ -1,23 +1,209 @@
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QGridLayout, QScrollArea, QPushButton, QMessageBox
-from PyQt5.QtGui import QFont, QPixmap
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QLabel, QListView, QMessageBox, QStyledItemDelegate, QStyle,
+    QAbstractItemView, QApplication
+)
+from PyQt5.QtGui import QFont, QColor, QPalette, QCursor, QPainter
+from PyQt5.QtCore import Qt, QTimer, QRect, QSize, QEvent, pyqtSignal, QAbstractListModel, QModelIndex
 from core.database import DatabaseManager
+from core.db_events import get_db_events
+from core.cover_cache import get_cover_cache
+from collections import OrderedDict
 import os
 
+
+class WishlistModel(QAbstractListModel):
+    """Модель вишлиста для QListView.
+
+    Обложки (из интернета или с диска) берутся из общего кэша обложек
+    только для строк, которые представление рисует, и держатся в памяти
+    не больше max_covers штук.
+    """
+
+    BookRole = Qt.UserRole + 1  # Словарь с данными книги
+
+    def __init__(self, base_dir, parent=None, max_covers=120):
+        super().__init__(parent)
+        self.base_dir = base_dir
+        self.books = []
+        self.max_covers = max_covers
+        self.covers = OrderedDict()  # Адрес обложки -> QPixmap (None, если загрузить не удалось)
+        self.pending = OrderedDict()  # Обложки, которые нужно загрузить
+        self.loading = set()  # Обложки, которые сейчас скачиваются
+        self.cover_timer = QTimer(self)
+        self.cover_timer.setSingleShot(True)
+        self.cover_timer.timeout.connect(self.load_pending_covers)
+
+    def set_books(self, books):
+        self.beginResetModel()
+        self.books = list(books)
+        self.covers.clear()
+        self.pending.clear()
+        self.endResetModel()
+
+    def row_of(self, wishlist_id):
+        for row, book in enumerate(self.books):
+            if book['wishlist_id'] == wishlist_id:
+                return row
+        return None
+
+    def insert_book(self, book, row=0):
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.books.insert(row, book)
+        self.endInsertRows()
+
+    def remove_book(self, wishlist_id):
+        row = self.row_of(wishlist_id)
+        if row is not None:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self.books[row]
+            self.endRemoveRows()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.books)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        book = self.books[index.row()]
+        if role == Qt.DisplayRole:
+            return book['title']
+        if role == Qt.ToolTipRole:
+            return f"{book['title']} — {book['author']}" if book['author'] else book['title']
+        if role == Qt.DecorationRole:
+            return self.cover(book.get('cover_url'))
+        if role == self.BookRole:
+            return book
+        return None
+
+    def cover(self, cover_url):
+        """Обложка, если она уже загружена; иначе ставим её в очередь"""
+        if not cover_url:
+            return None
+        if cover_url in self.covers:
+            self.covers.move_to_end(cover_url)
+            return self.covers[cover_url]
+        if cover_url not in self.loading:
+            # Загружаем после отрисовки, чтобы не задерживать прокрутку
+            self.pending[cover_url] = None
+            self.cover_timer.start(0)
+        return None
+
+    def load_pending_covers(self):
+        cover_cache = get_cover_cache()
+        while self.pending:
+            cover_url, _ = self.pending.popitem(last=False)
+            self.loading.add(cover_url)
+            # Относительные пути считаем от папки приложения
+            path = cover_url
+            if not cover_url.startswith(('http://', 'https://')) and not os.path.isabs(cover_url):
+                path = os.path.join(self.base_dir, cover_url)
+            cover_cache.fetch(path, "grid", lambda pixmap, url=cover_url: self.set_cover(url, pixmap))
+
+    def set_cover(self, cover_url, pixmap):
+        self.loading.discard(cover_url)
+        self.covers[cover_url] = pixmap
+        # Вытесняем обложки, которые давно не показывались
+        while len(self.covers) > self.max_covers:
+            self.covers.popitem(last=False)
+        for row, book in enumerate(self.books):
+            if book.get('cover_url') == cover_url:
+                index = self.index(row)
+                self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+
+class WishlistDelegate(QStyledItemDelegate):
+    """Рисует карточку книги вишлиста с кнопкой удаления"""
+
+    delete_requested = pyqtSignal(dict)  # Книга, которую нужно убрать из вишлиста
+
+    card_size = QSize(250, 400)
+    cover_size = QSize(180, 270)
+    padding = 10
+
+    def sizeHint(self, option, index):
+        return self.card_size
+
+    def button_rect(self, rect):
+        """Положение кнопки «Удалить» внутри карточки"""
+        return QRect(rect.left() + 60, rect.bottom() - self.padding - 30, rect.width() - 120, 30)
+
+    def paint(self, painter, option, index):
+        widget = option.widget
+        style = widget.style() if widget else QApplication.style()
+        # Фон карточки рисует стиль, чтобы работали правила ::item из темы
+        style.drawPrimitive(QStyle.PE_PanelItemViewItem, option, painter, widget)
+
+        book = index.data(WishlistModel.BookRole)
+        rect = option.rect.adjusted(self.padding, self.padding, -self.padding, -self.padding)
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+
+        # Обложка по центру или заглушка, пока она загружается
+        cover_rect = QRect(0, 0, self.cover_size.width(), self.cover_size.height())
+        cover_rect.moveCenter(rect.center())
+        cover_rect.moveTop(rect.top())
+        pixmap = index.data(Qt.DecorationRole)
+        if pixmap is None:
+            painter.fillRect(cover_rect, QColor("#e0e0e0"))
+        else:
+            target = QRect(0, 0, pixmap.width(), pixmap.height())
+            target.moveCenter(cover_rect.center())
+            painter.drawPixmap(target, pixmap)
+
+        # Название, автор и ISBN
+        painter.setPen(option.palette.color(QPalette.Text))
+        font = QFont("Arial", 12, QFont.Bold)
+        painter.setFont(font)
+        text_rect = QRect(rect.left(), cover_rect.bottom() + 5, rect.width(), 40)
+        title = painter.fontMetrics().elidedText(book['title'], Qt.ElideRight, rect.width() * 2)
+        painter.drawText(text_rect, Qt.AlignHCenter | Qt.AlignTop | Qt.TextWordWrap, title)
+
+        painter.setFont(QFont("Arial", 10))
+        lines = []
+        if book['author']:
+            lines.append(f"Автор: {book['author']}")
+        if book['isbn']:
+            lines.append(f"ISBN: {book['isbn']}")
+        line_rect = QRect(rect.left(), text_rect.bottom(), rect.width(), 18)
+        for line in lines:
+            line = painter.fontMetrics().elidedText(line, Qt.ElideRight, rect.width())
+            painter.drawText(line_rect, Qt.AlignCenter, line)
+            line_rect.translate(0, 18)
+
+        # Кнопка удаления
+        button = self.button_rect(option.rect)
+        hovered = widget is not None and button.contains(widget.viewport().mapFromGlobal(QCursor.pos()))
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor("#c82333" if hovered else "#dc3545"))
+        painter.drawRoundedRect(button, 5, 5)
+        painter.setPen(QColor("white"))
+        painter.drawText(button, Qt.AlignCenter, "Удалить")
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseMove:
+            # Перерисовываем карточку, чтобы подсветить кнопку под курсором
+            if option.widget is not None:
+                option.widget.update(index)
+        elif (event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton
+                and self.button_rect(option.rect).contains(event.pos())):
+            self.delete_requested.emit(index.data(WishlistModel.BookRole))
+            return True
+        return super().editorEvent(event, model, option, index)
+
+
 class WishlistPage(QWidget):
     def __init__(self, user_id):
         super().__init__()
         self.user_id = user_id
         self.db = DatabaseManager("data/database.db")
         self.base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        
-        # Следим за тем, куда добавлять следующую книгу в сетке
-        self.row = 0
-        self.col = 0
-        self.cols_per_row = 4  # Сколько книг помещается в одну строку
-        
+
         self.setup_ui()
+        self.apply_theme(False)  # Карточки светлые, пока пользователь не выбрал тему
         self.load_wishlist()
+        # Дальше добавляем и убираем только измененные книги
+        get_db_events().changed.connect(self.on_db_changed)
 
     def setup_ui(self):
         layout = QVBoxLayout()
@@ -30,153 +216,64 @@ class WishlistPage(QWidget):
         title.setStyleSheet("margin-bottom: 20px;")
         layout.addWidget(title)
 
-        # Готовим область для прокрутки списка книг
-        self.scroll_area = QScrollArea()
-        self.scroll_content = QWidget()
-        self.grid_layout = QGridLayout(self.scroll_content)
-        self.grid_layout.setSpacing(20)
-        self.grid_layout.setContentsMargins(20, 20, 20, 20)
-        
-        # Настраиваем прокрутку
-        self.scroll_area.setWidget(self.scroll_content)
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        layout.addWidget(self.scroll_area)
+        self.empty_label = QLabel("Ваш вишлист пуст")
+        self.empty_label.setFont(QFont("Arial", 16))
+        self.empty_label.setAlignment(Qt.AlignCenter)
+        layout.addWidget(self.empty_label)
+
+        # Сетка книг: карточки рисует общий делегат только для видимых строк
+        self.model = WishlistModel(self.base_dir, self)
+        self.model.modelReset.connect(self.update_empty_state)
+        self.model.rowsInserted.connect(self.update_empty_state)
+        self.model.rowsRemoved.connect(self.update_empty_state)
+        self.delegate = WishlistDelegate(self)
+        self.delegate.delete_requested.connect(self.delete_book)
+
+        self.list_view = QListView()
+        self.list_view.setObjectName("wishlist")
+        self.list_view.setViewMode(QListView.IconMode)
+        self.list_view.setResizeMode(QListView.Adjust)
+        self.list_view.setMovement(QListView.Static)
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setSpacing(20)
+        self.list_view.setMouseTracking(True)
+        self.list_view.setSelectionMode(QAbstractItemView.NoSelection)
+        self.list_view.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.list_view.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.list_view.setItemDelegate(self.delegate)
+        self.list_view.setModel(self.model)
+        layout.addWidget(self.list_view)
 
     def load_wishlist(self):
-        # Убираем все книги, которые были показаны раньше
-        for i in reversed(range(self.grid_layout.count())): 
-            self.grid_layout.itemAt(i).widget().setParent(None)
-        
-        self.row = 0
-        self.col = 0
-        
         # Получаем список книг из вишлиста
-        wishlist_books = self.db.get_wishlist(self.user_id)
-        
-        if not wishlist_books:
-            empty_label = QLabel("Ваш вишлист пуст")
-            empty_label.setFont(QFont("Arial", 16))
-            empty_label.setAlignment(Qt.AlignCenter)
-            self.grid_layout.addWidget(empty_label, 0, 0)
-            return
-
-        for book in wishlist_books:
-            # Готовим виджет для каждой книги
-            book_widget = QWidget()
-            book_widget.setFixedSize(250, 400)
-            book_widget.setStyleSheet("""
-                QWidget {
-                    background-color: white;
-                    border-radius: 10px;
-                    padding: 10px;
-                }
-                QLabel {
-                    background-color: transparent;
-                }
-                QPushButton {
-                    background-color: #dc3545;
-                    color: white;
-                    border: none;
-                    padding: 5px 10px;
-                    border-radius: 5px;
-                    margin-top: 10px;
-                }
-                QPushButton:hover {
-                    background-color: #c82333;
-                }
-            """)
-            book_layout = QVBoxLayout(book_widget)
-
-            # Показываем обложку книги
-            cover_label = QLabel()
-            cover_label.setAlignment(Qt.AlignCenter)
-            # Загружаем картинку обложки, если она есть
-            if book.get('cover_url'):
-                pixmap = self.load_image(book['cover_url'])
-                if pixmap:
-                    cover_label.setPixmap(pixmap.scaled(180, 270, Qt.KeepAspectRatio, Qt.SmoothTransformation))
-            book_layout.addWidget(cover_label)
-
-            # Добавляем название книги
-            title_label = QLabel(book['title'])
-            title_label.setFont(QFont("Arial", 12, QFont.Bold))
-            title_label.setWordWrap(True)
-            title_label.setAlignment(Qt.AlignCenter)
-            book_layout.addWidget(title_label)
-
-            # Показываем автора книги
-            if book['author']:
-                author_label = QLabel(f"Автор: {book['author']}")
-                author_label.setFont(QFont("Arial", 10))
-                author_label.setWordWrap(True)
-                author_label.setAlignment(Qt.AlignCenter)
-                book_layout.addWidget(author_label)
-
-            # Добавляем ISBN, если он есть
-            if book['isbn']:
-                isbn_label = QLabel(f"ISBN: {book['isbn']}")
-                isbn_label.setFont(QFont("Arial", 10))
-                isbn_label.setAlignment(Qt.AlignCenter)
-                book_layout.addWidget(isbn_label)
-
-            # Добавляем кнопку для удаления книги
-            delete_button = QPushButton("Удалить")
-            delete_button.clicked.connect(lambda checked, b=book: self.delete_book(b))
-            book_layout.addWidget(delete_button)
-
-            # Размещаем книгу в сетке
-            self.grid_layout.addWidget(book_widget, self.row, self.col)
-            
-            # Переходим к следующей позиции
-            self.col += 1
-            if self.col >= self.cols_per_row:
-                self.col = 0
-                self.row += 1
+        self.model.set_books(self.db.get_wishlist(self.user_id))
+
+    def update_empty_state(self):
+        empty = self.model.rowCount() == 0
+        self.empty_label.setVisible(empty)
+        self.list_view.setVisible(not empty)
+
+    def on_db_changed(self, changes):
+        """Добавляем и убираем только измененные книги вишлиста"""
+        for change in changes:
+            if change.table != "wishlist":
+                continue
+            if change.action == "delete":
+                self.model.remove_book(change.row_id)
+            elif change.action == "insert":
+                book = self.db.get_wishlist_item(change.row_id)
+                if book and book['user_id'] == self.user_id:
+                    # Новые книги показываются первыми, как в get_wishlist
+                    self.model.insert_book(book)
 
     def delete_book(self, book):
         """Убираем книгу из вишлиста"""
         try:
             self.db.remove_from_wishlist(self.user_id, book['title'], book['author'])
             QMessageBox.information(self, "Успех", "Книга удалена из вишлиста")
-            self.load_wishlist()  # Обновляем список
         except Exception as e:
             QMessageBox.warning(self, "Ошибка", f"Не удалось удалить книгу: {str(e)}")
 
-    def load_image(self, img_url):
-        try:
-            # Если это ссылка в интернете
-            if img_url and (img_url.startswith('http://') or img_url.startswith('https://')):
-                from PIL import Image
-                from io import BytesIO
-                import requests
-
-                response = requests.get(img_url)
-                response.raise_for_status()
-
-                image_data = BytesIO(response.content)
-                image = Image.open(image_data)
-                image.thumbnail((200, 300))  # Уменьшаем размер картинки
-                image_data = BytesIO()
-                image.save(image_data, format="PNG")
-
-                pixmap = QPixmap()
-                pixmap.loadFromData(image_data.getvalue())
-                return pixmap
-            
-            # Если это путь к файлу на компьютере
-            if img_url and not os.path.isabs(img_url):
-                img_url = os.path.join(self.base_dir, img_url)
-            
-            if img_url and os.path.exists(img_url):
-                pixmap = QPixmap(img_url)
-                return pixmap
-            
-            return None
-        except Exception as e:
-            print(f"Ошибка при загрузке изображения: {e}")
-            return None
-
     def apply_theme(self, is_dark):
         """Меняем оформление страницы в зависимости от темы"""
         if is_dark:
@@ -185,24 +282,21 @@ class WishlistPage(QWidget):
                     background-color: #2b2b2b;
                     color: #ffffff;
                 }
-                QScrollArea {
+                QListView {
                     background-color: #2b2b2b;
                     border: none;
                 }
                 QLabel {
                     color: #ffffff;
                 }
-                QWidget[class="book-widget"] {
+                QListView#wishlist::item {
                     background-color: #363636;
                     border: 1px solid #404040;
-                    border-radius: 5px;
+                    border-radius: 10px;
                 }
-                QWidget[class="book-widget"]:hover {
+                QListView#wishlist::item:hover {
                     background-color: #404040;
                 }
-                QWidget[class="book-widget"] QLabel {
-                    color: #ffffff;
-                }
             """)
         else:
             self.setStyleSheet("""
@@ -210,19 +304,19 @@ class WishlistPage(QWidget):
                     background-color: #f0f0f0;
                     color: #000000;
                 }
-                QScrollArea {
+                QListView {
                     background-color: #f0f0f0;
                     border: none;
                 }
                 QLabel {
                     color: #000000;
                 }
-                QWidget[class="book-widget"] {
+                QListView#wishlist::item {
                     background-color: #ffffff;
                     border: 1px solid #dddddd;
-                    border-radius: 5px;
+                    border-radius: 10px;
                 }
-                QWidget[class="book-widget"]:hover {
+                QListView#wishlist::item:hover {
                     background-color: #f8f8f8;
                 }
-            """) 
\ No newline at end of file
+            """)
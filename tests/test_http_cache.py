@@ -0,0 +1,133 @@
+"""Проверка кэша страниц каталога на локальном HTTP-сервере вместо сайта"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+import aiohttp
+from aiohttp import web
+import pytest
+from core.http_cache import HttpCache
+from src.pages.all_books_page import BookLoader, HostRateLimiter
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = HttpCache(str(tmp_path / "http_cache.db"), ttl=60)
+    yield cache
+    cache.close()
+
+
+class StandInServer:
+    """Локальный сервер: отдает страницу с заданными ETag и Last-Modified и запоминает запросы"""
+
+    def __init__(self, body, etag, last_modified):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.requests = []  # Заголовки каждого полученного запроса
+
+    async def handle(self, request):
+        self.requests.append(dict(request.headers))
+        headers = {"ETag": self.etag, "Last-Modified": self.last_modified}
+        if request.headers.get("If-None-Match") == self.etag:
+            return web.Response(status=304, headers=headers)
+        return web.Response(text=self.body, content_type="text/html", headers=headers)
+
+    @asynccontextmanager
+    async def run(self):
+        app = web.Application()
+        app.router.add_get("/book", self.handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        host, port = runner.addresses[0][:2]
+        try:
+            yield f"http://{host}:{port}/book"
+        finally:
+            await runner.cleanup()
+
+
+async def fetch_with_loader(cache, url):
+    """Запрашивает страницу через BookLoader и дожидается фоновой проверки кэша"""
+    loader = BookLoader(http_cache=cache, max_retries=0)
+    loader.semaphore = asyncio.Semaphore(loader.max_concurrency)
+    loader.rate_limiter = HostRateLimiter()
+    async with aiohttp.ClientSession() as session:
+        body = await loader.fetch(session, url)
+        await asyncio.gather(*loader.revalidations)
+    return body
+
+
+def expire(cache, url):
+    """Делает запись устаревшей, сдвигая время загрузки за пределы ttl"""
+    with cache._lock:
+        cache.conn.execute("UPDATE responses SET fetched_at = ? WHERE url = ?",
+                           (time.time() - cache.ttl - 1, url))
+        cache.conn.commit()
+
+
+def test_fresh_entry_is_served_without_request(cache):
+    server = StandInServer("<html>new</html>", '"v2"', "Wed, 02 Oct 2024 10:00:00 GMT")
+
+    async def scenario():
+        async with server.run() as url:
+            cache.put(url, "<html>cached</html>", '"v1"')
+            return await fetch_with_loader(cache, url)
+
+    assert asyncio.run(scenario()) == "<html>cached</html>"
+    assert server.requests == []
+
+
+def test_stale_entry_not_modified(cache):
+    server = StandInServer("<html>page</html>", '"v1"', "Tue, 01 Oct 2024 10:00:00 GMT")
+
+    async def scenario():
+        async with server.run() as url:
+            cache.put(url, "<html>page</html>", '"v1"', "Tue, 01 Oct 2024 10:00:00 GMT")
+            expire(cache, url)
+            return url, await fetch_with_loader(cache, url)
+
+    url, body = asyncio.run(scenario())
+    # Устаревшая копия отдается сразу, а проверяется условным запросом
+    assert body == "<html>page</html>"
+    assert len(server.requests) == 1
+    assert server.requests[0]["If-None-Match"] == '"v1"'
+    assert server.requests[0]["If-Modified-Since"] == "Tue, 01 Oct 2024 10:00:00 GMT"
+    # Ответ 304 только продлевает запись
+    entry = cache.get(url)
+    assert entry.body == "<html>page</html>"
+    assert cache.is_fresh(entry)
+
+
+def test_stale_entry_replaced_by_new_version(cache):
+    server = StandInServer("<html>new</html>", '"v2"', "Wed, 02 Oct 2024 10:00:00 GMT")
+
+    async def scenario():
+        async with server.run() as url:
+            cache.put(url, "<html>old</html>", '"v1"', "Tue, 01 Oct 2024 10:00:00 GMT")
+            expire(cache, url)
+            return url, await fetch_with_loader(cache, url)
+
+    url, body = asyncio.run(scenario())
+    assert body == "<html>old</html>"
+    assert server.requests[0]["If-None-Match"] == '"v1"'
+    entry = cache.get(url)
+    assert entry.body == "<html>new</html>"
+    assert entry.etag == '"v2"'
+    assert entry.last_modified == "Wed, 02 Oct 2024 10:00:00 GMT"
+    assert cache.is_fresh(entry)
+
+
+def test_entry_expires_after_ttl(cache, monkeypatch):
+    cache.put("http://example.invalid/book", "<html>page</html>")
+    entry = cache.get("http://example.invalid/book")
+    assert cache.is_fresh(entry)
+
+    later = entry.fetched_at + cache.ttl + 1
+    monkeypatch.setattr("core.http_cache.time", SimpleNamespace(time=lambda: later))
+    assert not cache.is_fresh(entry)
+
+    # Проверка с ответом 304 снова делает запись свежей
+    cache.touch("http://example.invalid/book")
+    assert cache.is_fresh(cache.get("http://example.invalid/book"))
@@ -0,0 +1,41 @@
+"""Проверка рендеринга страниц PDF через процессы-обработчики"""
+import glob
+import os
+import pytest
+from core.pdf_handler import RenderEngine
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PDF_FILES = sorted(glob.glob(os.path.join(BASE_DIR, "test_materials", "*.pdf")))
+
+
+@pytest.fixture
+def engine():
+    engine = RenderEngine(workers=1)
+    yield engine
+    engine.shutdown()
+
+
+def test_render_page(engine):
+    page = engine.render_page(PDF_FILES[0], 0, dpi=72)
+    assert page.width > 0 and page.height > 0
+    samples = page.take_samples()
+    assert len(samples) == page.stride * page.height
+    # Пиксели попали в блок общей памяти, и он уже освобожден
+    assert page.shm is None
+
+
+def test_page_larger_than_block(engine):
+    # Блок под A4 при 72 DPI заведомо меньше страницы при 300 DPI
+    engine._block_sizes[(300, None)] = engine.block_size(72)
+    page = engine.render_page(PDF_FILES[0], 0, dpi=300)
+    assert len(page.take_samples()) == page.stride * page.height
+    # Следующие блоки создаются под размер этой страницы
+    assert engine.block_size(300) >= page.stride * page.height
+
+
+def test_render_several_pages(engine):
+    pages = list(engine.render(PDF_FILES[0], range(3), dpi=48))
+    assert sorted(page.page_num for page in pages) == [0, 1, 2]
+    for page in pages:
+        assert len(page.take_samples()) == page.stride * page.height